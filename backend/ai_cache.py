@@ -0,0 +1,195 @@
+"""
+AI 응답 캐시
+
+(함수 이름, 모델 이름, 완성된 프롬프트)의 해시를 키로 모델 응답 텍스트를 저장합니다.
+같은 입력으로 다시 생성/피드백을 요청하면 Vertex AI를 호출하지 않고 캐시된 응답을 사용합니다.
+- 메모리 계층: TTL + LRU, 항목 수/총 바이트 상한
+- 디스크 계층 (선택): AI_CACHE_DIR 설정 시 JSON 파일로 저장, 인스턴스 재시작 후에도 재사용
+"""
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class AIResponseCache:
+    """TTL/LRU 메모리 캐시 + 선택적 디스크 계층"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 6 * 3600,
+        max_entries: int = 256,
+        max_bytes: int = 32 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_entries: int = 2048,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_entries = disk_max_entries
+        # key -> (저장 시각, 응답 텍스트)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._bytes = 0
+        self._disk_writes = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expired": 0}
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(function_name: str, model_name: str, prompt: str) -> str:
+        """캐시 키 생성 (입력 내용 기반 해시)"""
+        payload = json.dumps([function_name, model_name, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """캐시된 응답 반환 (없거나 만료되면 None)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            if time.time() - stored_at <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return value
+            self._remove(key)
+            self.stats["expired"] += 1
+
+        if self.disk_dir:
+            disk_entry = self._read_disk(key)
+            if disk_entry is not None:
+                stored_at, value = disk_entry
+                self._store_memory(key, value, stored_at)
+                self.stats["disk_hits"] += 1
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: str):
+        """응답 저장"""
+        stored_at = time.time()
+        self._store_memory(key, value, stored_at)
+        self.stats["sets"] += 1
+        if self.disk_dir:
+            self._write_disk(key, value, stored_at)
+
+    def clear(self):
+        """메모리/디스크 캐시 모두 비우기"""
+        self._entries.clear()
+        self._bytes = 0
+        if self.disk_dir:
+            for file_name in os.listdir(self.disk_dir):
+                if file_name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(self.disk_dir, file_name))
+                    except OSError:
+                        pass
+
+    def get_stats(self) -> dict:
+        """적중률 등 캐시 지표"""
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "disk_dir": self.disk_dir,
+        }
+
+    # 메모리 계층
+    def _store_memory(self, key: str, value: str, stored_at: float):
+        if key in self._entries:
+            self._remove(key)
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (stored_at, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.stats["evictions"] += 1
+
+    def _remove(self, key: str):
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value.encode("utf-8"))
+
+    # 디스크 계층
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, str]]:
+        path = self._disk_path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - data.get("stored_at", 0) > self.ttl_seconds:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.stats["expired"] += 1
+            return None
+        return data["stored_at"], data["value"]
+
+    def _write_disk(self, key: str, value: str, stored_at: float):
+        path = self._disk_path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"stored_at": stored_at, "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️  AI 캐시 디스크 저장 실패: {e}")
+            return
+
+        # 쓰기 32회마다 오래된 파일 정리
+        self._disk_writes += 1
+        if self._disk_writes % 32 == 0:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        try:
+            files = [
+                os.path.join(self.disk_dir, name)
+                for name in os.listdir(self.disk_dir)
+                if name.endswith(".json")
+            ]
+            if len(files) <= self.disk_max_entries:
+                return
+            files.sort(key=os.path.getmtime)
+            for path in files[:len(files) - self.disk_max_entries]:
+                os.remove(path)
+        except OSError as e:
+            print(f"⚠️  AI 캐시 디스크 정리 실패: {e}")
+
+
+# 전역 캐시 인스턴스 (싱글톤 패턴)
+_ai_cache_instance: Optional[AIResponseCache] = None
+
+
+def get_ai_cache() -> Optional[AIResponseCache]:
+    """AI 응답 캐시 반환 (AI_CACHE_ENABLED=false 이면 None)"""
+    global _ai_cache_instance
+
+    if os.getenv("AI_CACHE_ENABLED", "true").lower() != "true":
+        return None
+
+    if _ai_cache_instance is None:
+        _ai_cache_instance = AIResponseCache(
+            ttl_seconds=float(os.getenv("AI_CACHE_TTL_SECONDS", str(6 * 3600))),
+            max_entries=int(os.getenv("AI_CACHE_MAX_ENTRIES", "256")),
+            max_bytes=int(os.getenv("AI_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            disk_dir=os.getenv("AI_CACHE_DIR") or None,
+            disk_max_entries=int(os.getenv("AI_CACHE_DISK_MAX_ENTRIES", "2048")),
+        )
+    return _ai_cache_instance
@@ -0,0 +1,447 @@
+"""
+Vertex AI 클라이언트 수명 주기 관리
+
+Vertex AI 초기화(인증 파일 탐색, vertexai.init)는 프로세스당 한 번만 수행하고,
+GenerativeModel 핸들은 모델 이름별로 캐시하여 요청 간에 재사용합니다.
+서버 시작 시 백그라운드에서 initialize()를 호출해 두면 첫 AI 요청이 초기화 비용을 내지 않으며,
+현재 상태는 /readyz 엔드포인트로 확인할 수 있습니다.
+모델 제공자는 AI_PROVIDER(vertex/fake/replay)로 바꿀 수 있고, AI_RECORD_PATH를 지정하면 호출을 기록합니다 (ai_recording 참고).
+"""
+import asyncio
+import os
+import pathlib
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional
+from dotenv import load_dotenv
+from ai_resilience import ResilientCaller, create_resilient_caller
+from ai_hedging import HedgePolicy, create_hedge_policy
+from ai_fake import FakeGenerativeModel, is_fake_enabled
+from ai_recording import (
+    RecordingModel, RecordingWriter, ReplayModel, ReplayStore, create_recording_writer, create_replay_store,
+)
+
+load_dotenv()
+
+# 기본 모델 (gemini-2.5-flash는 아직 사용 불가, gemini-2.0-flash-exp 사용)
+DEFAULT_MODEL_NAME = os.getenv("VERTEX_AI_MODEL", "gemini-2.0-flash-exp")
+
+# 모델 제공자: vertex(실제 호출), fake(스키마 기반 가짜 응답), replay(기록된 응답 재생)
+PROVIDERS = ("vertex", "fake", "replay")
+
+
+def get_provider_name() -> str:
+    """사용할 모델 제공자 (AI_PROVIDER, VERTEX_AI_FAKE=true 이면 fake)"""
+    if is_fake_enabled():
+        return "fake"
+    return os.getenv("AI_PROVIDER", "vertex").strip().lower()
+
+def init_vertex_ai():
+    """Vertex AI 초기화"""
+    # vertexai SDK는 import만으로 1초 이상 걸리므로 실제 초기화 시점에 가져옴 (콜드 스타트 단축)
+    import vertexai
+    from utils import find_credentials_file
+    
+    # .env 파일에서 환경 변수 가져오기
+    env_cred_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    found_cred_path = find_credentials_file()
+    cred_path = env_cred_path or found_cred_path
+    
+    project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
+    location = os.getenv("VERTEX_AI_LOCATION")
+    
+    # 기본값 설정
+    if not project_id:
+        project_id = "thinkblock"
+    if not location:
+        location = "asia-northeast3"
+    
+    # 경로 정규화 및 확인
+    if cred_path:
+        # 상대 경로인 경우 절대 경로로 변환
+        if not os.path.isabs(cred_path):
+            project_root = pathlib.Path(__file__).parent.parent
+            cred_path = str(project_root / cred_path)
+        
+        # 절대 경로로 변환
+        cred_path = str(pathlib.Path(cred_path).absolute())
+        
+        # 파일 존재 확인
+        if os.path.exists(cred_path):
+            # GOOGLE_APPLICATION_CREDENTIALS 환경 변수 설정 (Vertex AI가 자동으로 사용)
+            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = cred_path
+            
+            try:
+                vertexai.init(project=project_id, location=location)
+                print(f"✅ Vertex AI 초기화 완료: project={project_id}, location={location}, credentials={cred_path}")
+                return True
+            except Exception as e:
+                error_msg = str(e)
+                print(f"❌ Vertex AI 초기화 실패: {error_msg}")
+                print(f"   인증 파일 경로: {cred_path}")
+                print(f"   파일 존재 여부: {os.path.exists(cred_path)}")
+                # 파일을 찾지 못하는 오류인 경우 더 명확한 메시지 제공
+                if "was not found" in error_msg or "not found" in error_msg.lower():
+                    raise FileNotFoundError(f"인증 파일을 찾을 수 없습니다: {cred_path}\n"
+                                          f"프로젝트 루트에 vertex-ai-thinkblock.json 파일이 있는지 확인하세요.")
+                raise
+        else:
+            # 파일이 존재하지 않는 경우
+            error_msg = f"인증 파일을 찾을 수 없습니다: {cred_path}"
+            print(f"❌ {error_msg}")
+            print(f"   프로젝트 루트: {pathlib.Path(__file__).parent.parent}")
+            print(f"   환경 변수 GOOGLE_APPLICATION_CREDENTIALS: {env_cred_path}")
+            print(f"   find_credentials_file() 결과: {found_cred_path}")
+            raise FileNotFoundError(f"{error_msg}\n프로젝트 루트에 vertex-ai-thinkblock.json 파일이 있는지 확인하세요.")
+    else:
+        # 인증 파일 경로를 찾지 못한 경우
+        # GCP 환경(Cloud Run 등)에서는 Service Account를 통해 자동 인증 가능
+        # 로컬 환경인지 확인 (GCP 환경 변수 확인)
+        is_gcp_env = (
+            os.getenv("K_SERVICE") is not None or  # Cloud Run
+            os.getenv("GAE_SERVICE") is not None or  # App Engine
+            os.getenv("GOOGLE_CLOUD_PROJECT") is not None  # GCP 프로젝트 환경 변수
+        )
+        
+        try:
+            vertexai.init(project=project_id, location=location)
+            if is_gcp_env:
+                print(f"✅ Vertex AI 초기화 완료 (GCP Service Account 사용): project={project_id}, location={location}")
+            else:
+                print(f"✅ Vertex AI 초기화 완료 (기본 인증 사용): project={project_id}, location={location}")
+            return True
+        except Exception as e:
+            error_msg = str(e)
+            print(f"❌ Vertex AI 초기화 실패: {error_msg}")
+            print(f"   인증 파일 경로를 찾을 수 없습니다.")
+            print(f"   프로젝트 루트: {pathlib.Path(__file__).parent.parent}")
+            print(f"   환경 변수 GOOGLE_APPLICATION_CREDENTIALS: {env_cred_path}")
+            print(f"   find_credentials_file() 결과: {found_cred_path}")
+            print(f"   GCP 환경 여부: {is_gcp_env}")
+            
+            # GCP 환경이 아닌 경우에만 FileNotFoundError 발생
+            # GCP 환경에서는 Service Account를 통해 인증할 수 있어야 함
+            if not is_gcp_env:
+                # 파일을 찾지 못하는 오류인 경우 더 명확한 메시지 제공
+                if "was not found" in error_msg or "not found" in error_msg.lower():
+                    raise FileNotFoundError(f"인증 파일을 찾을 수 없습니다.\n"
+                                          f"프로젝트 루트({pathlib.Path(__file__).parent.parent})에 vertex-ai-thinkblock.json 파일이 있는지 확인하세요.\n"
+                                          f"또는 환경 변수 GOOGLE_APPLICATION_CREDENTIALS를 설정하세요.")
+            # GCP 환경에서도 실패한 경우는 다른 인증 오류일 수 있음
+            raise
+
+
+async def _prepend(first_chunk, iterator):
+    """미리 읽은 첫 조각 + 나머지 스트림"""
+    if first_chunk is None:
+        return
+    yield first_chunk
+    async for chunk in iterator:
+        yield chunk
+
+
+class AIClientManager:
+    """프로세스 전역 Vertex AI 클라이언트 관리자"""
+
+    NOT_INITIALIZED = "not_initialized"
+    INITIALIZING = "initializing"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(
+        self,
+        retry_interval_seconds: float = 30,
+        max_concurrent_calls: int = 4,
+        resilience_factory: Callable[[], ResilientCaller] = ResilientCaller,
+        hedging: Optional[HedgePolicy] = None,
+    ):
+        self.state = self.NOT_INITIALIZED
+        self.error: Optional[str] = None
+        self.initialized_at: Optional[float] = None
+        self.init_duration_ms: Optional[float] = None
+        self.retry_interval_seconds = retry_interval_seconds
+        self._failed_at: Optional[float] = None
+        self._models: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self.max_concurrent_calls = max_concurrent_calls
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight_calls = 0
+        self._waiting_calls = 0
+        # 모든 모델 호출에 적용하는 재시도/제한 시간/회로 차단기 (모델별로 따로 두어
+        # 한 모델이 장애일 때 다른 모델로의 대체 호출까지 막히지 않도록 함)
+        self._resilience_factory = resilience_factory
+        self._resilience: Dict[str, ResilientCaller] = {}
+        # 느린 기본 리전 대신 보조 리전에 같은 요청을 보내는 헤징 (보조 리전이 없으면 사용 안 함)
+        self.hedging = hedging or HedgePolicy(locations=[])
+        self._hedge_turn = 0
+        # 모델 제공자 (initialize에서 결정), 재생 기록, 호출 기록기 (AI_RECORD_PATH 지정 시)
+        self.provider: Optional[str] = None
+        self._replay_store: Optional[ReplayStore] = None
+        self._recorder: Optional[RecordingWriter] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == self.READY
+
+    def initialize(self) -> bool:
+        """Vertex AI 초기화 (이미 준비된 경우 바로 반환, 동시 호출 시 한 번만 실행)"""
+        if self.state == self.READY:
+            return True
+
+        with self._lock:
+            if self.state == self.READY:
+                return True
+
+            self.state = self.INITIALIZING
+            started_at = time.perf_counter()
+            try:
+                provider = get_provider_name()
+                if provider not in PROVIDERS:
+                    raise ValueError(f"알 수 없는 AI_PROVIDER: {provider} (사용 가능: {', '.join(PROVIDERS)})")
+                if provider == "fake":
+                    print("⚠️  가짜 AI 모델을 사용합니다")
+                elif provider == "replay":
+                    self._replay_store = create_replay_store()
+                else:
+                    init_vertex_ai()
+                # 재생 중에는 기록하지 않음 (재생 파일에 재생 결과가 다시 쌓이지 않도록)
+                self._recorder = create_recording_writer() if provider != "replay" else None
+                self.provider = provider
+                # 기본 모델 핸들도 미리 만들어 둠
+                self._models[DEFAULT_MODEL_NAME] = self._create_model(DEFAULT_MODEL_NAME)
+            except Exception as e:
+                self.state = self.FAILED
+                self.error = str(e)
+                self._failed_at = time.monotonic()
+                print(f"❌ AI 클라이언트 초기화 실패: {e}")
+                return False
+
+            self.state = self.READY
+            self.error = None
+            self.initialized_at = time.time()
+            self.init_duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
+            print(f"✅ AI 클라이언트 준비 완료 ({self.init_duration_ms}ms)")
+            return True
+
+    def ensure_ready(self):
+        """
+        AI 호출 전에 준비 상태 보장
+
+        초기화에 실패한 상태라면 retry_interval_seconds가 지난 뒤에만 다시 시도하고,
+        그 전에는 마지막 오류로 바로 실패합니다 (요청마다 인증 파일을 탐색하지 않도록).
+
+        Raises:
+            RuntimeError: 초기화 실패 시
+        """
+        if self.state == self.READY:
+            return
+        if self.state == self.FAILED and time.monotonic() - self._failed_at < self.retry_interval_seconds:
+            raise RuntimeError(f"Vertex AI 초기화 실패: {self.error}")
+        if not self.initialize():
+            raise RuntimeError(f"Vertex AI 초기화 실패: {self.error}")
+
+    async def ensure_ready_async(self):
+        """ensure_ready의 비동기 버전 (초기화가 필요하면 스레드 풀에서 수행하여 루프를 막지 않음)"""
+        if self.state == self.READY:
+            return
+        await asyncio.get_running_loop().run_in_executor(None, self.ensure_ready)
+
+    @asynccontextmanager
+    async def _call_slot(self):
+        """동시 모델 호출 수 제한 (max_concurrent_calls 초과분은 대기)"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_calls)
+
+        self._waiting_calls += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting_calls -= 1
+
+        self._in_flight_calls += 1
+        try:
+            yield
+        finally:
+            self._in_flight_calls -= 1
+            self._semaphore.release()
+
+    async def generate_content(self, prompt: str, model_name: str = DEFAULT_MODEL_NAME, **kwargs):
+        """
+        모델 호출 (generate_content_async 사용)
+
+        Vertex SDK의 비동기 클라이언트를 사용하므로 생성 중에도 이벤트 루프가 다른 요청을 처리하며,
+        인스턴스당 동시 모델 호출 수는 max_concurrent_calls로 제한됩니다 (초과분은 대기).
+        일시적 오류는 resilience 정책에 따라 재시도하며, 재시도 대기 중에는 호출 슬롯을 반납합니다.
+
+        Raises:
+            AIUnavailableError: 재시도를 모두 소진했거나 회로 차단기가 열려 있을 때
+        """
+        await self.ensure_ready_async()
+        model = self.get_model(model_name)
+
+        async def attempt():
+            if not self.hedging.enabled:
+                return await model.generate_content_async(prompt, **kwargs)
+            return await self._hedged_generate(model, model_name, prompt, kwargs)
+
+        # 슬롯 대기는 resilience가 시도 제한 시간 밖에서 처리 (대기열이 밀린 것을 모델 장애로 세지 않음)
+        return await self.resilience_for(model_name).call(attempt, f"모델 호출 ({model_name})", slot=self._call_slot)
+
+    async def stream_content(self, prompt: str, model_name: str = DEFAULT_MODEL_NAME, **kwargs) -> AsyncIterator[str]:
+        """
+        스트리밍 모델 호출 (generate_content_async(stream=True) 사용)
+
+        모델이 생성하는 대로 텍스트 조각을 yield 합니다. 스트림이 끝날 때까지 호출 슬롯을 점유합니다.
+        이미 보낸 조각을 되돌릴 수 없으므로 재시도/제한 시간은 스트림 시작(첫 응답)까지만 적용합니다.
+        """
+        await self.ensure_ready_async()
+        model = self.get_model(model_name)
+
+        async def start_stream():
+            # 요청 오류는 첫 조각을 읽을 때 드러나기도 하므로 첫 조각까지 받아야 시작 성공으로 봄
+            responses = await model.generate_content_async(prompt, stream=True, **kwargs)
+            iterator = responses.__aiter__()
+            try:
+                first_chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                return _prepend(None, iterator)
+            return _prepend(first_chunk, iterator)
+
+        async with self._call_slot():
+            responses = await self.resilience_for(model_name).call(start_stream, f"스트리밍 모델 호출 ({model_name})")
+            async for chunk in responses:
+                # 안전 필터 등으로 텍스트가 없는 조각은 건너뜀
+                try:
+                    text = chunk.text
+                except (ValueError, AttributeError):
+                    continue
+                if text:
+                    yield text
+
+    async def _hedged_generate(self, model, model_name: str, prompt: str, kwargs: dict):
+        """
+        기본 리전 호출이 헤징 지연 시간 안에 끝나지 않으면 보조 리전에도 요청하고 먼저 성공한 응답 사용
+
+        둘 다 실패하면 기본 리전의 오류를 전달합니다 (재시도 여부는 resilience가 판단).
+        보조 리전이 이겨 기본 리전 요청을 취소할 때는 그때까지 걸린 시간을 기본 리전 지연 시간(하한)으로 기록합니다
+        (느린 응답이 표본에서 빠지면 헤징 지연 시간이 계속 줄어 설정한 백분위보다 훨씬 자주 헤징하게 됨).
+        """
+        policy = self.hedging
+        policy.stats["calls"] += 1
+        started_at = time.perf_counter()
+        primary = asyncio.ensure_future(model.generate_content_async(prompt, **kwargs))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=policy.delay(model_name))
+            if not done:
+                location = policy.locations[self._hedge_turn % len(policy.locations)]
+                self._hedge_turn += 1
+                policy.stats["hedged"] += 1
+                print(f"🪁 AI 요청 헤징: {time.perf_counter() - started_at:.1f}초 동안 응답 없음 -> {location}")
+                secondary_model = self.get_model(model_name, location)
+                tasks.add(asyncio.ensure_future(secondary_model.generate_content_async(prompt, **kwargs)))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # 먼저 끝났더라도 실패한 응답은 버리고 남은 요청을 기다림
+                for task in done:
+                    if task.exception() is not None:
+                        continue
+                    if task is primary:
+                        policy.record_latency(model_name, time.perf_counter() - started_at)
+                        if len(tasks) > 1:
+                            policy.stats["primary_wins"] += 1
+                    else:
+                        policy.stats["secondary_wins"] += 1
+                    return task.result()
+
+            if len(tasks) > 1:
+                policy.stats["both_failed"] += 1
+            return primary.result()
+        finally:
+            if not primary.done() and len(tasks) > 1:
+                policy.record_latency(model_name, time.perf_counter() - started_at)
+            # 진 요청(또는 바깥에서 취소된 경우 모든 요청) 취소
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def resilience_for(self, model_name: str) -> ResilientCaller:
+        """모델별 재시도/회로 차단기"""
+        resilience = self._resilience.get(model_name)
+        if resilience is None:
+            resilience = self._resilience[model_name] = self._resilience_factory()
+        return resilience
+
+    def _create_model(self, model_name: str, location: Optional[str] = None):
+        """제공자별 모델 생성 (AI_RECORD_PATH가 있으면 호출 기록 래퍼로 감쌈)"""
+        if self.provider == "replay":
+            return ReplayModel(model_name, self._replay_store)
+
+        if self.provider == "fake":
+            model = FakeGenerativeModel(model_name, location or os.getenv("VERTEX_AI_LOCATION", "asia-northeast3"))
+        else:
+            from vertexai.preview.generative_models import GenerativeModel
+            if location is None:
+                model = GenerativeModel(model_name)
+            else:
+                # 전체 리소스 이름으로 만들면 vertexai.init()의 기본 리전 대신 해당 리전 엔드포인트를 사용
+                from google.cloud.aiplatform import initializer as aiplatform_initializer
+                project = aiplatform_initializer.global_config.project
+                model = GenerativeModel(f"projects/{project}/locations/{location}/publishers/google/models/{model_name}")
+
+        if self._recorder is not None:
+            return RecordingModel(model, model_name, self._recorder, location)
+        return model
+
+    def get_model(self, model_name: str = DEFAULT_MODEL_NAME, location: Optional[str] = None):
+        """모델 핸들 반환 (모델 이름/리전별로 한 번만 생성, location 생략 시 기본 리전)"""
+        self.ensure_ready()
+        key = model_name if location is None else f"{model_name}@{location}"
+        model = self._models.get(key)
+        if model is None:
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    model = self._create_model(model_name, location)
+                    self._models[key] = model
+        return model
+
+    def get_status(self) -> dict:
+        """준비 상태 정보"""
+        return {
+            "state": self.state,
+            "error": self.error,
+            "provider": self.provider,
+            "default_model": DEFAULT_MODEL_NAME,
+            "models": list(self._models.keys()),
+            "init_duration_ms": self.init_duration_ms,
+            "max_concurrent_calls": self.max_concurrent_calls,
+            "in_flight_calls": self._in_flight_calls,
+            "waiting_calls": self._waiting_calls,
+            "resilience": {model_name: caller.get_status() for model_name, caller in self._resilience.items()},
+            "hedging": self.hedging.get_status(),
+            "replay": self._replay_store.get_status() if self._replay_store else None,
+            "recording": {"path": self._recorder.path, "records_written": self._recorder.records_written}
+            if self._recorder else None,
+        }
+
+
+# 전역 AI 클라이언트 인스턴스 (싱글톤 패턴)
+_ai_client_instance: Optional[AIClientManager] = None
+
+
+def get_ai_client() -> AIClientManager:
+    """AI 클라이언트 관리자 인스턴스 반환"""
+    global _ai_client_instance
+
+    if _ai_client_instance is None:
+        _ai_client_instance = AIClientManager(
+            retry_interval_seconds=float(os.getenv("AI_INIT_RETRY_SECONDS", "30")),
+            max_concurrent_calls=int(os.getenv("AI_MAX_CONCURRENT_CALLS", "4")),
+            resilience_factory=create_resilient_caller,
+            hedging=create_hedge_policy(),
+        )
+    return _ai_client_instance
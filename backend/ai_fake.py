@@ -0,0 +1,110 @@
+"""
+로컬 가짜 모델 엔드포인트
+
+VERTEX_AI_FAKE=true 이면 Vertex AI 대신 이 모델을 사용합니다 (네트워크/인증 없이 로컬 테스트, 지연 실험용).
+- 응답은 요청의 response_schema를 따르는 JSON으로 생성 (블록 ID가 필요한 배열은 프롬프트의 "블록 ID: ..." 사용)
+- 지연 시간: AI_FAKE_LATENCY_SECONDS (기본 0.5초), 위치별로 AI_FAKE_LOCATION_LATENCY="us-central1=0.2,..."
+- 꼬리 지연: AI_FAKE_SLOW_RATE 확률로 AI_FAKE_SLOW_SECONDS 만큼 느리게 응답 (헤징 확인용)
+"""
+import asyncio
+import json
+import os
+import random
+import re
+from typing import Any, Dict, List, Optional
+
+_BLOCK_ID_PATTERN = re.compile(r"블록 ID: (\S+)")
+
+
+def is_fake_enabled() -> bool:
+    return os.getenv("VERTEX_AI_FAKE", "false").lower() == "true"
+
+
+class FakeResponse:
+    """generate_content 응답 (text, usage_metadata만 제공)"""
+
+    class UsageMetadata:
+        def __init__(self, prompt_token_count: int, candidates_token_count: int):
+            self.prompt_token_count = prompt_token_count
+            self.candidates_token_count = candidates_token_count
+
+    def __init__(self, text: str, prompt: str):
+        self.text = text
+        self.usage_metadata = self.UsageMetadata(len(prompt) // 2, len(text) // 2)
+
+
+def _schema_type(schema: Dict) -> str:
+    return str(schema.get("type_") or schema.get("type") or "OBJECT").upper()
+
+
+def _sample_value(schema: Dict, block_ids: List[str]) -> Any:
+    """response_schema 형식의 예시 값"""
+    schema_type = _schema_type(schema)
+    if schema_type == "OBJECT":
+        return {name: _sample_value(prop, block_ids) for name, prop in schema.get("properties", {}).items()}
+    if schema_type == "ARRAY":
+        items = schema.get("items", {})
+        id_property = items.get("properties", {}).get("id")
+        if id_property is not None and block_ids:
+            # 블록별 결과 배열 (배치 등): 프롬프트의 모든 블록 ID에 대해 생성
+            values = []
+            for index, block_id in enumerate(block_ids):
+                value = _sample_value(items, block_ids)
+                value["id"] = block_id
+                if "level" in value:
+                    value["level"] = index % 5
+                values.append(value)
+            return values
+        return [_sample_value(items, block_ids) for _ in range(3)]
+    if schema_type == "INTEGER":
+        return 0
+    if schema_type == "NUMBER":
+        return 0.0
+    if schema_type == "BOOLEAN":
+        return False
+    return f"(가짜 응답) {schema.get('description', '')}".strip()
+
+
+class FakeGenerativeModel:
+    """GenerativeModel의 generate_content_async만 흉내 내는 가짜 모델"""
+
+    def __init__(self, model_name: str, location: Optional[str] = None):
+        self.model_name = model_name
+        self.location = location
+        self.calls = 0
+
+    def _latency(self) -> float:
+        latency = float(os.getenv("AI_FAKE_LATENCY_SECONDS", "0.5"))
+        for entry in os.getenv("AI_FAKE_LOCATION_LATENCY", "").split(","):
+            location, _, seconds = entry.partition("=")
+            if location.strip() and location.strip() == self.location and seconds:
+                latency = float(seconds)
+        if random.random() < float(os.getenv("AI_FAKE_SLOW_RATE", "0")):
+            latency += float(os.getenv("AI_FAKE_SLOW_SECONDS", "5"))
+        return latency
+
+    def _response_text(self, prompt: str, generation_config) -> str:
+        schema = None
+        if generation_config is not None:
+            schema = generation_config.to_dict().get("response_schema")
+        if not schema:
+            return "{}"
+        return json.dumps(_sample_value(schema, _BLOCK_ID_PATTERN.findall(prompt)), ensure_ascii=False)
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, generation_config=None, **kwargs):
+        self.calls += 1
+        text = self._response_text(prompt, generation_config)
+        latency = self._latency()
+        if not stream:
+            await asyncio.sleep(latency)
+            return FakeResponse(text, prompt)
+
+        async def chunks():
+            # 첫 조각까지 지연의 절반, 나머지는 조각마다 나누어 대기
+            pieces = [text[start:start + 64] for start in range(0, len(text), 64)] or [""]
+            await asyncio.sleep(latency / 2)
+            for piece in pieces:
+                yield FakeResponse(piece, prompt)
+                await asyncio.sleep(latency / 2 / len(pieces))
+
+        return chunks()
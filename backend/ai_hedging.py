@@ -0,0 +1,74 @@
+"""
+AI 요청 헤징 (다른 리전에 같은 요청 한 번 더 보내기)
+
+한 리전(VERTEX_AI_LOCATION)이 느리면 그 리전의 꼬리 지연이 곧 서비스의 p99가 됩니다.
+기본 리전의 응답이 최근 지연 시간의 백분위(AI_HEDGE_PERCENTILE) 안에 오지 않으면
+보조 리전(VERTEX_AI_HEDGE_LOCATIONS)에 같은 요청을 보내고, 먼저 성공한 응답을 사용한 뒤 나머지는 취소합니다.
+"""
+import math
+import os
+from collections import deque
+from typing import Deque, Dict, List
+
+
+class HedgePolicy:
+    """헤징 지연 시간 계산 (모델별 최근 기본 리전 지연 시간의 백분위)"""
+
+    def __init__(
+        self,
+        locations: List[str],
+        percentile: float = 95,
+        initial_delay_seconds: float = 10.0,
+        min_delay_seconds: float = 1.0,
+        min_samples: int = 20,
+        window: int = 200,
+    ):
+        self.locations = locations
+        self.percentile = percentile
+        self.initial_delay_seconds = initial_delay_seconds
+        self.min_delay_seconds = min_delay_seconds
+        self.min_samples = min_samples
+        self.window = window
+        self._latencies: Dict[str, Deque[float]] = {}
+        self.stats = {"calls": 0, "hedged": 0, "primary_wins": 0, "secondary_wins": 0, "both_failed": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.locations)
+
+    def delay(self, model_name: str) -> float:
+        """기본 리전 응답을 기다릴 시간 (표본이 부족하면 initial_delay_seconds)"""
+        samples = self._latencies.get(model_name)
+        if not samples or len(samples) < self.min_samples:
+            return self.initial_delay_seconds
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, math.ceil(len(ordered) * self.percentile / 100) - 1)
+        return max(self.min_delay_seconds, ordered[index])
+
+    def record_latency(self, model_name: str, seconds: float):
+        """기본 리전의 성공 응답 지연 시간 기록 (보조 리전이 이겨 취소된 경우 취소 시점까지의 시간)"""
+        samples = self._latencies.get(model_name)
+        if samples is None:
+            samples = self._latencies[model_name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def get_status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "locations": self.locations,
+            "percentile": self.percentile,
+            "delay_seconds": {model_name: round(self.delay(model_name), 2) for model_name in self._latencies},
+            **self.stats,
+        }
+
+
+def create_hedge_policy() -> HedgePolicy:
+    """환경 변수 설정으로 헤징 정책 생성 (VERTEX_AI_HEDGE_LOCATIONS가 비어 있으면 헤징하지 않음)"""
+    locations = [location.strip() for location in os.getenv("VERTEX_AI_HEDGE_LOCATIONS", "").split(",") if location.strip()]
+    return HedgePolicy(
+        locations=locations,
+        percentile=float(os.getenv("AI_HEDGE_PERCENTILE", "95")),
+        initial_delay_seconds=float(os.getenv("AI_HEDGE_INITIAL_DELAY_SECONDS", "10")),
+        min_delay_seconds=float(os.getenv("AI_HEDGE_MIN_DELAY_SECONDS", "1")),
+        min_samples=int(os.getenv("AI_HEDGE_MIN_SAMPLES", "20")),
+    )
@@ -0,0 +1,308 @@
+"""
+AI 백그라운드 작업 큐
+
+오래 걸리는 AI 작업(블록 생성/배치/피드백)을 HTTP 요청과 분리하여 실행합니다.
+- enqueue(): 작업을 저장소에 기록하고 바로 작업 ID를 반환
+- 워커: 인스턴스 안의 asyncio 워커들이 작업을 가져가(claim) ai_operations 실행 함수로 처리
+- 작업 상태(pending -> running -> succeeded/failed)와 결과는 저장소에 기록되므로
+  클라이언트는 폴링/SSE로 조회할 수 있고, 인스턴스가 재시작되어도 남은 작업을 이어서 실행합니다.
+- 끝난 작업은 retention_seconds가 지나면 주기적으로 삭제합니다.
+"""
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+from pydantic import BaseModel
+from storage import get_storage
+from ai_operations import OPERATIONS, operation_key, run_operation
+from exceptions import BaseAPIException
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+TERMINAL_STATUSES = (JOB_SUCCEEDED, JOB_FAILED)
+
+
+class AIJobQueue:
+    """저장소 기반 AI 작업 큐 + 인스턴스 내 워커 풀"""
+
+    def __init__(
+        self,
+        worker_count: int = 2,
+        stale_after_seconds: float = 900,
+        max_attempts: int = 3,
+        shutdown_grace_seconds: float = 8,
+        retention_seconds: float = 7 * 24 * 3600,
+        prune_interval_seconds: float = 3600,
+    ):
+        self.worker_count = worker_count
+        self.stale_after_seconds = stale_after_seconds
+        self.max_attempts = max_attempts
+        self.shutdown_grace_seconds = shutdown_grace_seconds
+        self.retention_seconds = retention_seconds
+        self.prune_interval_seconds = prune_interval_seconds
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._pruner: Optional[asyncio.Task] = None
+        # 이 인스턴스에서 대기/실행 중인 동일 요청 -> 작업 ID
+        self._active_keys: Dict[str, str] = {}
+        # 워커가 취소된 뒤에도 계속 실행 중인 작업 (끝나면 결과를 기록)
+        self._detached: Set[asyncio.Future] = set()
+        # 작업 ID -> 상태 변경 알림과 기다리는 호출 수 (SSE 대기용, 기다리는 호출이 없으면 제거)
+        self._change_events: Dict[str, asyncio.Event] = {}
+        self._change_waiters: Dict[str, int] = {}
+        self.stats = {"enqueued": 0, "coalesced": 0, "recovered": 0, "succeeded": 0, "failed": 0, "pruned": 0}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self):
+        """워커 시작 및 이전 인스턴스가 끝내지 못한 작업 다시 대기열에 넣기"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker_loop(), name=f"ai-job-worker-{n}")
+            for n in range(self.worker_count)
+        ]
+        if self.retention_seconds > 0:
+            self._pruner = asyncio.create_task(self._prune_loop(), name="ai-job-pruner")
+        print(f"✅ AI 작업 워커 시작: {self.worker_count}개 ({self.worker_id})")
+
+        try:
+            # 저장소 초기화와 조회가 블로킹이므로 스레드 풀에서 수행
+            job_ids = await asyncio.get_running_loop().run_in_executor(None, self._recover_unfinished_jobs)
+        except Exception as e:
+            print(f"⚠️  미완료 AI 작업 복구 실패: {e}")
+            return
+        for job_id in job_ids:
+            self._queue.put_nowait(job_id)
+
+    async def stop(self):
+        """
+        워커 중지
+
+        실행 중이던 작업은 shutdown_grace_seconds까지 기다려 결과를 기록합니다. 그때까지 끝나지 않은 작업은
+        running으로 남으며, stale_after_seconds가 지난 뒤 다른 인스턴스(또는 재시작한 인스턴스)가 다시 실행합니다.
+        """
+        workers, self._workers = self._workers, []
+        if self._pruner is not None:
+            workers.append(self._pruner)
+            self._pruner = None
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if self._detached:
+            print(f"⏳ 실행 중인 AI 작업 {len(self._detached)}개가 끝나기를 기다립니다 (최대 {self.shutdown_grace_seconds}초)")
+            await asyncio.wait(set(self._detached), timeout=self.shutdown_grace_seconds)
+
+    def _recover_unfinished_jobs(self) -> List[str]:
+        storage = get_storage()
+        stale_before = datetime.now() - timedelta(seconds=self.stale_after_seconds)
+        job_ids = []
+        for job in reversed(storage.list_jobs(statuses=[JOB_PENDING, JOB_RUNNING], limit=1000)):
+            if job["status"] == JOB_RUNNING:
+                started_at = job.get("startedAt")
+                if started_at is not None and started_at.replace(tzinfo=None) > stale_before:
+                    # 다른 인스턴스가 실행 중일 수 있음
+                    continue
+                if job.get("attempts", 0) >= self.max_attempts:
+                    storage.update_job(job["id"], {
+                        "status": JOB_FAILED,
+                        "error": "작업이 여러 번 중단되어 실행을 포기했습니다",
+                        "finishedAt": datetime.now(),
+                    })
+                    continue
+                storage.update_job(job["id"], {"status": JOB_PENDING})
+            job_ids.append(job["id"])
+        if job_ids:
+            self.stats["recovered"] += len(job_ids)
+            print(f"🔄 미완료 AI 작업 {len(job_ids)}개를 다시 대기열에 넣었습니다")
+        return job_ids
+
+    def enqueue(self, kind: str, project_id: str, request: Optional[BaseModel] = None) -> dict:
+        """
+        작업 등록 후 작업 정보 반환
+
+        같은 프로젝트의 동일 요청이 이 인스턴스에서 아직 끝나지 않았다면 새로 만들지 않고 그 작업을 반환합니다.
+        """
+        if self._queue is None:
+            raise RuntimeError("AI 작업 워커가 시작되지 않았습니다")
+
+        storage = get_storage()
+        key = operation_key(kind, project_id, request)
+        existing_id = self._active_keys.get(key)
+        if existing_id:
+            existing = storage.get_job(existing_id)
+            if existing and existing["status"] not in TERMINAL_STATUSES:
+                self.stats["coalesced"] += 1
+                return existing
+
+        now = datetime.now()
+        job = storage.create_job({
+            "id": str(uuid.uuid4()),
+            "project_id": project_id,
+            "kind": kind,
+            "params": request.dict() if request is not None else {},
+            "status": JOB_PENDING,
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "worker_id": None,
+            "createdAt": now,
+            "updatedAt": now,
+            "startedAt": None,
+            "finishedAt": None,
+        })
+        self._active_keys[key] = job["id"]
+        self._queue.put_nowait(job["id"])
+        self.stats["enqueued"] += 1
+        print(f"📥 AI 작업 등록: {kind} (project={project_id}, job={job['id']})")
+        return job
+
+    async def _worker_loop(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ AI 작업 처리 중 예기치 못한 오류 ({job_id}): {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job_id: str):
+        storage = get_storage()
+        job = storage.claim_job(job_id, self.worker_id)
+        if job is None:
+            # 이미 다른 워커/인스턴스가 가져갔거나 삭제됨
+            return
+        self._notify(job_id)
+
+        kind, project_id = job["kind"], job["project_id"]
+        request_model, _ = OPERATIONS[kind]
+        request = request_model(**job["params"]) if request_model else None
+        key = operation_key(kind, project_id, request)
+        self._active_keys.setdefault(key, job_id)
+
+        operation = asyncio.ensure_future(run_operation(kind, project_id, request))
+        try:
+            # asyncio.wait는 기다리는 쪽이 취소되어도 operation을 취소하지 않음
+            await asyncio.wait({operation})
+        except asyncio.CancelledError:
+            # 작업은 단일 실행(shield)으로 계속 진행되어 결과를 저장하므로 pending으로 되돌리지 않음
+            # (다시 실행하면 블록이 중복 생성됨). running으로 둔 채 끝나면 결과를 기록
+            if operation.done():
+                self._complete(job_id, key, operation)
+            else:
+                self._detached.add(operation)
+                operation.add_done_callback(lambda done: self._complete(job_id, key, done))
+            raise
+        self._complete(job_id, key, operation)
+
+    def _complete(self, job_id: str, key: str, operation: asyncio.Future):
+        """끝난 operation의 결과로 작업 상태 기록"""
+        self._detached.discard(operation)
+        try:
+            if operation.cancelled():
+                self._finish(job_id, JOB_FAILED, error="작업이 취소되었습니다")
+            elif isinstance(operation.exception(), BaseAPIException):
+                self._finish(job_id, JOB_FAILED, error=operation.exception().message)
+            elif operation.exception() is not None:
+                self._finish(job_id, JOB_FAILED, error=str(operation.exception()))
+            else:
+                self._finish(job_id, JOB_SUCCEEDED, result=operation.result())
+        finally:
+            if self._active_keys.get(key) == job_id:
+                del self._active_keys[key]
+            self._notify(job_id)
+
+    def _finish(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+        get_storage().update_job(job_id, {
+            "status": status,
+            "result": result,
+            "error": error,
+            "finishedAt": datetime.now(),
+        })
+        self.stats[status] += 1
+        icon = "✅" if status == JOB_SUCCEEDED else "❌"
+        print(f"{icon} AI 작업 {status}: {job_id}" + (f" ({error})" if error else ""))
+
+    def _notify(self, job_id: str):
+        event = self._change_events.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def wait_for_change(self, job_id: str, timeout: float):
+        """작업 상태가 바뀌거나 timeout이 지날 때까지 대기 (다른 인스턴스가 실행하는 작업은 timeout마다 재조회)"""
+        event = self._change_events.setdefault(job_id, asyncio.Event())
+        self._change_waiters[job_id] = self._change_waiters.get(job_id, 0) + 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # 이 인스턴스가 실행하지 않는 작업은 _notify가 불리지 않으므로 마지막 대기자가 정리
+            self._change_waiters[job_id] -= 1
+            if self._change_waiters[job_id] == 0:
+                del self._change_waiters[job_id]
+                self._change_events.pop(job_id, None)
+
+    def _prune_finished_jobs(self, batch_size: int = 500) -> int:
+        finished_before = datetime.now() - timedelta(seconds=self.retention_seconds)
+        storage = get_storage()
+        pruned = 0
+        while True:
+            deleted = storage.delete_finished_jobs(finished_before, limit=batch_size)
+            pruned += deleted
+            if deleted < batch_size:
+                break
+        if pruned:
+            self.stats["pruned"] += pruned
+            print(f"🧹 끝난 지 {self.retention_seconds / 3600:g}시간이 지난 AI 작업 {pruned}개를 삭제했습니다")
+        return pruned
+
+    async def _prune_loop(self):
+        """끝난 작업을 주기적으로 삭제 (저장소 호출이 블로킹이므로 스레드 풀에서 수행)"""
+        while True:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._prune_finished_jobs)
+            except Exception as e:
+                print(f"⚠️  끝난 AI 작업 정리 실패: {e}")
+            await asyncio.sleep(self.prune_interval_seconds)
+
+    def get_status(self) -> dict:
+        """워커 상태 및 지표"""
+        return {
+            "worker_id": self.worker_id,
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "active": len(self._active_keys),
+            "detached": len(self._detached),
+            **self.stats,
+        }
+
+
+# 전역 작업 큐 인스턴스 (싱글톤 패턴)
+_job_queue_instance: Optional[AIJobQueue] = None
+
+
+def get_job_queue() -> AIJobQueue:
+    """AI 작업 큐 인스턴스 반환"""
+    global _job_queue_instance
+
+    if _job_queue_instance is None:
+        _job_queue_instance = AIJobQueue(
+            worker_count=int(os.getenv("AI_JOB_WORKERS", "2")),
+            stale_after_seconds=float(os.getenv("AI_JOB_STALE_SECONDS", "900")),
+            max_attempts=int(os.getenv("AI_JOB_MAX_ATTEMPTS", "3")),
+            shutdown_grace_seconds=float(os.getenv("AI_JOB_SHUTDOWN_GRACE_SECONDS", "8")),
+            retention_seconds=float(os.getenv("AI_JOB_RETENTION_HOURS", "168")) * 3600,
+        )
+    return _job_queue_instance
@@ -0,0 +1,237 @@
+"""
+AI 응답 JSON 추출
+
+모델 응답 텍스트에서 JSON 값을 한 번의 순회로 찾아냅니다.
+- 첫 번째 중괄호/대괄호 앞의 텍스트(```json 코드 블록 표시, 설명 문장)와 값 뒤의 텍스트는 무시
+- 문자열 안의 괄호, 쉼표, 이스케이프(\\", \\\\)를 구분
+- 조각(chunk) 단위로 이어서 입력 가능 (이미 읽은 위치부터 계속 읽음, 스트리밍 응답에 사용)
+- 응답이 중간에 잘렸거나 끝에 불필요한 쉼표가 있으면, 마지막으로 완성된 항목까지의
+  가장 긴 유효한 앞부분에 닫는 괄호를 붙여 복구 (잃는 항목은 최대 한 개)
+"""
+import json
+import re
+from typing import Any, List, Optional
+
+_CLOSERS = {"{": "}", "[": "]"}
+_OPENER = re.compile(r"[{\[]")
+_STRUCTURAL = re.compile(r'[{}\[\]",:]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class IncrementalJSONExtractor:
+    """
+    조각 단위 텍스트에서 JSON 값을 추출하는 증분 스캐너
+
+    array_key를 지정하면 최상위 객체의 해당 배열(응답이 최상위 배열이면 그 배열)의
+    객체/배열 항목이 완성될 때마다 feed()가 반환합니다.
+    """
+
+    def __init__(self, array_key: Optional[str] = None):
+        self.array_key = array_key
+        self._buffer = ""
+        self._pos = 0
+        self._start = -1          # 최상위 값 시작 위치
+        self._end = -1            # 최상위 값 끝 위치 (완성 시)
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string = None  # 직전에 끝난 문자열의 (시작, 끝) 위치
+        self._pending_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start = -1
+        # 복구 지점: 이 위치까지 자르고 closers를 붙이면 유효한 JSON
+        self._safe_cut = -1
+        self._safe_closers = ""
+        self._open_array_items = 0  # 열려 있는 "배열 안의 객체" 수 (항목이 완성되기 전에는 복구 지점 없음)
+        self._last_token = -1      # 문자열 밖에서 마지막으로 읽은 공백 아닌 문자 위치
+        self._trailing_commas: List[int] = []  # 닫는 괄호 바로 앞의 쉼표 위치 ([1, 2,] 등)
+        self.items_emitted = 0
+
+    @property
+    def complete(self) -> bool:
+        """최상위 값이 닫혔는지 여부"""
+        return self._end >= 0
+
+    @property
+    def text(self) -> str:
+        """지금까지 입력된 전체 텍스트"""
+        return self._buffer
+
+    def _mark_safe(self, cut: int):
+        if self._open_array_items:
+            return
+        self._safe_cut = cut
+        self._safe_closers = "".join(_CLOSERS[opener] for opener in reversed(self._stack))
+
+    def feed(self, chunk: str) -> List[Any]:
+        """텍스트 조각을 추가하고, array_key 배열에서 새로 완성된 항목 목록 반환"""
+        self._buffer += chunk
+        buffer = self._buffer
+        items = []
+        i = self._pos
+        length = len(buffer)
+
+        while i < length and self._end < 0:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    i += 1
+                    continue
+                # 문자열 내용은 정규식으로 건너뛰고 따옴표/백슬래시에서만 멈춤
+                match = _STRING_SPECIAL.search(buffer, i)
+                if match is None:
+                    i = length
+                    break
+                i = match.start()
+                if buffer[i] == "\\":
+                    self._escape = True
+                else:
+                    self._in_string = False
+                    self._last_string = (self._string_start, i)
+                    self._last_token = i
+                i += 1
+                continue
+
+            if self._start < 0:
+                match = _OPENER.search(buffer, i)
+                if match is None:
+                    i = length
+                    break
+                i = match.start()
+                char = buffer[i]
+                self._start = i
+                self._stack.append(char)
+                if char == "[" and self.array_key is not None:
+                    self._array_depth = 1
+                self._mark_safe(i + 1)
+                i += 1
+                continue
+
+            match = _STRUCTURAL.search(buffer, i)
+            if match is None:
+                if buffer[i:].strip():
+                    self._last_token = length - 1
+                i = length
+                break
+            if buffer[i:match.start()].strip():
+                # 숫자, true/false/null 등 괄호 밖의 값
+                self._last_token = match.start() - 1
+            i = match.start()
+            char = buffer[i]
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == ":":
+                if len(self._stack) == 1 and self._last_string is not None:
+                    key_start, key_end = self._last_string
+                    self._pending_key = buffer[key_start + 1:key_end]
+            elif char == ",":
+                self._pending_key = None
+                self._mark_safe(i)
+            elif char in _CLOSERS:
+                parent = self._stack[-1]
+                self._stack.append(char)
+                depth = len(self._stack)
+                if (
+                    self._array_depth is None
+                    and char == "["
+                    and depth == 2
+                    and self.array_key is not None
+                    and self._pending_key == self.array_key
+                ):
+                    self._array_depth = depth
+                elif self._array_depth is not None and depth == self._array_depth + 1:
+                    self._item_start = i
+                # 배열 안의 객체는 완성된 뒤에만 복구 지점이 됨 (일부 필드만 있는 항목을 만들지 않도록)
+                if char == "{" and parent == "[":
+                    self._open_array_items += 1
+                self._mark_safe(i + 1)
+            else:
+                if self._last_token >= 0 and buffer[self._last_token] == ",":
+                    self._trailing_commas.append(self._last_token)
+                depth = len(self._stack)
+                if self._array_depth is not None and depth == self._array_depth + 1 and self._item_start >= 0:
+                    try:
+                        items.append(json.loads(buffer[self._item_start:i + 1]))
+                        self.items_emitted += 1
+                    except json.JSONDecodeError as e:
+                        print(f"⚠️  스트리밍 항목 파싱 실패 (건너뜀): {e}")
+                    self._item_start = -1
+                closed = self._stack.pop()
+                if closed == "{" and self._stack and self._stack[-1] == "[":
+                    self._open_array_items -= 1
+                if not self._stack:
+                    self._end = i + 1
+                else:
+                    self._mark_safe(i + 1)
+            self._last_token = i
+            i += 1
+
+        self._pos = i
+        return items
+
+    def _without_trailing_commas(self) -> str:
+        parts = []
+        previous = self._start
+        for position in self._trailing_commas:
+            parts.append(self._buffer[previous:position])
+            previous = position + 1
+        parts.append(self._buffer[previous:self._end])
+        return "".join(parts)
+
+    def recovered_text(self) -> Optional[str]:
+        """마지막 복구 지점까지 자르고 괄호를 닫은 텍스트 (복구 불가 시 None)"""
+        if self._safe_cut < 0:
+            return None
+        return self._buffer[self._start:self._safe_cut].rstrip().rstrip(",") + self._safe_closers
+
+    def result(self) -> Any:
+        """
+        추출한 JSON 값 반환
+
+        Raises:
+            ValueError: JSON 값을 찾지 못했거나 복구할 수 없을 때
+        """
+        if self._start < 0:
+            raise ValueError("JSON 객체를 찾을 수 없습니다 (중괄호 없음)")
+
+        error = None
+        if self.complete:
+            try:
+                return json.loads(self._buffer[self._start:self._end])
+            except json.JSONDecodeError as e:
+                error = e
+            if self._trailing_commas:
+                try:
+                    value = json.loads(self._without_trailing_commas())
+                    print(f"⚠️  JSON 형식 보정: 불필요한 쉼표 {len(self._trailing_commas)}개 제거")
+                    return value
+                except json.JSONDecodeError:
+                    pass
+
+        recovered = self.recovered_text()
+        if recovered is not None:
+            try:
+                value = json.loads(recovered)
+                reason = "형식 오류" if self.complete else "응답 잘림"
+                print(f"⚠️  JSON 부분 복구 ({reason}): {len(recovered)}/{len(self._buffer) - self._start} 문자 사용")
+                return value
+            except json.JSONDecodeError as e:
+                error = error or e
+
+        text = self._buffer[self._start:]
+        if error is not None:
+            around = text[max(0, error.pos - 200):error.pos + 200]
+            print(f"❌ JSON 파싱 실패: {error}\n오류 위치 주변:\n{around}")
+            raise ValueError(f"AI 응답을 파싱할 수 없습니다: {str(error)}")
+        print(f"❌ JSON 파싱 실패: 복구 가능한 지점 없음 (처음 500자):\n{text[:500]}")
+        raise ValueError("AI 응답을 파싱할 수 없습니다: 불완전한 JSON")
+
+
+def extract_json(text: str) -> Any:
+    """응답 텍스트 전체에서 JSON 값 추출 (IncrementalJSONExtractor 한 번 순회)"""
+    extractor = IncrementalJSONExtractor()
+    extractor.feed(text)
+    return extractor.result()
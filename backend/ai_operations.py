@@ -0,0 +1,395 @@
+"""
+AI 작업 실행
+
+AI 엔드포인트(동기 응답)와 백그라운드 작업 워커(ai_jobs)가 공통으로 사용하는 실행 함수입니다.
+각 함수는 모델 호출과 결과 저장(블록, 카테고리, 프로젝트 분석/배치 이유)까지 수행합니다.
+"""
+import asyncio
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+from models import AIGenerateBlocksRequest, AIArrangeBlocksRequest, AIFeedbackRequest, AutoArrangeRequest, BlockCreate
+from storage import get_storage
+from ai_service import generate_blocks, arrange_blocks, generate_feedback
+from ai_client import get_ai_client
+from ai_retrieval import get_block_text_indexes, retrieval_max_blocks
+from exceptions import AIServiceError, StorageError, ValidationError
+from single_flight import SingleFlight
+from analysis import auto_layer, describe_layering, project_centrality
+
+# 같은 프로젝트에 동시에 들어온 동일 AI 요청(더블클릭, 여러 탭)은 한 번만 실행하고 결과를 공유
+# 모델 호출과 저장(update_project, 블록 레벨 업데이트)도 한 번만 수행됨
+ai_single_flight = SingleFlight("AI 요청")
+
+
+async def run_generate_blocks(project_id: str, request: AIGenerateBlocksRequest):
+    """AI 블록 생성 실행 (블록/카테고리/프로젝트 분석 저장 포함)"""
+    try:
+        storage = get_storage()
+
+        # Vertex AI 클라이언트 준비 (프로세스당 한 번만 초기화, 이후에는 즉시 반환)
+        try:
+            await get_ai_client().ensure_ready_async()
+        except Exception as e:
+            raise AIServiceError(f"AI 블록 생성 실패: {str(e)}")
+        
+        # 기존 카테고리 가져오기 (저장소 호출은 블로킹이므로 AI 작업 중에도 CRUD 요청이 처리되도록 이벤트 루프 밖에서 실행)
+        loop = asyncio.get_running_loop()
+        existing_categories = await loop.run_in_executor(None, storage.get_categories, project_id)
+        
+        # AI로 블록 생성
+        generate_result = await generate_blocks(
+            project_overview=request.project_overview,
+            current_status=request.current_status,
+            problems=request.problems,
+            additional_info=request.additional_info,
+            existing_categories=existing_categories
+        )
+        
+        # 결과에서 blocks와 project_analysis 추출
+        if isinstance(generate_result, dict):
+            generated_blocks = generate_result.get("blocks", [])
+            project_analysis = generate_result.get("project_analysis")
+        else:
+            # 레거시 호환성 (리스트로 반환된 경우)
+            generated_blocks = generate_result
+            project_analysis = None
+        
+        created_blocks = await loop.run_in_executor(
+            None, _save_generated_blocks, storage, project_id, generated_blocks, project_analysis, existing_categories
+        )
+        return {"blocks": created_blocks}
+    except ValidationError:
+        raise
+    except AIServiceError:
+        raise
+    except Exception as e:
+        raise AIServiceError(f"AI 블록 생성 실패: {str(e)}")
+
+
+def _save_generated_blocks(
+    storage, project_id: str, generated_blocks: List[Dict], project_analysis: Optional[str], existing_categories: List[str]
+) -> List[Dict]:
+    """
+    생성 결과 저장 (프로젝트 분석, 블록, 새 카테고리)
+    
+    블록은 batch_create_blocks로 한 번에 저장합니다 (블록마다 왕복하지 않음).
+    """
+    # project_analysis를 프로젝트에 저장
+    if project_analysis:
+        project_updates = {"project_analysis": project_analysis}
+        storage.update_project(project_id, project_updates)
+        print(f"✅ 프로젝트 분석 저장 완료: {len(project_analysis)} 문자")
+    
+    # 생성된 블록들을 저장
+    blocks_data = [
+        BlockCreate(
+            title=block_data.get("title", ""),
+            description=block_data.get("description", ""),
+            level=-1,  # 기본값: 좌측 리스트에 표시
+            order=0,
+            category=block_data.get("category")
+        ).dict()
+        for block_data in generated_blocks
+    ]
+    created_blocks = storage.batch_create_blocks(project_id, blocks_data) if blocks_data else []
+    
+    # 새로 생성된 카테고리들을 프로젝트 카테고리 목록에 추가
+    new_categories = {block["category"] for block in created_blocks if block.get("category")}
+    if new_categories:
+        updated_categories = list(set(existing_categories) | new_categories)
+        storage.update_categories(project_id, updated_categories)
+    return created_blocks
+
+
+def _load_board(storage, project_id: str):
+    """프로젝트의 모든 블록과 프로젝트 문서 조회 (이벤트 루프 밖에서 실행)"""
+    return storage.get_all_blocks(project_id), storage.get_project(project_id)
+
+
+async def run_arrange_blocks(project_id: str, request: AIArrangeBlocksRequest):
+    """AI 블록 배치 실행 (블록 레벨과 배치 이유 저장 포함)"""
+    try:
+        storage = get_storage()
+        
+        # 배치할 블록들과 프로젝트(저장된 project_analysis) 가져오기
+        all_blocks, project = await asyncio.get_running_loop().run_in_executor(None, _load_board, storage, project_id)
+        
+        # 요청된 블록 ID들만 필터링
+        blocks_to_arrange = [block for block in all_blocks if block.get("id") in request.block_ids]
+        
+        if not blocks_to_arrange:
+            raise ValidationError("배치할 블록을 찾을 수 없습니다")
+        
+        project_analysis = project.get("project_analysis") if project else None
+        
+        # 블록이 많으면 배치 계획 프롬프트를 요약하기 위해 블록 텍스트 색인 준비
+        block_index = None
+        if len(blocks_to_arrange) > retrieval_max_blocks():
+            block_index = await asyncio.get_running_loop().run_in_executor(
+                None, get_block_text_indexes().get, project_id, all_blocks
+            )
+        
+        # AI로 블록 배치 (저장된 project_analysis 사용)
+        try:
+            # Vertex AI 클라이언트 준비 (프로세스당 한 번만 초기화, 이후에는 즉시 반환)
+            try:
+                await get_ai_client().ensure_ready_async()
+            except Exception as e:
+                raise AIServiceError(f"AI 블록 배치 실패: {str(e)}")
+            
+            arranged_blocks = await arrange_blocks(
+                blocks_to_arrange,
+                project_overview=project_analysis,  # generate_blocks에서 생성된 project_analysis 사용
+                current_status=None,
+                problems=None,
+                additional_info=None,
+                block_index=block_index
+            )
+        except Exception as e:
+            # 의존성이 있는 보드는 AI 없이도 배치할 수 있으므로 자동 배치로 대체 (AI_ARRANGE_FALLBACK=none 이면 사용 안 함)
+            if os.getenv("AI_ARRANGE_FALLBACK", "auto").lower() != "auto" or not _has_dependencies(blocks_to_arrange):
+                raise
+            print(f"↪️  AI 블록 배치 실패, 의존성 기반 자동 배치로 대체: {e}")
+            # 계산과 저장은 블록 수에 비례하므로 이벤트 루프 밖에서 실행
+            result = await asyncio.get_running_loop().run_in_executor(
+                None, _save_auto_layering, storage, project_id, blocks_to_arrange, all_blocks
+            )
+            return {**result, "engine": "auto", "fallback": True}
+        
+        # 배치 이유 추출 (첫 번째 블록에서)
+        arrangement_reasoning = ""
+        if arranged_blocks and len(arranged_blocks) > 0:
+            arrangement_reasoning = arranged_blocks[0].get("arrangement_reasoning", "")
+            print(f"🔍 추출된 배치 이유 길이: {len(arrangement_reasoning)} 문자")
+            if arrangement_reasoning:
+                print(f"🔍 배치 이유 일부: {arrangement_reasoning[:200]}")
+        
+        updated_blocks = await asyncio.get_running_loop().run_in_executor(
+            None, _save_arrangement, storage, project_id, arranged_blocks, arrangement_reasoning, all_blocks
+        )
+        print(f"🔍 API 응답에 포함할 reasoning: {len(arrangement_reasoning)} 문자")
+        return {"blocks": updated_blocks, "reasoning": arrangement_reasoning, "engine": "ai"}
+    except ValidationError:
+        raise
+    except AIServiceError:
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise AIServiceError(f"AI 블록 배치 실패: {str(e)}")
+
+
+def _save_arrangement(
+    storage, project_id: str, arranged_blocks: List[Dict], arrangement_reasoning: str, all_blocks: List[Dict]
+) -> List[Dict]:
+    """
+    배치 결과 저장 (블록 레벨 업데이트, 배치 이유를 프로젝트에 저장)
+    
+    레벨이 바뀐 블록만 batch_update_blocks로 한 번에 저장하고(블록마다 왕복하지 않음),
+    응답용 블록은 이미 읽어 둔 all_blocks에 새 레벨을 반영해 만듭니다. 보드에 없는 블록 ID는 건너뜁니다.
+    """
+    blocks_by_id = {block["id"]: block for block in all_blocks}
+    updated_blocks = []
+    level_changes = {}
+    for arranged_block in arranged_blocks:
+        block = blocks_by_id.get(arranged_block.get("id"))
+        if block is None:
+            continue
+        new_level = arranged_block.get("level", 0)
+        if block.get("level") != new_level:
+            level_changes[block["id"]] = {"level": new_level}
+        updated_blocks.append({**block, "level": new_level})
+    if level_changes:
+        storage.batch_update_blocks(project_id, level_changes)
+    
+    # 배치 이유를 프로젝트에 저장 (JSON 형식)
+    if arrangement_reasoning:
+        reasoning_data = {
+            "type": "arrangement",
+            "content": arrangement_reasoning
+        }
+        project_updates = {"arrangement_reasoning": json.dumps(reasoning_data, ensure_ascii=False)}
+        storage.update_project(project_id, project_updates)
+        print(f"✅ 배치 이유 프로젝트에 저장 완료: {len(arrangement_reasoning)} 문자")
+    return updated_blocks
+
+
+def _has_dependencies(blocks: List[Dict]) -> bool:
+    return any(block.get("dependencies") for block in blocks)
+
+
+def _save_auto_layering(storage, project_id: str, blocks_to_arrange: List[Dict], all_blocks: List[Dict]) -> dict:
+    """의존성 기반 자동 배치 계산 후 AI 배치와 같은 방식으로 저장"""
+    target_ids = {block.get("id") for block in blocks_to_arrange}
+    fixed_levels = {block["id"]: block.get("level", -1) for block in all_blocks if block.get("id") not in target_ids}
+    result = auto_layer(blocks_to_arrange, fixed_levels)
+    arranged_blocks = [{"id": block_id, "level": level} for block_id, level in result["levels"].items()]
+    arrangement_reasoning = describe_layering(result)
+    updated_blocks = _save_arrangement(storage, project_id, arranged_blocks, arrangement_reasoning, all_blocks)
+    print(f"🧮 자동 배치: 블록 {len(updated_blocks)}개, 계층 {result['layers']}개, 순환 간선 {len(result['cycle_edges'])}개")
+    return {
+        "blocks": updated_blocks,
+        "reasoning": arrangement_reasoning,
+        "layers": result["layers"],
+        "cycle_edges": [list(edge) for edge in result["cycle_edges"]],
+    }
+
+
+def run_auto_arrange(project_id: str, request: AutoArrangeRequest) -> dict:
+    """
+    의존성 기반 자동 배치 실행 (AI 호출 없음)
+
+    block_ids를 생략하면 프로젝트의 모든 블록을 배치합니다.
+    """
+    try:
+        storage = get_storage()
+        all_blocks = storage.get_all_blocks(project_id)
+        if request.block_ids is None:
+            blocks_to_arrange = all_blocks
+        else:
+            requested_ids = set(request.block_ids)
+            blocks_to_arrange = [block for block in all_blocks if block.get("id") in requested_ids]
+        
+        if not blocks_to_arrange:
+            raise ValidationError("배치할 블록을 찾을 수 없습니다")
+        
+        return {**_save_auto_layering(storage, project_id, blocks_to_arrange, all_blocks), "engine": "auto"}
+    except ValidationError:
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise StorageError(f"자동 배치 실패: {str(e)}")
+
+
+async def run_feedback(project_id: str, request: Optional[AIFeedbackRequest] = None):
+    """AI 피드백 생성 실행 (피드백 저장 포함)"""
+    try:
+        storage = get_storage()
+
+        # Vertex AI 클라이언트 준비 (프로세스당 한 번만 초기화, 이후에는 즉시 반환)
+        try:
+            await get_ai_client().ensure_ready_async()
+        except Exception as e:
+            raise AIServiceError(f"AI 피드백 생성 실패: {str(e)}")
+        
+        # 모든 블록과 프로젝트(저장된 project_analysis) 가져오기
+        loop = asyncio.get_running_loop()
+        all_blocks, project = await loop.run_in_executor(None, _load_board, storage, project_id)
+        
+        if not all_blocks:
+            raise ValidationError("분석할 블록이 없습니다")
+        
+        project_analysis = project.get("project_analysis") if project else None
+        
+        # 병목/기반 블록 등 구조 지표는 모델이 블록 목록에서 추론하지 않도록 미리 계산해 전달 (보드가 같으면 캐시)
+        structure_metrics = None
+        if os.getenv("AI_FEEDBACK_STRUCTURE_METRICS", "true").lower() == "true":
+            try:
+                structure_metrics, _ = await loop.run_in_executor(
+                    None, project_centrality, project_id, all_blocks
+                )
+            except Exception as e:
+                print(f"⚠️  구조 지표 계산 실패 (지표 없이 피드백 생성): {e}")
+
+        # 블록이 많으면 초점과 관련된 블록만 프롬프트에 넣기 위해 블록 텍스트 색인 준비 (바뀐 블록만 갱신)
+        block_index = None
+        if len(all_blocks) > retrieval_max_blocks():
+            block_index = await loop.run_in_executor(
+                None, get_block_text_indexes().get, project_id, all_blocks
+            )
+
+        # AI로 피드백 생성 (이전 피드백 이후 바뀐 부분만 분석할 수 있도록 이전 상태 전달)
+        previous_state = await loop.run_in_executor(None, storage.get_feedback_state, project_id)
+        feedback_result = await generate_feedback(
+            blocks=all_blocks,
+            project_analysis=project_analysis,
+            previous_state=previous_state,
+            structure_metrics=structure_metrics,
+            focus=request.focus if request else None,
+            block_index=block_index
+        )
+        
+        feedback_content = feedback_result.get("feedback", "")
+        thinking_process = feedback_result.get("thinking_process", {})
+        mode = feedback_result.get("mode", "full")
+        
+        if feedback_content:
+            await loop.run_in_executor(None, _save_feedback, storage, project_id, project, feedback_result)
+        
+        return {
+            "feedback": feedback_content,
+            "thinking_process": thinking_process,
+            "mode": mode
+        }
+    except ValidationError:
+        raise
+    except AIServiceError:
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise AIServiceError(f"AI 피드백 생성 실패: {str(e)}")
+
+
+def _save_feedback(storage, project_id: str, project: Optional[Dict], feedback_result: Dict):
+    """피드백을 프로젝트에 저장 (JSON 형식)"""
+    feedback_content = feedback_result["feedback"]
+    mode = feedback_result.get("mode", "full")
+    feedback_data = {
+        "type": "feedback",
+        "content": feedback_content
+    }
+    project_updates = {"arrangement_reasoning": json.dumps(feedback_data, ensure_ascii=False)}
+    # 다음 피드백 요청의 비교 기준 (보드 스냅샷 + 이번 피드백), 블록 수에 비례해 커지므로 프로젝트 문서와 따로 저장
+    if feedback_result.get("feedback_state") and mode != "unchanged":
+        storage.save_feedback_state(project_id, feedback_result["feedback_state"])
+        if project and project.get("feedback_state") is not None:
+            # 이전 버전이 프로젝트 문서에 저장한 상태 비우기
+            project_updates["feedback_state"] = None
+    storage.update_project(project_id, project_updates)
+    print(f"✅ 피드백 프로젝트에 저장 완료: {len(feedback_content)} 문자 ({mode})")
+
+
+# 작업 종류 -> (요청 모델, 실행 함수)
+OPERATIONS = {
+    "generate-blocks": (AIGenerateBlocksRequest, run_generate_blocks),
+    "arrange-blocks": (AIArrangeBlocksRequest, run_arrange_blocks),
+    "feedback": (AIFeedbackRequest, run_feedback),
+}
+
+
+def _normalized_input(kind: str, request: Optional[BaseModel]):
+    """동일 요청 판별용 입력 정규화"""
+    if kind == "generate-blocks":
+        return {field: value.strip() for field, value in request.dict().items()}
+    if kind == "arrange-blocks":
+        return sorted(set(request.block_ids))
+    if kind == "feedback" and request is not None and request.focus and request.focus.strip():
+        return {"focus": request.focus.strip()}
+    return None
+
+
+def operation_key(kind: str, project_id: str, request: Optional[BaseModel] = None) -> str:
+    """작업 종류, 프로젝트, 정규화된 입력으로 동일 요청 판별 키 생성"""
+    normalized = json.dumps(_normalized_input(kind, request), ensure_ascii=False, sort_keys=True)
+    return f"{kind}:{project_id}:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()}"
+
+
+async def run_operation(kind: str, project_id: str, request: Optional[BaseModel] = None) -> dict:
+    """
+    AI 작업 실행 (진행 중인 동일 요청이 있으면 그 결과를 함께 받음)
+
+    Args:
+        kind: "generate-blocks" | "arrange-blocks" | "feedback"
+        project_id: 프로젝트 ID
+        request: 작업 종류에 맞는 요청 모델 (feedback은 생략 가능)
+    """
+    _, runner = OPERATIONS[kind]
+    key = operation_key(kind, project_id, request)
+    if request is None:
+        return await ai_single_flight.do(key, lambda: runner(project_id))
+    return await ai_single_flight.do(key, lambda: runner(project_id, request))
@@ -0,0 +1,199 @@
+"""
+AI 프롬프트 크기 관리
+
+보드가 커져도 프롬프트 크기(지연 시간, 비용)가 일정 범위를 넘지 않도록 합니다.
+- count_tokens(): 모델 호출 없이 로컬에서 토큰 수 추정
+- BlockAliases: 블록 UUID를 요청마다 짧은 별칭(B1, B2, ...)으로 바꾸고, 응답을 파싱한 뒤 원래 ID로 되돌림
+- compact_blocks(): 블록 목록이 토큰 예산에 맞도록 긴 설명부터 잘라냄
+- PromptStats: 호출별 프롬프트/응답 토큰 수 기록 (관리자 API로 조회)
+"""
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+# 별칭 앞뒤에 영문/숫자/밑줄이 붙은 경우는 제외 ("B2B", "B2C" 같은 단어는 별칭이 아님, 한글 조사는 바로 붙을 수 있음: "B3의")
+_ALIAS_PATTERN = re.compile(r"(?<![A-Za-z0-9_])B\d+(?![A-Za-z0-9_])")
+
+_TRUNCATION_MARK = "…"
+
+
+def count_tokens(text: str) -> int:
+    """
+    토큰 수 추정
+
+    Gemini 토크나이저 기준 영문/숫자는 약 4자당 1토큰, 한글 등 비ASCII 문자는 약 1.5자당 1토큰입니다.
+    실제 토큰 수(usage_metadata)와의 비율은 PromptStats에서 확인할 수 있습니다.
+    """
+    if not text:
+        return 0
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    other_chars = len(text) - ascii_chars
+    return ascii_chars // 4 + (other_chars * 2) // 3 + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """text를 약 max_tokens 토큰 이하로 자름 (잘린 경우 끝에 … 표시)"""
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    keep = max(1, len(text) * max_tokens // tokens)
+    return text[:keep].rstrip() + _TRUNCATION_MARK
+
+
+class BlockAliases:
+    """요청 단위 블록 ID 별칭 (UUID 36자 -> B1 등 2~4자)"""
+
+    def __init__(self, block_ids: Iterable[str]):
+        # 같은 블록 집합이면 같은 별칭이 되도록 ID 순으로 부여 (AI 응답 캐시 적중률 유지)
+        self._to_alias: Dict[str, str] = {}
+        self._to_id: Dict[str, str] = {}
+        for number, block_id in enumerate(sorted(set(block_ids)), start=1):
+            alias = f"B{number}"
+            self._to_alias[block_id] = alias
+            self._to_id[alias] = block_id
+
+    def alias(self, block_id: str) -> str:
+        return self._to_alias.get(block_id, block_id)
+
+    def resolve(self, alias: str) -> str:
+        """별칭을 원래 블록 ID로 (모델이 원래 ID를 그대로 쓴 경우도 허용)"""
+        alias = alias.strip()
+        return self._to_id.get(alias, alias)
+
+    def restore_text(self, text: str, labels: Dict[str, str]) -> str:
+        """응답 문장 안의 별칭을 labels(블록 ID -> 표시 이름)로 치환"""
+        if not text:
+            return text
+
+        def replace(match: "re.Match") -> str:
+            block_id = self._to_id.get(match.group(0))
+            if block_id is None:
+                return match.group(0)
+            return f"'{labels.get(block_id, block_id)}'"
+
+        return _ALIAS_PATTERN.sub(replace, text)
+
+    def restore_data(self, data, labels: Dict[str, str]):
+        """dict/list 안의 모든 문자열에 restore_text 적용"""
+        if isinstance(data, str):
+            return self.restore_text(data, labels)
+        if isinstance(data, dict):
+            return {key: self.restore_data(value, labels) for key, value in data.items()}
+        if isinstance(data, list):
+            return [self.restore_data(value, labels) for value in data]
+        return data
+
+
+def compact_blocks(blocks: List[Dict], aliases: BlockAliases, token_budget: Optional[int] = None) -> List[Dict]:
+    """
+    프롬프트용 블록 목록 (원본은 변경하지 않음)
+
+    id/dependencies를 별칭으로 바꾸고, 설명을 제외한 필드와 설명 전체가 token_budget을 넘으면
+    모든 설명에 같은 상한을 두어 긴 설명부터 잘라냅니다 (상한은 AI_PROMPT_MIN_DESCRIPTION_TOKENS 이상).
+    """
+    if token_budget is None:
+        token_budget = int(os.getenv("AI_PROMPT_BLOCKS_TOKENS", "8000"))
+    min_description_tokens = int(os.getenv("AI_PROMPT_MIN_DESCRIPTION_TOKENS", "30"))
+
+    compacted = []
+    for block in blocks:
+        item = dict(block)
+        item["id"] = aliases.alias(block.get("id", ""))
+        if block.get("dependencies"):
+            item["dependencies"] = [aliases.alias(dep_id) for dep_id in block["dependencies"]]
+        compacted.append(item)
+
+    description_tokens = [count_tokens(item.get("description") or "") for item in compacted]
+    # 제목/카테고리/ID 등 설명 외 부분 (블록당 줄 머리말 포함 대략치)
+    fixed_tokens = sum(
+        count_tokens(f"{item.get('title', '')} {item.get('category') or ''} {item['id']}") + 12
+        for item in compacted
+    )
+    available = token_budget - fixed_tokens
+    if sum(description_tokens) <= available:
+        return compacted
+
+    # 설명별 상한(cap)을 이분 탐색: sum(min(토큰 수, cap)) <= available 인 가장 큰 cap
+    low, high = min_description_tokens, max(description_tokens)
+    while low < high:
+        cap = (low + high + 1) // 2
+        if sum(min(tokens, cap) for tokens in description_tokens) <= available:
+            low = cap
+        else:
+            high = cap - 1
+    cap = low
+
+    truncated = 0
+    for item, tokens in zip(compacted, description_tokens):
+        if tokens > cap:
+            item["description"] = truncate_to_tokens(item["description"], cap)
+            truncated += 1
+    print(f"✂️  프롬프트 예산 {token_budget} 토큰: 설명 {truncated}개를 {cap} 토큰 이하로 축약")
+    return compacted
+
+
+class PromptStats:
+    """AI 호출별 프롬프트/응답 크기 지표"""
+
+    def __init__(self):
+        self._by_function: Dict[str, Dict] = {}
+
+    def record(
+        self,
+        function_name: str,
+        prompt: str,
+        response_text: str,
+        usage: Optional[object] = None,
+    ):
+        """
+        모델 호출 한 번의 크기 기록
+
+        usage: 응답의 usage_metadata (있으면 실제 토큰 수, 없으면 추정치 사용)
+        """
+        estimated_prompt = count_tokens(prompt)
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or estimated_prompt
+        response_tokens = getattr(usage, "candidates_token_count", 0) or count_tokens(response_text)
+
+        stats = self._by_function.setdefault(function_name, {
+            "calls": 0,
+            "prompt_chars": 0,
+            "estimated_prompt_tokens": 0,
+            "prompt_tokens": 0,
+            "response_tokens": 0,
+            "max_prompt_tokens": 0,
+        })
+        stats["calls"] += 1
+        stats["prompt_chars"] += len(prompt)
+        stats["estimated_prompt_tokens"] += estimated_prompt
+        stats["prompt_tokens"] += prompt_tokens
+        stats["response_tokens"] += response_tokens
+        stats["max_prompt_tokens"] = max(stats["max_prompt_tokens"], prompt_tokens)
+        print(f"📏 {function_name}: 프롬프트 {prompt_tokens} 토큰 (추정 {estimated_prompt}), 응답 {response_tokens} 토큰")
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """함수별 누적 지표와 평균"""
+        result = {}
+        for function_name, stats in self._by_function.items():
+            calls = stats["calls"] or 1
+            result[function_name] = {
+                **stats,
+                "avg_prompt_tokens": stats["prompt_tokens"] // calls,
+                "avg_response_tokens": stats["response_tokens"] // calls,
+                # 실제/추정 비율 (count_tokens 보정 확인용)
+                "estimate_ratio": round(stats["prompt_tokens"] / stats["estimated_prompt_tokens"], 3)
+                if stats["estimated_prompt_tokens"] else None,
+            }
+        return result
+
+
+# 전역 지표 인스턴스 (싱글톤 패턴)
+_prompt_stats_instance: Optional[PromptStats] = None
+
+
+def get_prompt_stats() -> PromptStats:
+    """AI 프롬프트 크기 지표 인스턴스 반환"""
+    global _prompt_stats_instance
+
+    if _prompt_stats_instance is None:
+        _prompt_stats_instance = PromptStats()
+    return _prompt_stats_instance
@@ -0,0 +1,253 @@
+"""
+AI 호출 기록/재생 (오프라인 벤치마크, 회귀 확인용)
+
+- 기록: AI_RECORD_PATH를 지정하면 모든 모델 호출의 (프롬프트, 응답, 지연 시간)을 JSONL 파일에 추가
+- 재생: AI_PROVIDER=replay 이면 Vertex AI 대신 AI_REPLAY_PATH의 기록을 응답으로 사용 (네트워크/인증 불필요)
+    - 같은 (모델, 응답 스키마, 프롬프트)의 기록을 기록된 순서대로 돌려가며 사용 (같은 입력이면 항상 같은 순서)
+    - 정확히 같은 프롬프트가 없으면 같은 (모델, 응답 스키마)의 기록으로 대체 (AI_REPLAY_STRICT=true 이면 오류)
+      배치 프롬프트의 블록 ID는 별칭(B1, B2...)이므로 블록 수가 같으면 대체 응답도 현재 블록에 적용됨
+    - AI_REPLAY_LATENCY_SCALE: 기록된 지연 시간의 배율 (기본 0 = 기다리지 않음, 1 = 기록된 만큼 대기)
+
+이렇게 하면 프롬프트 생성, 응답 파싱, 저장소 쓰기까지 포함한 전체 AI 파이프라인을
+네트워크 없는 환경에서 부하 테스트하고 프로파일링할 수 있습니다.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+def _schema_key(generation_config) -> str:
+    """요청의 응답 스키마 식별자 (스키마가 없으면 빈 문자열)"""
+    if generation_config is None:
+        return ""
+    schema = generation_config.to_dict().get("response_schema")
+    if not schema:
+        return ""
+    return hashlib.sha256(json.dumps(schema, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def recording_key(model_name: str, schema_key: str, prompt: str) -> str:
+    """기록 조회 키 (모델, 응답 스키마, 프롬프트가 모두 같아야 같은 키)"""
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return f"{model_name}:{schema_key}:{digest}"
+
+
+def _usage_dict(usage) -> Optional[Dict[str, int]]:
+    if usage is None:
+        return None
+    return {
+        "prompt_token_count": getattr(usage, "prompt_token_count", None),
+        "candidates_token_count": getattr(usage, "candidates_token_count", None),
+    }
+
+
+class RecordedResponse:
+    """재생 응답 (text, usage_metadata만 제공)"""
+
+    class UsageMetadata:
+        def __init__(self, prompt_token_count: Optional[int], candidates_token_count: Optional[int]):
+            self.prompt_token_count = prompt_token_count
+            self.candidates_token_count = candidates_token_count
+
+    def __init__(self, text: str, usage: Optional[Dict[str, int]] = None):
+        self.text = text
+        self.usage_metadata = self.UsageMetadata(**usage) if usage else None
+
+
+class RecordingWriter:
+    """기록 파일에 한 줄씩 추가 (여러 요청이 동시에 기록해도 줄이 섞이지 않도록 잠금)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.records_written = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.records_written += 1
+
+
+class RecordingModel:
+    """실제 모델 호출을 감싸서 (프롬프트, 응답, 지연 시간)을 기록하는 모델"""
+
+    def __init__(self, model, model_name: str, writer: RecordingWriter, location: Optional[str] = None):
+        self._model = model
+        self.model_name = model_name
+        self.location = location
+        self._writer = writer
+
+    def _record(self, prompt: str, generation_config, text: str, usage, latency_seconds: float,
+                first_chunk_seconds: Optional[float] = None, chunks: Optional[List[str]] = None):
+        schema_key = _schema_key(generation_config)
+        self._writer.write({
+            "key": recording_key(self.model_name, schema_key, prompt),
+            "model": self.model_name,
+            "location": self.location,
+            "schema": schema_key,
+            "prompt": prompt,
+            "text": text,
+            "usage": _usage_dict(usage),
+            "latency_seconds": round(latency_seconds, 4),
+            "first_chunk_seconds": round(first_chunk_seconds, 4) if first_chunk_seconds is not None else None,
+            "chunks": chunks,
+            "recorded_at": time.time(),
+        })
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, generation_config=None, **kwargs):
+        started_at = time.perf_counter()
+        responses = await self._model.generate_content_async(
+            prompt, stream=stream, generation_config=generation_config, **kwargs
+        )
+        if not stream:
+            try:
+                text = responses.text
+            except (ValueError, AttributeError):
+                # 안전 필터 등으로 텍스트가 없는 응답은 재생할 수 없으므로 기록하지 않음
+                return responses
+            self._record(prompt, generation_config, text, getattr(responses, "usage_metadata", None),
+                         time.perf_counter() - started_at)
+            return responses
+
+        async def chunks():
+            pieces: List[str] = []
+            usage = None
+            first_chunk_seconds = None
+            async for chunk in responses:
+                if first_chunk_seconds is None:
+                    first_chunk_seconds = time.perf_counter() - started_at
+                try:
+                    pieces.append(chunk.text)
+                except (ValueError, AttributeError):
+                    pass
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                yield chunk
+            # 끝까지 받은 스트림만 기록 (중간에 끊긴 응답은 재생해도 의미가 없음)
+            self._record(prompt, generation_config, "".join(pieces), usage,
+                         time.perf_counter() - started_at, first_chunk_seconds, pieces)
+
+        return chunks()
+
+
+class ReplayMissError(LookupError):
+    """재생할 기록이 없음"""
+
+
+class ReplayStore:
+    """기록 파일을 읽어 키별/(모델, 스키마)별로 색인"""
+
+    def __init__(self, path: str, strict: bool = False, latency_scale: float = 0.0):
+        self.path = path
+        self.strict = strict
+        self.latency_scale = latency_scale
+        self._by_key: Dict[str, List[dict]] = {}
+        self._by_schema: Dict[str, List[dict]] = {}
+        # 키별 다음 재생 위치 (같은 입력을 여러 번 요청하면 기록 순서대로 돌려가며 사용)
+        self._cursors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"records": 0, "exact_hits": 0, "schema_hits": 0, "misses": 0}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"AI 재생 기록 파일을 찾을 수 없습니다: {self.path}")
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                self._by_key.setdefault(record["key"], []).append(record)
+                self._by_schema.setdefault(f"{record['model']}:{record['schema']}", []).append(record)
+                self.stats["records"] += 1
+        print(f"📼 AI 재생 기록 {self.stats['records']}개 로드: {self.path}")
+
+    def _next(self, cursor_key: str, records: List[dict]) -> dict:
+        with self._lock:
+            index = self._cursors.get(cursor_key, 0)
+            self._cursors[cursor_key] = index + 1
+        return records[index % len(records)]
+
+    def find(self, model_name: str, generation_config, prompt: str) -> dict:
+        """
+        요청에 해당하는 기록 반환
+
+        Raises:
+            ReplayMissError: 같은 프롬프트의 기록이 없고 (strict), 같은 (모델, 스키마)의 기록도 없을 때
+        """
+        schema_key = _schema_key(generation_config)
+        key = recording_key(model_name, schema_key, prompt)
+        records = self._by_key.get(key)
+        if records:
+            self.stats["exact_hits"] += 1
+            return self._next(key, records)
+
+        schema_records = None if self.strict else self._by_schema.get(f"{model_name}:{schema_key}")
+        if schema_records:
+            self.stats["schema_hits"] += 1
+            return self._next(f"{model_name}:{schema_key}", schema_records)
+
+        self.stats["misses"] += 1
+        raise ReplayMissError(f"재생할 AI 기록이 없습니다: model={model_name}, schema={schema_key or '-'}")
+
+    def get_status(self) -> dict:
+        return {"path": self.path, "strict": self.strict, "latency_scale": self.latency_scale, **self.stats}
+
+
+class ReplayModel:
+    """기록된 응답을 돌려주는 모델 (GenerativeModel의 generate_content_async만 흉내)"""
+
+    def __init__(self, model_name: str, store: ReplayStore):
+        self.model_name = model_name
+        self._store = store
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, generation_config=None, **kwargs):
+        record = self._store.find(self.model_name, generation_config, prompt)
+        scale = self._store.latency_scale
+        if not stream:
+            if scale > 0:
+                await asyncio.sleep(record["latency_seconds"] * scale)
+            return RecordedResponse(record["text"], record.get("usage"))
+
+        async def chunks():
+            pieces = record.get("chunks") or [record["text"]]
+            first_chunk_seconds = record.get("first_chunk_seconds") or record["latency_seconds"]
+            rest_seconds = max(0.0, record["latency_seconds"] - first_chunk_seconds)
+            if scale > 0:
+                await asyncio.sleep(first_chunk_seconds * scale)
+            for index, piece in enumerate(pieces):
+                if index > 0 and scale > 0:
+                    await asyncio.sleep(rest_seconds * scale / max(1, len(pieces) - 1))
+                usage = record.get("usage") if index == len(pieces) - 1 else None
+                yield RecordedResponse(piece, usage)
+
+        return chunks()
+
+
+def create_recording_writer() -> Optional[RecordingWriter]:
+    """AI_RECORD_PATH가 지정된 경우 기록기 생성"""
+    path = os.getenv("AI_RECORD_PATH")
+    if not path:
+        return None
+    print(f"⏺️  AI 호출을 기록합니다: {path}")
+    return RecordingWriter(path)
+
+
+def create_replay_store() -> ReplayStore:
+    """환경 변수 설정으로 재생 기록 로드 (AI_REPLAY_PATH, 없으면 AI_RECORD_PATH)"""
+    path = os.getenv("AI_REPLAY_PATH") or os.getenv("AI_RECORD_PATH")
+    if not path:
+        raise ValueError("AI_PROVIDER=replay 에는 AI_REPLAY_PATH(기록 파일 경로)가 필요합니다")
+    return ReplayStore(
+        path,
+        strict=os.getenv("AI_REPLAY_STRICT", "false").lower() == "true",
+        latency_scale=float(os.getenv("AI_REPLAY_LATENCY_SCALE", "0")),
+    )
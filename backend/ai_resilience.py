@@ -0,0 +1,213 @@
+"""
+AI 모델 호출 복원력 (재시도, 제한 시간, 회로 차단기)
+
+Vertex AI가 요청을 제한(429)하거나 일시적으로 실패(5xx, 시간 초과)할 때:
+- 재시도 가능한 오류만 지수 백오프 + 지터(full jitter)로 다시 시도
+- 시도마다 제한 시간을 두고, 전체 마감 시간(deadline)을 넘기면 재시도하지 않음
+- 연속 실패가 쌓이면 회로를 열어 일정 시간 동안 호출하지 않고 바로 실패
+  (장애 중에 사용자 재시도로 부하가 더 쌓이지 않도록), 이후 한 번의 시험 호출로 복구 확인
+"""
+import asyncio
+import os
+import random
+import time
+from typing import AsyncContextManager, Awaitable, Callable, Optional, TypeVar
+from exceptions import AIUnavailableError
+
+T = TypeVar("T")
+
+# google.api_core 예외의 HTTP 상태 코드 중 재시도할 것 (요청 제한, 일시적 서버 오류)
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """일시적인 오류인지 여부 (잘못된 요청, 권한 오류, 응답 파싱 오류 등은 재시도하지 않음)"""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    # google.api_core.exceptions.GoogleAPICallError 계열은 code에 HTTP 상태 코드를 가짐
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and code in RETRYABLE_STATUS_CODES
+
+
+class CircuitBreaker:
+    """연속 실패 횟수 기반 회로 차단기 (closed -> open -> half_open -> closed)"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_seconds: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def retry_after(self) -> float:
+        """회로가 열려 있을 때 시험 호출까지 남은 시간 (초)"""
+        return max(0.0, self._opened_at + self.reset_timeout_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        """호출 허용 여부 (열린 상태에서 대기 시간이 지나면 시험 호출 한 번만 허용)"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self.retry_after() == 0:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.stats["rejected"] += 1
+        return False
+
+    def release_probe(self):
+        """결과 없이 끝난 시험 호출(취소 등)의 자리를 반납 (다음 호출이 다시 시험 호출이 됨)"""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            print("✅ AI 회로 차단기 닫힘 (시험 호출 성공)")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.stats["opened"] += 1
+                print(f"🚫 AI 회로 차단기 열림: 연속 실패 {self.consecutive_failures}회, "
+                      f"{self.reset_timeout_seconds}초 동안 호출 차단")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def get_status(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after_seconds": round(self.retry_after(), 1) if self.state == self.OPEN else 0,
+            **self.stats,
+        }
+
+
+class ResilientCaller:
+    """재시도 + 제한 시간 + 회로 차단기를 적용한 호출 래퍼"""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay_seconds: float = 1.0,
+        max_delay_seconds: float = 20.0,
+        attempt_timeout_seconds: float = 120.0,
+        deadline_seconds: float = 300.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.attempt_timeout_seconds = attempt_timeout_seconds
+        self.deadline_seconds = deadline_seconds
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = {"calls": 0, "attempts": 0, "retries": 0, "timeouts": 0, "succeeded": 0, "failed": 0}
+
+    def backoff_delay(self, retry_number: int) -> float:
+        """retry_number번째 재시도 전 대기 시간 (0 ~ min(최대, 기본 * 2^n) 사이 무작위)"""
+        return random.uniform(0, min(self.max_delay_seconds, self.base_delay_seconds * (2 ** retry_number)))
+
+    def _reject(self):
+        raise AIUnavailableError(
+            "AI 서비스가 일시적으로 불안정하여 요청을 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+            retry_after=self.breaker.retry_after(),
+        )
+
+    async def call(
+        self,
+        attempt: Callable[[], Awaitable[T]],
+        description: str = "AI 호출",
+        slot: Optional[Callable[[], AsyncContextManager]] = None,
+    ) -> T:
+        """
+        attempt()를 재시도 정책에 따라 실행
+
+        slot을 주면 시도마다 slot()을 잡은 뒤 attempt()를 실행합니다. 슬롯 대기 시간은 시도 제한 시간에
+        포함하지 않으므로 로컬 대기열이 밀려도 시간 초과(회로 실패)로 세지 않으며, 재시도 대기 중에는 슬롯을 반납합니다.
+
+        Raises:
+            AIUnavailableError: 회로가 열려 있거나, 재시도 가능한 오류로 모든 시도/마감 시간을 소진했을 때
+            Exception: 재시도할 수 없는 오류는 그대로 전달
+        """
+        self.stats["calls"] += 1
+        deadline = time.monotonic() + self.deadline_seconds
+        last_error: Optional[BaseException] = None
+
+        for attempt_number in range(self.max_attempts):
+            if not self.breaker.allow():
+                self.stats["failed"] += 1
+                self._reject()
+
+            timeout = min(self.attempt_timeout_seconds, deadline - time.monotonic())
+            self.stats["attempts"] += 1
+            try:
+                if slot is None:
+                    result = await asyncio.wait_for(attempt(), timeout=timeout)
+                else:
+                    async with slot():
+                        result = await asyncio.wait_for(attempt(), timeout=timeout)
+            except asyncio.CancelledError:
+                # 클라이언트 연결 종료/작업 취소: 성공도 실패도 아니므로 시험 호출 자리만 반납
+                # (반납하지 않으면 half_open 상태에서 모든 호출이 계속 거부됨)
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.stats["timeouts"] += 1
+                if not is_retryable(e):
+                    # 요청 자체의 문제이므로 백엔드 상태와 무관 (성공/실패 어느 쪽으로도 세지 않고 시험 호출 자리만 반납)
+                    self.breaker.release_probe()
+                    self.stats["failed"] += 1
+                    raise
+                self.breaker.record_failure()
+                last_error = e
+            else:
+                self.breaker.record_success()
+                self.stats["succeeded"] += 1
+                return result
+
+            if attempt_number + 1 >= self.max_attempts or self.breaker.state == CircuitBreaker.OPEN:
+                break
+            delay = self.backoff_delay(attempt_number)
+            if time.monotonic() + delay >= deadline:
+                print(f"⏱️  {description}: 마감 시간이 지나 재시도하지 않음")
+                break
+            self.stats["retries"] += 1
+            print(f"🔁 {description} 재시도 {attempt_number + 1}/{self.max_attempts - 1} "
+                  f"({delay:.1f}초 후): {type(last_error).__name__}: {last_error}")
+            await asyncio.sleep(delay)
+
+        self.stats["failed"] += 1
+        raise AIUnavailableError(
+            f"AI 서비스 호출이 반복해서 실패했습니다: {type(last_error).__name__}: {last_error}",
+            retry_after=self.breaker.retry_after() if self.breaker.state == CircuitBreaker.OPEN else None,
+        ) from last_error
+
+    def get_status(self) -> dict:
+        """재시도/제한 시간 지표와 회로 차단기 상태"""
+        return {**self.stats, "breaker": self.breaker.get_status()}
+
+
+def create_resilient_caller() -> ResilientCaller:
+    """환경 변수 설정으로 호출 래퍼 생성"""
+    return ResilientCaller(
+        max_attempts=int(os.getenv("AI_RETRY_MAX_ATTEMPTS", "3")),
+        base_delay_seconds=float(os.getenv("AI_RETRY_BASE_DELAY_SECONDS", "1")),
+        max_delay_seconds=float(os.getenv("AI_RETRY_MAX_DELAY_SECONDS", "20")),
+        attempt_timeout_seconds=float(os.getenv("AI_CALL_TIMEOUT_SECONDS", "120")),
+        deadline_seconds=float(os.getenv("AI_CALL_DEADLINE_SECONDS", "300")),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("AI_BREAKER_FAILURE_THRESHOLD", "5")),
+            reset_timeout_seconds=float(os.getenv("AI_BREAKER_RESET_SECONDS", "30")),
+        ),
+    )
@@ -0,0 +1,348 @@
+"""
+AI 프롬프트용 블록 검색 (큰 보드에서 관련 블록만 프롬프트에 포함)
+
+블록이 수천 개인 보드는 블록 전체를 프롬프트에 넣을 수 없으므로, 프로젝트마다 블록 제목/설명의
+해시 TF-IDF 벡터를 NumPy 배열로 보관하고 요청의 초점(focus)과 비슷한 블록과 레벨별 대표 블록만 고릅니다.
+- 토큰: 영문/숫자 단어, 한글 단어와 글자 2-gram (조사가 붙어도 어간이 겹치도록)
+- 토큰은 crc32로 AI_RETRIEVAL_DIMENSIONS(기본 2^18)차원에 해싱 (어휘 사전이 없어 블록 하나만 다시 계산 가능)
+- 블록마다 (열 번호, log(1 + 토큰 수)) 배열만 보관하고 열별 문서 빈도를 함께 갱신,
+  조회할 때 바뀐 것이 있으면 SciPy CSR 행렬로 합쳐 IDF 가중/정규화 (메모리는 블록의 토큰 수에 비례)
+- 블록 생성/수정/삭제 API에서 해당 행만 갱신하고, 조회할 때는 블록별 텍스트 해시를 비교해
+  다른 경로(AI 블록 생성, 다른 인스턴스)로 바뀐 블록만 다시 계산
+NumPy/SciPy는 앱 시작 시간을 늘리지 않도록 색인 메서드 안에서 가져옵니다 (블록/프로젝트 라우터가 이 모듈을 import 함).
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+    from scipy import sparse
+
+_TOKEN_PATTERN = re.compile(r"[0-9a-z]+|[가-힣]+")
+
+
+def retrieval_max_blocks() -> int:
+    """프롬프트에 블록 전체를 넣는 최대 블록 수 (넘으면 검색으로 이 수만큼 골라 넣음)"""
+    return int(os.getenv("AI_RETRIEVAL_MAX_BLOCKS", "120"))
+
+
+def _tokens(text: str) -> List[str]:
+    tokens = []
+    for word in _TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(word)
+        if len(word) > 2 and "가" <= word[0] <= "힣":
+            tokens.extend(word[index:index + 2] for index in range(len(word) - 1))
+    return tokens
+
+
+def _block_text(block: Dict) -> str:
+    return f"{block.get('title', '')}\n{block.get('description') or ''}"
+
+
+class BlockTextIndex:
+    """한 프로젝트의 블록 텍스트 벡터 (블록마다 해시 토큰 열 번호/값 배열, 조회할 때 CSR 행렬로 합침)"""
+
+    def __init__(self, dimensions: int = 1 << 18):
+        import numpy as np
+
+        self.dimensions = dimensions
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._text_hashes: List[int] = []
+        self._columns: List[np.ndarray] = []
+        self._values: List[np.ndarray] = []
+        self._document_frequency = np.zeros(dimensions, dtype=np.float64)
+        # 조회용 정규화 TF-IDF 행렬과 IDF (블록이 바뀌면 다음 조회 때 다시 계산)
+        self._normalized: Optional[sparse.csr_matrix] = None
+        self._idf: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, block_id: str) -> bool:
+        return block_id in self.index
+
+    @property
+    def nbytes(self) -> int:
+        return sum(columns.nbytes + values.nbytes for columns, values in zip(self._columns, self._values))
+
+    def _vectorize(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(열 번호, log(1 + 토큰 수)) 열 번호 순"""
+        import numpy as np
+
+        tokens = _tokens(text)
+        hashed = np.fromiter(
+            (zlib.crc32(token.encode("utf-8")) % self.dimensions for token in tokens), dtype=np.int32, count=len(tokens)
+        )
+        columns, counts = np.unique(hashed, return_counts=True)
+        return columns, np.log1p(counts).astype(np.float32)
+
+    def _upsert(self, block: Dict) -> bool:
+        block_id = block.get('id')
+        if not block_id:
+            return False
+        text = _block_text(block)
+        text_hash = zlib.crc32(text.encode("utf-8"))
+        position = self.index.get(block_id)
+        if position is not None and self._text_hashes[position] == text_hash:
+            return False
+        columns, values = self._vectorize(text)
+        if position is None:
+            self.index[block_id] = len(self.ids)
+            self.ids.append(block_id)
+            self._text_hashes.append(text_hash)
+            self._columns.append(columns)
+            self._values.append(values)
+        else:
+            self._document_frequency[self._columns[position]] -= 1
+            self._text_hashes[position] = text_hash
+            self._columns[position] = columns
+            self._values[position] = values
+        self._document_frequency[columns] += 1
+        self._normalized = None
+        return True
+
+    def _remove(self, block_id: str) -> bool:
+        position = self.index.pop(block_id, None)
+        if position is None:
+            return False
+        self._document_frequency[self._columns[position]] -= 1
+        # 마지막 블록을 빈 자리로 옮겨 행 번호를 빈틈없이 유지
+        last = len(self.ids) - 1
+        if position != last:
+            for items in (self.ids, self._text_hashes, self._columns, self._values):
+                items[position] = items[last]
+            self.index[self.ids[position]] = position
+        for items in (self.ids, self._text_hashes, self._columns, self._values):
+            items.pop()
+        self._normalized = None
+        return True
+
+    def upsert(self, block: Dict) -> bool:
+        """블록 추가 또는 제목/설명이 바뀐 경우 행 갱신 (바뀌었으면 True)"""
+        with self._lock:
+            return self._upsert(block)
+
+    def remove(self, block_id: str) -> bool:
+        with self._lock:
+            return self._remove(block_id)
+
+    def sync(self, blocks: List[Dict]) -> int:
+        """현재 블록 목록과 맞춤 (텍스트가 바뀐 블록과 없어진 블록만 갱신), 바뀐 블록 수 반환"""
+        with self._lock:
+            changed = sum(1 for block in blocks if self._upsert(block))
+            current = {block.get('id') for block in blocks}
+            for block_id in [block_id for block_id in self.ids if block_id not in current]:
+                changed += self._remove(block_id)
+            return changed
+
+    def _weighted(self) -> sparse.csr_matrix:
+        """TF-IDF 행을 길이 1로 정규화한 CSR 행렬 (잠금 안에서 호출)"""
+        import numpy as np
+        from scipy import sparse
+
+        if self._normalized is None:
+            count = len(self.ids)
+            self._idf = (np.log((1 + count) / (1 + self._document_frequency)) + 1).astype(np.float32)
+            lengths = np.fromiter((len(columns) for columns in self._columns), dtype=np.int64, count=count)
+            indptr = np.concatenate([[0], np.cumsum(lengths)])
+            indices = np.concatenate(self._columns) if count else np.zeros(0, dtype=np.int32)
+            data = np.concatenate(self._values) if count else np.zeros(0, dtype=np.float32)
+            rows = np.repeat(np.arange(count), lengths)
+            data = data * self._idf[indices]
+            norms = np.sqrt(np.bincount(rows, weights=data ** 2, minlength=count))
+            data = (data / norms[rows]).astype(np.float32)
+            self._normalized = sparse.csr_matrix((data, indices, indptr), shape=(count, self.dimensions))
+        return self._normalized
+
+    def _positions(self, block_ids: Optional[Iterable[str]]) -> np.ndarray:
+        import numpy as np
+
+        if block_ids is None:
+            return np.arange(len(self.ids))
+        return np.array(sorted(self.index[block_id] for block_id in block_ids if block_id in self.index), dtype=np.int64)
+
+    def _top(self, scores: np.ndarray, positions: np.ndarray, top: int) -> List[Tuple[str, float]]:
+        import numpy as np
+
+        if top <= 0 or len(positions) == 0:
+            return []
+        if len(positions) > top:
+            best = np.argpartition(-scores, top - 1)[:top]
+        else:
+            best = np.arange(len(positions))
+        # 점수가 같으면 블록 ID 순 (같은 보드/질의면 같은 결과)
+        ranked = sorted(best.tolist(), key=lambda item: (-float(scores[item]), self.ids[positions[item]]))
+        return [(self.ids[positions[item]], float(scores[item])) for item in ranked]
+
+    def search(self, query: str, top: int = 20, among: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """query와 비슷한 블록 [(블록 ID, 코사인 유사도)] (유사도 0인 블록 제외)"""
+        import numpy as np
+
+        with self._lock:
+            matrix = self._weighted()
+            columns, values = self._vectorize(query)
+            values = values * self._idf[columns]
+            norm = np.linalg.norm(values)
+            if norm == 0:
+                return []
+            positions = self._positions(among)
+            vector = np.zeros(self.dimensions, dtype=np.float32)
+            vector[columns] = values / norm
+            scores = matrix[positions] @ vector
+            return [(block_id, score) for block_id, score in self._top(scores, positions, top) if score > 0]
+
+    def representatives(self, block_ids: Iterable[str], top: int = 3) -> List[str]:
+        """block_ids 중 내용이 그 묶음의 평균(중심)에 가장 가까운 블록"""
+        import numpy as np
+
+        with self._lock:
+            matrix = self._weighted()
+            positions = self._positions(block_ids)
+            if len(positions) == 0:
+                return []
+            rows = matrix[positions]
+            scores = rows @ np.asarray(rows.mean(axis=0)).ravel()
+            return [block_id for block_id, _ in self._top(scores, positions, top)]
+
+
+class BlockTextIndexes:
+    """프로젝트별 블록 텍스트 색인 (최근 사용한 max_projects개만 보관)"""
+
+    def __init__(self, max_projects: int = 8, dimensions: int = 1 << 18):
+        self.max_projects = max_projects
+        self.dimensions = dimensions
+        self._entries: "OrderedDict[str, BlockTextIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"builds": 0, "synced_blocks": 0, "write_updates": 0}
+
+    def get(self, project_id: str, blocks: List[Dict]) -> BlockTextIndex:
+        """현재 블록 목록에 맞춘 색인 (없으면 새로 만듦)"""
+        with self._lock:
+            index = self._entries.get(project_id)
+            if index is None:
+                index = self._entries[project_id] = BlockTextIndex(self.dimensions)
+                self.stats["builds"] += 1
+                while len(self._entries) > self.max_projects:
+                    self._entries.popitem(last=False)
+            self._entries.move_to_end(project_id)
+        changed = index.sync(blocks)
+        self.stats["synced_blocks"] += changed
+        if changed:
+            print(f"🔎 블록 검색 색인 갱신: 블록 {changed}개 (전체 {len(index)}개, {index.nbytes / 1024 / 1024:.1f}MB)")
+        return index
+
+    def _peek(self, project_id: str) -> Optional[BlockTextIndex]:
+        with self._lock:
+            return self._entries.get(project_id)
+
+    def upsert(self, project_id: str, block: Dict):
+        """블록 생성/수정 후 색인이 있으면 그 블록만 갱신"""
+        index = self._peek(project_id)
+        if index is not None and index.upsert(block):
+            self.stats["write_updates"] += 1
+
+    def remove(self, project_id: str, block_id: str):
+        index = self._peek(project_id)
+        if index is not None and index.remove(block_id):
+            self.stats["write_updates"] += 1
+
+    def invalidate(self, project_id: str):
+        with self._lock:
+            self._entries.pop(project_id, None)
+
+
+def select_prompt_blocks(
+    index: BlockTextIndex,
+    blocks: List[Dict],
+    limit: int,
+    query: Optional[str] = None,
+    pinned: Iterable[str] = (),
+) -> List[Dict]:
+    """
+    프롬프트에 넣을 블록 limit개
+
+    1) query와 비슷한 블록 (limit의 절반까지), 2) pinned 블록 (구조 지표 상위 등),
+    3) 남은 자리는 레벨별 대표 블록을 레벨마다 돌아가며 채움
+    """
+    blocks_by_id = {block.get('id'): block for block in blocks}
+    selected: Dict[str, None] = {}
+
+    if query:
+        for block_id, _ in index.search(query, max(1, limit // 2), among=blocks_by_id):
+            selected[block_id] = None
+    for block_id in pinned:
+        if len(selected) >= limit:
+            break
+        if block_id in blocks_by_id:
+            selected[block_id] = None
+
+    by_level: Dict[int, List[str]] = {}
+    for block in blocks:
+        by_level.setdefault(block.get('level', 0), []).append(block.get('id'))
+    candidates = {
+        level: index.representatives(block_ids, limit) for level, block_ids in sorted(by_level.items())
+    }
+    position = 0
+    while len(selected) < limit and any(position < len(ids) for ids in candidates.values()):
+        for ids in candidates.values():
+            if position < len(ids) and len(selected) < limit:
+                selected[ids[position]] = None
+        position += 1
+
+    return [blocks_by_id[block_id] for block_id in selected]
+
+
+def summarize_groups(
+    index: BlockTextIndex,
+    groups: Dict[str, List[Dict]],
+    representatives: int = 3,
+    category_count: int = 3,
+) -> str:
+    """묶음(레벨, 카테고리 등)별 한 줄 요약: 블록 수, 많은 카테고리, 대표 블록 제목"""
+    lines = []
+    for name, group in groups.items():
+        categories: Dict[str, int] = {}
+        for block in group:
+            if block.get('category'):
+                categories[block['category']] = categories.get(block['category'], 0) + 1
+        titles = {block.get('id'): block.get('title', '') for block in group}
+        line = f"- {name}: {len(group)}개"
+        top_categories = sorted(categories.items(), key=lambda item: (-item[1], item[0]))
+        # 카테고리별 묶음이면 자기 카테고리는 다시 표시하지 않음
+        if categories and set(categories) != {name}:
+            line += f", 카테고리 {', '.join(f'{category} {count}개' for category, count in top_categories[:category_count])}"
+        # 대표 블록이 한 카테고리에 몰리지 않도록 많은 카테고리마다 하나씩 고른 뒤 묶음 전체의 대표로 채움
+        picked: List[str] = []
+        for category, _ in top_categories[:representatives]:
+            picked += index.representatives([block.get('id') for block in group if block.get('category') == category], 1)
+        for block_id in index.representatives(titles, representatives):
+            if len(picked) < representatives and block_id not in picked:
+                picked.append(block_id)
+        if picked:
+            line += f", 대표 블록: {', '.join(titles[block_id] for block_id in picked)}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+# 전역 색인 관리자 인스턴스 (싱글톤 패턴)
+_block_text_indexes_instance: Optional[BlockTextIndexes] = None
+
+
+def get_block_text_indexes() -> BlockTextIndexes:
+    """블록 텍스트 색인 관리자 인스턴스 반환"""
+    global _block_text_indexes_instance
+
+    if _block_text_indexes_instance is None:
+        _block_text_indexes_instance = BlockTextIndexes(
+            max_projects=int(os.getenv("AI_RETRIEVAL_MAX_PROJECTS", "8")),
+            dimensions=int(os.getenv("AI_RETRIEVAL_DIMENSIONS", str(1 << 18))),
+        )
+    return _block_text_indexes_instance
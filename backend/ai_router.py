@@ -0,0 +1,161 @@
+"""
+AI 작업별 모델 선택 (라우팅)
+
+작업 종류(generate/arrange/feedback)와 입력 크기(프롬프트 토큰 수)에 따라 사용할 모델 순서(대체 체인)를 정합니다.
+- 작은 입력은 빠르고 저렴한 모델(AI_MODEL_FAST), 큰 입력이나 출력이 많은 작업은 강한 모델(AI_MODEL_STRONG)
+- 첫 모델이 일시적 장애(재시도 소진, 회로 차단), 사용 불가(404/403), 해석할 수 없는 응답으로 실패하면 다음 모델 사용
+- 선택 결과와 지연 시간을 기록하여 정책 조정에 사용 (관리자 API로 조회)
+
+AI_MODEL_ROUTES(JSON)로 작업별 규칙을 직접 지정할 수 있습니다:
+    {"arrange": [{"max_tokens": 4000, "models": ["gemini-2.0-flash-lite", "gemini-2.0-flash"]},
+                 {"models": ["gemini-2.0-flash", "gemini-1.5-pro"]}]}
+규칙은 순서대로 확인하며, max_tokens가 없으면 모든 크기에 해당합니다.
+"""
+import json
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from ai_client import DEFAULT_MODEL_NAME
+from exceptions import AIUnavailableError
+
+# AI 함수 이름 -> 작업 종류
+TASK_BY_FUNCTION = {
+    "generate_blocks": "generate",
+    "arrange_blocks": "arrange",
+    "arrange_plan": "arrange",
+    "arrange_chunk": "arrange",
+    "generate_feedback": "feedback",
+    "generate_feedback_incremental": "feedback",
+}
+
+
+def should_fall_back(error: BaseException) -> bool:
+    """다음 모델로 넘어갈 오류인지 여부 (요청 자체가 잘못된 경우는 다른 모델도 같으므로 제외)"""
+    if isinstance(error, (AIUnavailableError, ValueError)):
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and code in (403, 404)
+
+
+def _percentile(ordered: List[float], percentile: float) -> float:
+    index = min(len(ordered) - 1, max(0, int(len(ordered) * percentile / 100 + 0.5) - 1))
+    return ordered[index]
+
+
+class ModelRouter:
+    """작업/입력 크기별 모델 체인 선택 및 결과 기록"""
+
+    def __init__(self, default_model: str, routes: Dict[str, List[Dict]], history_size: int = 200):
+        self.default_model = default_model
+        self.routes = routes
+        self._decisions: Deque[Dict] = deque(maxlen=history_size)
+        # (작업, 모델) -> 최근 지연 시간 및 결과 수
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def route(self, function_name: str, prompt_tokens: int) -> List[str]:
+        """사용할 모델 순서 (첫 번째가 선택된 모델, 나머지는 대체 체인)"""
+        task = TASK_BY_FUNCTION.get(function_name, function_name)
+        for rule in self.routes.get(task, []):
+            max_tokens = rule.get("max_tokens")
+            if max_tokens is None or prompt_tokens <= max_tokens:
+                chain = [model for model in rule.get("models", []) if model]
+                if chain:
+                    # 중복 제거 (순서 유지)
+                    return list(dict.fromkeys(chain))
+        return [self.default_model]
+
+    def record(
+        self,
+        function_name: str,
+        prompt_tokens: int,
+        model_name: str,
+        fallback_index: int,
+        latency_seconds: float,
+        error: Optional[BaseException] = None,
+    ):
+        """모델 호출 한 번의 결과 기록 (대체 체인의 각 시도마다 호출)"""
+        task = TASK_BY_FUNCTION.get(function_name, function_name)
+        key = f"{task}:{model_name}"
+        counts = self._counts.setdefault(key, {"calls": 0, "failures": 0, "fallback_calls": 0})
+        counts["calls"] += 1
+        if error is not None:
+            counts["failures"] += 1
+        if fallback_index > 0:
+            counts["fallback_calls"] += 1
+        if error is None:
+            latencies = self._latencies.get(key)
+            if latencies is None:
+                latencies = self._latencies[key] = deque(maxlen=200)
+            latencies.append(latency_seconds)
+
+        self._decisions.append({
+            "at": time.time(),
+            "function": function_name,
+            "task": task,
+            "prompt_tokens": prompt_tokens,
+            "model": model_name,
+            "fallback_index": fallback_index,
+            "latency_ms": round(latency_seconds * 1000, 1),
+            "error": f"{type(error).__name__}: {error}" if error is not None else None,
+        })
+
+    def get_stats(self, recent: int = 20) -> dict:
+        """(작업, 모델)별 호출 수/실패/지연 백분위와 최근 선택 기록"""
+        models = {}
+        for key, counts in self._counts.items():
+            ordered = sorted(self._latencies.get(key, []))
+            models[key] = {
+                **counts,
+                "p50_ms": round(_percentile(ordered, 50) * 1000, 1) if ordered else None,
+                "p95_ms": round(_percentile(ordered, 95) * 1000, 1) if ordered else None,
+            }
+        return {
+            "routes": self.routes,
+            "default_model": self.default_model,
+            "models": models,
+            "recent": list(self._decisions)[-recent:],
+        }
+
+
+def default_routes() -> Dict[str, List[Dict]]:
+    """
+    기본 규칙
+
+    - generate: 출력(블록 20~50개)이 많으므로 항상 강한 모델
+    - arrange/feedback: 프롬프트가 AI_ROUTER_SMALL_TOKENS 이하이면 빠른 모델, 초과하면 강한 모델
+    (AI_MODEL_FAST/AI_MODEL_STRONG을 지정하지 않으면 둘 다 기본 모델)
+    """
+    fast = os.getenv("AI_MODEL_FAST", DEFAULT_MODEL_NAME)
+    strong = os.getenv("AI_MODEL_STRONG", DEFAULT_MODEL_NAME)
+    small_tokens = int(os.getenv("AI_ROUTER_SMALL_TOKENS", "4000"))
+    size_based = [
+        {"max_tokens": small_tokens, "models": [fast, strong]},
+        {"models": [strong, fast]},
+    ]
+    return {
+        "generate": [{"models": [strong, fast]}],
+        "arrange": size_based,
+        "feedback": size_based,
+    }
+
+
+# 전역 라우터 인스턴스 (싱글톤 패턴)
+_model_router_instance: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """모델 라우터 인스턴스 반환"""
+    global _model_router_instance
+
+    if _model_router_instance is None:
+        routes = default_routes()
+        custom_routes = os.getenv("AI_MODEL_ROUTES")
+        if custom_routes:
+            try:
+                routes.update(json.loads(custom_routes))
+            except (json.JSONDecodeError, TypeError) as e:
+                print(f"⚠️  AI_MODEL_ROUTES 해석 실패 (기본 규칙 사용): {e}")
+        _model_router_instance = ModelRouter(DEFAULT_MODEL_NAME, routes)
+    return _model_router_instance
@@ -0,0 +1,177 @@
+"""
+AI 응답 구조 정의
+
+generate_blocks, arrange_blocks, generate_feedback 응답을 pydantic 모델로 정의합니다.
+- vertex_schema(): Vertex AI response_schema 형식으로 변환 (모델이 이 구조의 JSON만 생성하도록 제한)
+- decode(): 응답 텍스트를 바로 검증/변환하고, 구조를 따르지 않은 응답에만 ai_json 추출을 사용
+"""
+from typing import Any, ClassVar, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, ValidationError as PydanticValidationError
+from ai_json import IncrementalJSONExtractor
+
+
+def _to_vertex_schema(schema: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    """pydantic JSON 스키마를 Vertex AI가 지원하는 OpenAPI 부분 집합으로 변환 ($ref 펼치기, Optional -> nullable)"""
+    if "$ref" in schema:
+        return _to_vertex_schema(defs[schema["$ref"].split("/")[-1]], defs)
+
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        converted = _to_vertex_schema(options[0], defs)
+        converted["nullable"] = True
+        if schema.get("description"):
+            converted["description"] = schema["description"]
+        return converted
+
+    converted: Dict[str, Any] = {"type": schema["type"]}
+    if schema.get("description"):
+        converted["description"] = schema["description"]
+    if "enum" in schema:
+        converted["enum"] = schema["enum"]
+    if schema["type"] == "object":
+        properties = schema.get("properties", {})
+        converted["properties"] = {name: _to_vertex_schema(prop, defs) for name, prop in properties.items()}
+        # 모든 필드를 채우도록 요구하고, 선언 순서대로 생성 (사고 과정 -> 결과)
+        converted["required"] = list(properties)
+        converted["property_ordering"] = list(properties)
+    elif schema["type"] == "array":
+        converted["items"] = _to_vertex_schema(schema["items"], defs)
+    return converted
+
+
+class AIResult(BaseModel):
+    """AI 응답 모델 공통 기반"""
+
+    model_config = ConfigDict(extra="ignore")
+
+    # 응답이 객체 대신 배열로 온 경우(레거시 형식) 그 배열을 넣을 필드
+    legacy_list_field: ClassVar[Optional[str]] = None
+
+    # 잘린 응답을 부분 복구한 결과인지 여부 (캐시하지 않음)
+    _partial: bool = PrivateAttr(False)
+
+    @property
+    def partial(self) -> bool:
+        return self._partial
+
+    @classmethod
+    def vertex_schema(cls) -> Dict[str, Any]:
+        """Vertex AI response_schema"""
+        schema = cls.model_json_schema()
+        return _to_vertex_schema(schema, schema.get("$defs", {}))
+
+    @classmethod
+    def decode(cls, text: str) -> "AIResult":
+        """
+        응답 텍스트를 모델로 변환
+
+        구조화 출력을 따른 응답은 바로 검증하고, 그렇지 않은 응답(코드 블록, 설명 문장, 잘린 JSON 등)만
+        ai_json으로 JSON을 추출한 뒤 검증합니다.
+
+        Raises:
+            ValueError: JSON을 찾지 못했거나 구조가 맞지 않을 때
+        """
+        try:
+            return cls.model_validate_json(text)
+        except PydanticValidationError:
+            pass
+
+        print(f"⚠️  구조화 출력을 따르지 않은 응답: {cls.__name__} (JSON 추출로 대체)")
+        extractor = IncrementalJSONExtractor()
+        extractor.feed(text)
+        data = extractor.result()
+        if isinstance(data, list) and cls.legacy_list_field:
+            data = {cls.legacy_list_field: data}
+        try:
+            result = cls.model_validate(data)
+        except PydanticValidationError as e:
+            raise ValueError(f"AI 응답 구조가 올바르지 않습니다: {e}")
+        result._partial = not extractor.complete
+        return result
+
+
+# generate_blocks
+class GenerateThinkingProcess(BaseModel):
+    """블록 생성 사고 과정"""
+    project_analysis: str = Field("", description="프로젝트 핵심 목표와 가치, 시급한 영역 분석")
+    category_design: str = Field("", description="카테고리 체계 설계 및 각 카테고리의 목적과 범위")
+    block_scope: str = Field("", description="필요한 블록 영역과 우선순위, 각 영역별 필요 블록 수")
+    generation_plan: str = Field("", description="각 카테고리별 생성할 블록의 개수와 목록 계획")
+    designer_review: str = Field("", description="서비스 설계자 관점의 검토 및 추가 제안")
+    final_notes: str = Field("", description="최종 블록 생성에 대한 요약 및 특이사항")
+
+
+class GeneratedBlock(BaseModel):
+    """생성된 블록"""
+    title: str = Field("", description="블록 제목")
+    description: str = Field("", description="블록 설명 (구체적이고 실용적이어야 함)")
+    category: Optional[str] = Field(None, description="카테고리명")
+
+
+class GenerateBlocksResponse(AIResult):
+    """generate_blocks 응답"""
+    legacy_list_field: ClassVar[Optional[str]] = "blocks"
+
+    thinking_process: Optional[GenerateThinkingProcess] = None
+    blocks: List[GeneratedBlock] = Field(default_factory=list, description="생성된 블록 (20~50개)")
+
+
+# arrange_blocks
+class LevelGoals(BaseModel):
+    """레벨별 목표"""
+    level0: str = Field("", description="레벨 0의 목표")
+    level1: str = Field("", description="레벨 1의 목표")
+    level2: str = Field("", description="레벨 2의 목표")
+    level3: str = Field("", description="레벨 3의 목표")
+    level4: str = Field("", description="레벨 4의 목표")
+
+
+class ArrangeThinkingProcess(BaseModel):
+    """블록 배치 사고 과정"""
+    level4_analysis: str = Field("", description="레벨 4에 배정할 블록과 그 이유")
+    level_goals: Optional[LevelGoals] = None
+    dependency_analysis: str = Field("", description="의존성 및 우선순위 분석")
+    designer_advice: str = Field("", description="서비스 설계자 관점의 조언 및 개선 제안")
+    final_decision: str = Field("", description="최종 배치 결정의 근거")
+
+
+class BlockArrangement(BaseModel):
+    """블록 하나의 배치 결과"""
+    id: str = Field(description="블록 ID")
+    level: int = Field(0, description="배치할 레벨 (0~4)")
+    reason: str = Field("", description="이 레벨에 배치한 이유 (의존성, 우선순위, 위험도 등)")
+
+
+class ArrangeBlocksResponse(AIResult):
+    """arrange_blocks 응답"""
+    legacy_list_field: ClassVar[Optional[str]] = "arrangements"
+
+    thinking_process: Optional[ArrangeThinkingProcess] = None
+    arrangements: List[BlockArrangement] = Field(default_factory=list, description="모든 블록의 배치 결과")
+
+
+
+class ArrangePlanResponse(AIResult):
+    """분할 배치 1단계 응답: 블록 전체를 보고 정한 레벨별 목표와 배치 방향"""
+    thinking_process: Optional[ArrangeThinkingProcess] = None
+
+
+class ArrangeChunkResponse(AIResult):
+    """분할 배치 2단계 응답: 블록 일부의 배치 결과"""
+    legacy_list_field: ClassVar[Optional[str]] = "arrangements"
+
+    arrangements: List[BlockArrangement] = Field(default_factory=list, description="이 묶음에 포함된 블록의 배치 결과")
+
+# generate_feedback
+class FeedbackThinkingProcess(BaseModel):
+    """피드백 분석 사고 과정"""
+    project_analysis: str = Field("", description="프로젝트 분석 (각 레벨별 주요 목적, 프로젝트의 핵심 과제, 논리적 흐름)")
+    arrangement_and_dependency_evaluation: str = Field("", description="배치 및 의존성 평가 (레벨 간 흐름, 의존성 관계)")
+    complementary_suggestions: str = Field("", description="보완점 제안 (시스템적 사고의 관점에서, 누락된 중요한 블록)")
+    user_advice: str = Field("", description="사용자를 위한 조언 (의사결정자 설득 포인트, 안정성과 성공 가능성 향상 방안)")
+
+
+class FeedbackResponse(AIResult):
+    """generate_feedback 응답"""
+    thinking_process: Optional[FeedbackThinkingProcess] = None
+    feedback: str = Field("", description="전체 피드백 요약 (마크다운 형식, 사용자에게 보여질 최종 피드백)")
@@ -5,13 +5,25 @@ Vertex AI를 사용한 AI 서비스
 - generate_blocks: 프로젝트 정보를 바탕으로 블록들을 생성
 - arrange_blocks: 생성된 블록들을 적절한 레벨에 배치
 """
-import os
+import asyncio
 import json
-import pathlib
-from typing import List, Dict, Optional, TypedDict
+import os
+import time
+from typing import AsyncIterator, List, Dict, Optional, Tuple, Type, TypedDict
 from dotenv import load_dotenv
-import vertexai
-from vertexai.preview.generative_models import GenerativeModel
+from ai_client import get_ai_client, init_vertex_ai  # init_vertex_ai: 기존 import 경로 호환
+from ai_cache import get_ai_cache
+from ai_router import get_model_router, should_fall_back
+from pydantic import ValidationError as PydanticValidationError
+from ai_json import IncrementalJSONExtractor
+from ai_prompt import BlockAliases, compact_blocks, count_tokens, get_prompt_stats, truncate_to_tokens
+from ai_retrieval import BlockTextIndex, retrieval_max_blocks, select_prompt_blocks, summarize_groups
+from analysis import top_blocks
+from board_diff import board_snapshot, board_fingerprint, diff_boards, changed_block_count
+from ai_schemas import (
+    AIResult, GenerateBlocksResponse, GeneratedBlock, ArrangeBlocksResponse, ArrangePlanResponse,
+    ArrangeChunkResponse, ArrangeThinkingProcess, BlockArrangement, FeedbackResponse,
+)
 
 # 타입 정의
 class GenerateBlocksResult(TypedDict, total=False):
@@ -19,246 +31,100 @@ class GenerateBlocksResult(TypedDict, total=False):
     blocks: List[Dict]
     project_analysis: Optional[str]
 
-# 유틸리티 함수
-def _parse_ai_response(response_text: str) -> Dict:
+# 응답 모델별 GenerationConfig (처음 사용할 때 생성)
+_structured_configs: Dict[str, object] = {}
+
+def _structured_output_config(result_model: Type[AIResult]):
     """
-    AI 응답 텍스트를 파싱하여 JSON 객체로 변환
+    구조화 출력 설정 (response_mime_type=application/json + response_schema)
     
-    Args:
-        response_text: AI가 반환한 원본 텍스트
+    설치된 Vertex SDK가 response_schema를 지원하지 않으면 None을 반환하고
+    프롬프트의 JSON 형식 안내와 JSON 추출에만 의존합니다.
+    """
+    name = result_model.__name__
+    if name not in _structured_configs:
+        from vertexai.preview.generative_models import GenerationConfig
+        try:
+            _structured_configs[name] = GenerationConfig(
+                response_mime_type="application/json",
+                response_schema=result_model.vertex_schema(),
+            )
+        except TypeError:
+            print("⚠️  Vertex SDK가 response_schema를 지원하지 않아 구조화 출력 없이 호출합니다 (google-cloud-aiplatform 업그레이드 필요)")
+            _structured_configs[name] = None
+    return _structured_configs[name]
+
+def _structured_call_kwargs(result_model: Type[AIResult]) -> Dict:
+    config = _structured_output_config(result_model)
+    return {"generation_config": config} if config is not None else {}
+
+async def _generate_structured(
+    function_name: str,
+    prompt: str,
+    result_model: Type[AIResult],
+    model_name: Optional[str] = None,
+) -> AIResult:
+    """
+    구조화 출력으로 모델을 호출하고 응답을 result_model로 변환 (AI 응답 캐시 사용)
     
-    Returns:
-        파싱된 JSON 객체 (dict)
+    model_name을 지정하지 않으면 모델 라우터가 작업 종류와 프롬프트 크기로 모델 체인을 고르고,
+    앞 모델이 장애/사용 불가/해석 불가 응답으로 실패하면 다음 모델로 다시 요청합니다.
     
-    Raises:
-        ValueError: JSON 파싱 실패 시
+    (함수 이름, 선택된 모델 이름, 프롬프트)가 같은 요청은 캐시된 응답을 재사용합니다.
+    파싱에 실패했거나 잘린 응답(부분 복구)은 캐시하지 않으므로 재시도 시 모델을 다시 호출합니다.
+    대체 모델이 만든 응답도 캐시하지 않습니다 (첫 모델이 복구된 뒤에도 대체 응답이 첫 모델 결과로 재사용되지 않도록).
     """
-    import re
+    router = get_model_router()
+    prompt_tokens = count_tokens(prompt)
+    chain = [model_name] if model_name else router.route(function_name, prompt_tokens)
     
-    text = response_text.strip()
+    cache = get_ai_cache()
+    cache_key = cache.make_key(function_name, chain[0], prompt) if cache else None
     
-    # 디버깅: 원본 응답 출력
-    print(f"🔍 AI 원본 응답 (처음 2000자):\n{text[:2000]}")
-    
-    # JSON 추출 (마크다운 코드 블록 제거)
-    if "```json" in text:
-        # ```json ... ``` 패턴 찾기
-        json_match = re.search(r'```json\s*(.*?)\s*```', text, re.DOTALL)
-        if json_match:
-            text = json_match.group(1).strip()
-        else:
-            # fallback: 첫 번째 ```json 이후부터 찾기
-            text = text.split("```json")[1].split("```")[0].strip()
-    elif "```" in text:
-        # 일반 코드 블록에서 JSON 추출
-        code_match = re.search(r'```\s*(.*?)\s*```', text, re.DOTALL)
-        if code_match:
-            text = code_match.group(1).strip()
-            # json 키워드가 있으면 제거
-            if text.startswith("json"):
-                text = text[4:].strip()
-        else:
-            # fallback
-            text = text.split("```")[1].split("```")[0].strip()
-    
-    # JSON 객체 찾기 (중괄호로 시작하는 부분)
-    if not text.startswith("{"):
-        # 첫 번째 { 찾기
-        start_idx = text.find("{")
-        if start_idx != -1:
-            text = text[start_idx:]
-        else:
-            raise ValueError("JSON 객체를 찾을 수 없습니다 (중괄호 없음)")
-    
-    # 마지막 } 찾기 (중첩된 중괄호 고려)
-    brace_count = 0
-    end_idx = -1
-    for i, char in enumerate(text):
-        if char == "{":
-            brace_count += 1
-        elif char == "}":
-            brace_count -= 1
-            if brace_count == 0:
-                end_idx = i + 1
-                break
-    
-    if end_idx != -1:
-        text = text[:end_idx]
-    else:
-        # }를 찾지 못한 경우, 마지막 } 사용
-        last_brace = text.rfind("}")
-        if last_brace != -1:
-            text = text[:last_brace + 1]
+    if cache:
+        cached_text = cache.get(cache_key)
+        if cached_text is not None:
+            print(f"⚡ AI 캐시 적중: {function_name}")
+            return result_model.decode(cached_text)
     
-    # 불필요한 공백 및 줄바꿈 정리
-    text = text.strip()
+    for index, candidate in enumerate(chain):
+        started_at = time.perf_counter()
+        try:
+            response = await get_ai_client().generate_content(
+                prompt, model_name=candidate, **_structured_call_kwargs(result_model)
+            )
+            get_prompt_stats().record(function_name, prompt, response.text, getattr(response, "usage_metadata", None))
+            result = result_model.decode(response.text)
+        except Exception as e:
+            router.record(function_name, prompt_tokens, candidate, index, time.perf_counter() - started_at, e)
+            if index + 1 < len(chain) and should_fall_back(e):
+                print(f"↪️  {function_name}: {candidate} 실패, {chain[index + 1]}(으)로 대체: {e}")
+                continue
+            raise
+        router.record(function_name, prompt_tokens, candidate, index, time.perf_counter() - started_at)
+        break
     
-    # JSON 파싱
-    try:
-        parsed = json.loads(text)
-        print(f"✅ JSON 파싱 성공")
-        return parsed
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON 파싱 실패: {e}")
-        print(f"파싱 시도한 텍스트 (처음 1000자):\n{text[:1000]}")
-        print(f"파싱 시도한 텍스트 (오류 위치 주변):")
-        error_pos = e.pos if hasattr(e, 'pos') else 0
-        start = max(0, error_pos - 200)
-        end = min(len(text), error_pos + 200)
-        print(f"{text[start:end]}")
-        print(f"오류 위치: {error_pos}")
-        
-        # 부분 복구 시도: 마지막 불완전한 항목 제거
-        if "arrangements" in text and text.count("[") > 0:
-            try:
-                # arrangements 배열의 마지막 불완전한 항목 제거 시도
-                last_comma = text.rfind(",")
-                if last_comma != -1:
-                    # 마지막 쉼표 이후 부분 제거 시도
-                    text_fixed = text[:last_comma] + "\n  ]\n}"
-                    parsed = json.loads(text_fixed)
-                    print(f"⚠️  부분 복구 성공 (마지막 항목 제거)")
-                    return parsed
-            except:
-                pass
-        
-        raise ValueError(f"AI 응답을 파싱할 수 없습니다: {str(e)}")
+    if cache and not result.partial and index == 0:
+        cache.set(cache_key, response.text)
+    return result
 
 # .env 파일 로드
 load_dotenv()
 
-# Vertex AI 초기화
-def init_vertex_ai():
-    """Vertex AI 초기화"""
-    from utils import find_credentials_file
-    
-    # .env 파일에서 환경 변수 가져오기
-    env_cred_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-    found_cred_path = find_credentials_file()
-    cred_path = env_cred_path or found_cred_path
-    
-    project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
-    location = os.getenv("VERTEX_AI_LOCATION")
-    
-    # 기본값 설정
-    if not project_id:
-        project_id = "thinkblock"
-    if not location:
-        location = "asia-northeast3"
-    
-    # 경로 정규화 및 확인
-    if cred_path:
-        # 상대 경로인 경우 절대 경로로 변환
-        if not os.path.isabs(cred_path):
-            project_root = pathlib.Path(__file__).parent.parent
-            cred_path = str(project_root / cred_path)
-        
-        # 절대 경로로 변환
-        cred_path = str(pathlib.Path(cred_path).absolute())
-        
-        # 파일 존재 확인
-        if os.path.exists(cred_path):
-            # GOOGLE_APPLICATION_CREDENTIALS 환경 변수 설정 (Vertex AI가 자동으로 사용)
-            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = cred_path
-            
-            try:
-                vertexai.init(project=project_id, location=location)
-                print(f"✅ Vertex AI 초기화 완료: project={project_id}, location={location}, credentials={cred_path}")
-                return True
-            except Exception as e:
-                error_msg = str(e)
-                print(f"❌ Vertex AI 초기화 실패: {error_msg}")
-                print(f"   인증 파일 경로: {cred_path}")
-                print(f"   파일 존재 여부: {os.path.exists(cred_path)}")
-                # 파일을 찾지 못하는 오류인 경우 더 명확한 메시지 제공
-                if "was not found" in error_msg or "not found" in error_msg.lower():
-                    raise FileNotFoundError(f"인증 파일을 찾을 수 없습니다: {cred_path}\n"
-                                          f"프로젝트 루트에 vertex-ai-thinkblock.json 파일이 있는지 확인하세요.")
-                raise
-        else:
-            # 파일이 존재하지 않는 경우
-            error_msg = f"인증 파일을 찾을 수 없습니다: {cred_path}"
-            print(f"❌ {error_msg}")
-            print(f"   프로젝트 루트: {pathlib.Path(__file__).parent.parent}")
-            print(f"   환경 변수 GOOGLE_APPLICATION_CREDENTIALS: {env_cred_path}")
-            print(f"   find_credentials_file() 결과: {found_cred_path}")
-            raise FileNotFoundError(f"{error_msg}\n프로젝트 루트에 vertex-ai-thinkblock.json 파일이 있는지 확인하세요.")
-    else:
-        # 인증 파일 경로를 찾지 못한 경우
-        # GCP 환경(Cloud Run 등)에서는 Service Account를 통해 자동 인증 가능
-        # 로컬 환경인지 확인 (GCP 환경 변수 확인)
-        is_gcp_env = (
-            os.getenv("K_SERVICE") is not None or  # Cloud Run
-            os.getenv("GAE_SERVICE") is not None or  # App Engine
-            os.getenv("GOOGLE_CLOUD_PROJECT") is not None  # GCP 프로젝트 환경 변수
-        )
-        
-        try:
-            vertexai.init(project=project_id, location=location)
-            if is_gcp_env:
-                print(f"✅ Vertex AI 초기화 완료 (GCP Service Account 사용): project={project_id}, location={location}")
-            else:
-                print(f"✅ Vertex AI 초기화 완료 (기본 인증 사용): project={project_id}, location={location}")
-            return True
-        except Exception as e:
-            error_msg = str(e)
-            print(f"❌ Vertex AI 초기화 실패: {error_msg}")
-            print(f"   인증 파일 경로를 찾을 수 없습니다.")
-            print(f"   프로젝트 루트: {pathlib.Path(__file__).parent.parent}")
-            print(f"   환경 변수 GOOGLE_APPLICATION_CREDENTIALS: {env_cred_path}")
-            print(f"   find_credentials_file() 결과: {found_cred_path}")
-            print(f"   GCP 환경 여부: {is_gcp_env}")
-            
-            # GCP 환경이 아닌 경우에만 FileNotFoundError 발생
-            # GCP 환경에서는 Service Account를 통해 인증할 수 있어야 함
-            if not is_gcp_env:
-                # 파일을 찾지 못하는 오류인 경우 더 명확한 메시지 제공
-                if "was not found" in error_msg or "not found" in error_msg.lower():
-                    raise FileNotFoundError(f"인증 파일을 찾을 수 없습니다.\n"
-                                          f"프로젝트 루트({pathlib.Path(__file__).parent.parent})에 vertex-ai-thinkblock.json 파일이 있는지 확인하세요.\n"
-                                          f"또는 환경 변수 GOOGLE_APPLICATION_CREDENTIALS를 설정하세요.")
-            # GCP 환경에서도 실패한 경우는 다른 인증 오류일 수 있음
-            raise
-
-def generate_blocks(
+def _build_generate_blocks_prompt(
     project_overview: str,
     current_status: str,
     problems: str,
     additional_info: str,
     existing_categories: List[str]
-) -> GenerateBlocksResult:
-    """
-    AI를 사용하여 블록 생성
-    
-    체계적인 사고 과정(thinking_process)을 거쳐 프로젝트에 필요한 블록들을 생성합니다.
-    생성된 블록은 최소 20개 이상이며, 프로젝트 분석(project_analysis)도 함께 반환됩니다.
+) -> str:
+    """블록 생성 프롬프트 구성 (generate_blocks와 스트리밍 생성에서 공통 사용)"""
+    # 프롬프트 구성
+    categories_context = ""
+    if existing_categories:
+        categories_context = f"\n\n기존 카테고리 목록: {', '.join(existing_categories)}\n위 카테고리 중 적절한 것을 사용하거나, 필요시 새로운 카테고리를 체계적으로 생성할 수 있습니다."
     
-    Args:
-        project_overview: 프로젝트 개요
-        current_status: 현재 진행 상황
-        problems: 문제점/병목지점
-        additional_info: 기타 참고 사항
-        existing_categories: 기존 카테고리 목록
-    
-    Returns:
-        {
-            "blocks": List[Dict],  # 생성된 블록 리스트 (최소 20개)
-            "project_analysis": Optional[str]  # 프로젝트 분석 결과
-        }
-    
-    Raises:
-        ValueError: AI 응답을 파싱할 수 없을 때
-        Exception: Vertex AI 호출 실패 시
-    """
-    try:
-        model = GenerativeModel("gemini-2.0-flash-exp")  # gemini-2.5-flash는 아직 사용 불가, gemini-2.0-flash-exp 사용
-        
-        # 프롬프트 구성
-        categories_context = ""
-        if existing_categories:
-            categories_context = f"\n\n기존 카테고리 목록: {', '.join(existing_categories)}\n위 카테고리 중 적절한 것을 사용하거나, 필요시 새로운 카테고리를 체계적으로 생성할 수 있습니다."
-        
-        prompt = f"""당신은 서비스 설계자입니다. 사용자가 제공한 정보를 바탕으로 프로젝트를 위한 블록들을 체계적으로 생성해주세요.
+    prompt = f"""당신은 서비스 설계자입니다. 사용자가 제공한 정보를 바탕으로 프로젝트를 위한 블록들을 체계적으로 생성해주세요.
 
 프로젝트 개요:
 {project_overview}
@@ -354,45 +220,62 @@ def generate_blocks(
 - blocks 배열에는 최소 20개 이상의 블록이 포함되어야 합니다.
 - 각 블록의 description은 구체적이고 실행 가능해야 합니다.
 - 카테고리는 일관성 있게 사용하고, 프로젝트 특성에 맞게 구성하세요."""
+    return prompt
 
-        response = model.generate_content(prompt)
-        
-        # 응답 파싱
-        response_data = _parse_ai_response(response.text)
-        
-        # 디버깅: 파싱된 데이터 출력
-        print(f"🔍 파싱된 생성 데이터 타입: {type(response_data)}")
+async def generate_blocks(
+    project_overview: str,
+    current_status: str,
+    problems: str,
+    additional_info: str,
+    existing_categories: List[str]
+) -> GenerateBlocksResult:
+    """
+    AI를 사용하여 블록 생성
+    
+    체계적인 사고 과정(thinking_process)을 거쳐 프로젝트에 필요한 블록들을 생성합니다.
+    생성된 블록은 최소 20개 이상이며, 프로젝트 분석(project_analysis)도 함께 반환됩니다.
+    
+    Args:
+        project_overview: 프로젝트 개요
+        current_status: 현재 진행 상황
+        problems: 문제점/병목지점
+        additional_info: 기타 참고 사항
+        existing_categories: 기존 카테고리 목록
+    
+    Returns:
+        {
+            "blocks": List[Dict],  # 생성된 블록 리스트 (최소 20개)
+            "project_analysis": Optional[str]  # 프로젝트 분석 결과
+        }
+    
+    Raises:
+        ValueError: AI 응답을 파싱할 수 없을 때
+        Exception: Vertex AI 호출 실패 시
+    """
+    try:
+        prompt = _build_generate_blocks_prompt(
+            project_overview, current_status, problems, additional_info, existing_categories
+        )
+
+        # 모델 호출 및 응답 변환 (동일 입력이면 캐시 사용)
+        response = await _generate_structured("generate_blocks", prompt, GenerateBlocksResponse)
+        blocks_data = [block.model_dump() for block in response.blocks]
+        thinking_process = response.thinking_process
         
-        # 응답 형식 확인 (배열 또는 객체)
-        if isinstance(response_data, list):
-            # 배열 형식 (레거시 호환성)
-            blocks_data = response_data
-            print(f"🔍 레거시 배열 형식 감지: {len(blocks_data)}개 블록")
-        elif isinstance(response_data, dict):
-            # 객체 형식 (thinking_process와 blocks 포함)
-            blocks_data = response_data.get("blocks", [])
-            thinking_process = response_data.get("thinking_process", {})
-            
-            if thinking_process:
-                print(f"🔍 thinking_process 포함됨")
-                # thinking_process 내용 출력 (디버깅용)
-                if thinking_process.get("project_analysis"):
-                    print(f"   프로젝트 분석: {thinking_process.get('project_analysis')[:100]}...")
-                if thinking_process.get("category_design"):
-                    print(f"   카테고리 설계: {thinking_process.get('category_design')[:100]}...")
-        else:
-            raise ValueError("예상치 못한 응답 형식입니다.")
+        if thinking_process:
+            print(f"🔍 thinking_process 포함됨")
+            # thinking_process 내용 출력 (디버깅용)
+            if thinking_process.project_analysis:
+                print(f"   프로젝트 분석: {thinking_process.project_analysis[:100]}...")
+            if thinking_process.category_design:
+                print(f"   카테고리 설계: {thinking_process.category_design[:100]}...")
         
         # 최소 20개 보장
         if len(blocks_data) < 20:
             print(f"⚠️  생성된 블록이 20개 미만입니다 ({len(blocks_data)}개). 추가 생성이 필요할 수 있습니다.")
         
         # thinking_process에서 project_analysis 추출
-        project_analysis = None
-        if isinstance(response_data, dict):
-            thinking_process = response_data.get("thinking_process", {})
-            if thinking_process:
-                project_analysis = thinking_process.get("project_analysis")
+        project_analysis = thinking_process.project_analysis if thinking_process else None
         
         print(f"✅ AI 블록 생성 성공: {len(blocks_data)}개")
         if project_analysis:
@@ -405,89 +288,93 @@ def generate_blocks(
         }
         
     except ValueError as e:
-        # _parse_ai_response에서 발생한 ValueError를 그대로 전달
+        # 응답 변환(_generate_structured)에서 발생한 ValueError를 그대로 전달
         raise
     except Exception as e:
         print(f"❌ AI 블록 생성 실패: {e}")
         raise
 
-def arrange_blocks(
-    blocks: List[Dict],
-    project_overview: Optional[str] = None,
-    current_status: Optional[str] = None,
-    problems: Optional[str] = None,
-    additional_info: Optional[str] = None
-) -> List[Dict]:
+async def stream_generate_blocks(
+    project_overview: str,
+    current_status: str,
+    problems: str,
+    additional_info: str,
+    existing_categories: List[str]
+) -> AsyncIterator[Tuple[str, Dict]]:
     """
-    AI를 사용하여 블록들을 적절한 레벨에 배치
+    AI 블록 생성 (스트리밍)
     
-    Args:
-        blocks: 배치할 블록 리스트 (각 블록은 id, title, description, category 포함)
-        project_overview: 프로젝트 개요 (선택사항)
-        current_status: 현재 진행 상황 (선택사항)
-        problems: 문제점/병목지점 (선택사항)
-        additional_info: 기타 참고 사항 (선택사항)
+    generate_blocks와 같은 프롬프트를 사용하되, 모델 응답을 조각 단위로 받아
+    blocks 배열의 항목이 완성될 때마다 바로 내보냅니다.
     
-    Returns:
-        레벨이 배정된 블록 리스트 (각 블록에 level 필드 추가)
+    Yields:
+        ("block", 블록 데이터): 완성된 블록마다
+        ("done", {"project_analysis": Optional[str], "blocks_count": int}): 응답이 끝난 뒤 한 번
+    
+    Raises:
+        ValueError: 응답에서 블록을 하나도 찾지 못했을 때
+        Exception: Vertex AI 호출 실패 시
     """
+    prompt = _build_generate_blocks_prompt(
+        project_overview, current_status, problems, additional_info, existing_categories
+    )
+    parser = IncrementalJSONExtractor(array_key="blocks")
+    
+    router = get_model_router()
+    prompt_tokens = count_tokens(prompt)
+    chain = router.route("generate_blocks", prompt_tokens)
+    
+    cache = get_ai_cache()
+    cache_key = cache.make_key("generate_blocks", chain[0], prompt) if cache else None
+    cached_text = cache.get(cache_key) if cache else None
+    served_index = None  # 응답한 후보 모델의 순번 (0이 아니면 대체 모델 응답이므로 캐시하지 않음)
+    
+    if cached_text is not None:
+        print("⚡ AI 캐시 적중: generate_blocks (스트리밍)")
+        for block_data in parser.feed(cached_text):
+            yield "block", GeneratedBlock.model_validate(block_data).model_dump()
+    else:
+        for index, candidate in enumerate(chain):
+            started_at = time.perf_counter()
+            stream = get_ai_client().stream_content(
+                prompt, model_name=candidate, **_structured_call_kwargs(GenerateBlocksResponse)
+            )
+            try:
+                async for chunk in stream:
+                    for block_data in parser.feed(chunk):
+                        yield "block", GeneratedBlock.model_validate(block_data).model_dump()
+            except Exception as e:
+                router.record("generate_blocks", prompt_tokens, candidate, index, time.perf_counter() - started_at, e)
+                # 이미 보낸 응답이 있으면 다른 모델로 이어 갈 수 없음
+                if parser.text or index + 1 >= len(chain) or not should_fall_back(e):
+                    raise
+                print(f"↪️  generate_blocks (스트리밍): {candidate} 실패, {chain[index + 1]}(으)로 대체: {e}")
+                continue
+            router.record("generate_blocks", prompt_tokens, candidate, index, time.perf_counter() - started_at)
+            served_index = index
+            break
+        get_prompt_stats().record("generate_blocks", prompt, parser.text)
+    
+    if parser.items_emitted == 0:
+        raise ValueError("AI 응답에서 블록을 찾을 수 없습니다")
+    
+    # thinking_process는 blocks보다 앞에 오므로 같은 파서의 결과에서 project_analysis 추출
+    project_analysis = None
     try:
-        model = GenerativeModel("gemini-2.0-flash-exp")
-        
-        # 블록 정보를 문자열로 변환 (ID를 명확히 포함)
-        blocks_info = []
-        for i, block in enumerate(blocks):
-            block_id = block.get('id', '')
-            block_str = f"블록 ID: {block_id}\n"
-            block_str += f"  제목: {block.get('title', '')}\n"
-            block_str += f"  설명: {block.get('description', '')}\n"
-            if block.get('category'):
-                block_str += f"  카테고리: {block.get('category')}\n"
-            blocks_info.append(block_str)
-        
-        blocks_text = "\n".join(blocks_info)
-        
-        # 디버깅: 블록 ID 목록 출력
-        block_ids = [block.get('id', '') for block in blocks]
-        print(f"🔍 배치할 블록 ID 목록: {block_ids}")
-        
-        # 프로젝트 정보 구성 (project_overview가 project_analysis인 경우와 일반 프로젝트 정보인 경우 구분)
-        project_context = ""
-        if project_overview:
-            # project_overview가 project_analysis인 경우 (generate_blocks에서 생성된 것)
-            # project_analysis는 보통 "핵심 목표", "가치", "시급한 영역" 등의 키워드를 포함
-            if len(project_overview) > 200 or "핵심 목표" in project_overview or "가치" in project_overview or "시급한 영역" in project_overview:
-                project_context = "\n\n## 프로젝트 분석 (AI 생성)\n"
-                project_context += f"{project_overview}\n"
-                project_context += "\n위 프로젝트 분석을 바탕으로 블록 배치를 진행하세요."
-            else:
-                # 일반 프로젝트 정보인 경우
-                project_context = "\n\n## 프로젝트 정보\n"
-                project_context += f"프로젝트 개요:\n{project_overview}\n\n"
-                if current_status:
-                    project_context += f"현재 진행 상황:\n{current_status}\n\n"
-                if problems:
-                    project_context += f"문제점/병목지점:\n{problems}\n\n"
-                if additional_info:
-                    project_context += f"기타 참고 사항:\n{additional_info}\n"
-                project_context += "\n위 프로젝트 정보를 참고하여 블록 배치를 진행하세요."
-        elif current_status or problems or additional_info:
-            # project_overview는 없지만 다른 정보는 있는 경우
-            project_context = "\n\n## 프로젝트 정보\n"
-            if current_status:
-                project_context += f"현재 진행 상황:\n{current_status}\n\n"
-            if problems:
-                project_context += f"문제점/병목지점:\n{problems}\n\n"
-            if additional_info:
-                project_context += f"기타 참고 사항:\n{additional_info}\n"
-            project_context += "\n위 프로젝트 정보를 참고하여 블록 배치를 진행하세요."
-        
-        prompt = f"""당신은 프로젝트 오너이자 제품 설계자입니다. 주어진 블록들을 체계적으로 분석하여 적절한 레벨(0-4)에 배치해주세요.
-{project_context}
-블록 목록:
-{blocks_text}
+        response = GenerateBlocksResponse.model_validate(parser.result())
+        if response.thinking_process:
+            project_analysis = response.thinking_process.project_analysis
+        if cache and served_index == 0 and parser.complete:
+            cache.set(cache_key, parser.text)
+    except (ValueError, PydanticValidationError) as e:
+        # 블록은 이미 저장되었으므로 분석만 생략
+        print(f"⚠️  스트리밍 응답 전체 파싱 실패 (프로젝트 분석 생략): {e}")
+    
+    print(f"✅ AI 블록 스트리밍 생성 완료: {parser.items_emitted}개")
+    yield "done", {"project_analysis": project_analysis, "blocks_count": parser.items_emitted}
 
-레벨 배치 기준 (반드시 다양한 레벨에 분산 배치해야 함):
+# 레벨 배치 기준 (단일/분할 배치 프롬프트 공통)
+_ARRANGE_LEVEL_CRITERIA = """레벨 배치 기준 (반드시 다양한 레벨에 분산 배치해야 함):
 - 레벨 0 (기반): 가장 먼저 구축해야 할 기반 인프라, 기본 설정, 필수 전제 조건
   특징: 다른 모든 작업의 기반이 되는 것, 없으면 다른 작업을 시작할 수 없는 것
   
@@ -509,7 +396,25 @@ def arrange_blocks(
 3. **위험도**: 높은 위험을 가진 작업은 낮은 레벨에 배치하여 조기에 검증
 4. **레벨 분산**: 모든 블록을 레벨 0에 배치하지 말고, 0-4 레벨에 골고루 분산 배치해야 함
 
-## 배치 전 사고 과정 (thinking_process)
+"""
+
+def _format_arrange_block(block: Dict) -> str:
+    """배치 프롬프트용 블록 정보 (ID를 명확히 포함)"""
+    block_str = f"블록 ID: {block.get('id', '')}\n"
+    block_str += f"  제목: {block.get('title', '')}\n"
+    block_str += f"  설명: {block.get('description', '')}\n"
+    if block.get('category'):
+        block_str += f"  카테고리: {block.get('category')}\n"
+    return block_str
+
+async def _arrange_blocks_single(blocks_text: str, project_context: str) -> Tuple[List[BlockArrangement], Optional[ArrangeThinkingProcess]]:
+    """블록 전체를 한 번의 호출로 배치"""
+    prompt = f"""당신은 프로젝트 오너이자 제품 설계자입니다. 주어진 블록들을 체계적으로 분석하여 적절한 레벨(0-4)에 배치해주세요.
+{project_context}
+블록 목록:
+{blocks_text}
+
+{_ARRANGE_LEVEL_CRITERIA}## 배치 전 사고 과정 (thinking_process)
 
 블록 배치 전에 다음 사고 과정을 거쳐 체계적으로 분석하세요:
 
@@ -577,107 +482,393 @@ def arrange_blocks(
 - 각 블록의 reason 필드는 해당 레벨에 배치한 구체적인 이유를 포함해야 합니다.
 - 레벨은 0부터 4까지의 정수여야 하며, 블록들을 다양한 레벨에 분산 배치해야 합니다."""
 
-        response = model.generate_content(prompt)
-        
-        # 응답 파싱
-        response_data = _parse_ai_response(response.text)
-        
-        # 디버깅: 파싱된 데이터 출력
-        print(f"🔍 파싱된 배치 데이터: {response_data}")
-        
-        # 응답 형식 확인 (배열 또는 객체)
-        thinking_process = None
-        if isinstance(response_data, list):
-            # 배열 형식 (레거시 호환성)
-            arranged_data = response_data
-            # 각 블록의 reason을 모아서 전체 reasoning 생성
-            reasons = []
-            for item in arranged_data:
-                reason_text = item.get("reason", "")
-                if reason_text:
-                    block_id = item.get("id", "")
-                    block_title = next((b.get("title", "") for b in blocks if b.get("id") == block_id), "")
-                    reasons.append(f"- {block_title} (레벨 {item.get('level', 0)}): {reason_text}")
-            reasoning = "\n\n".join(reasons) if reasons else ""
-            print(f"🔍 배열 형식에서 생성한 reasoning 길이: {len(reasoning)} 문자")
-            if reasoning:
-                print(f"🔍 reasoning 일부: {reasoning[:200]}")
-        elif isinstance(response_data, dict):
-            # 객체 형식 (thinking_process와 arrangements 포함)
-            arranged_data = response_data.get("arrangements", [])
-            thinking_process = response_data.get("thinking_process", {})
-            
-            # thinking_process가 있으면 이를 기반으로 reasoning 생성
-            if thinking_process:
-                reasoning_parts = []
-                
-                # 레벨 4 분석
-                if thinking_process.get("level4_analysis"):
-                    reasoning_parts.append(f"## 레벨 4 (목표) 분석\n{thinking_process.get('level4_analysis')}")
-                
-                # 레벨별 목표
-                level_goals = thinking_process.get("level_goals", {})
-                if level_goals:
-                    reasoning_parts.append("\n## 레벨별 목표")
-                    for level in ["level0", "level1", "level2", "level3", "level4"]:
-                        if level_goals.get(level):
-                            level_name = {"level0": "레벨 0 (기반)", "level1": "레벨 1", "level2": "레벨 2", 
-                                        "level3": "레벨 3", "level4": "레벨 4 (목표)"}.get(level, level)
-                            reasoning_parts.append(f"- {level_name}: {level_goals.get(level)}")
-                
-                # 의존성 분석
-                if thinking_process.get("dependency_analysis"):
-                    reasoning_parts.append(f"\n## 의존성 및 우선순위 분석\n{thinking_process.get('dependency_analysis')}")
-                
-                # 설계자 조언
-                if thinking_process.get("designer_advice"):
-                    reasoning_parts.append(f"\n## 서비스 설계자 관점의 조언\n{thinking_process.get('designer_advice')}")
-                
-                # 최종 결정
-                if thinking_process.get("final_decision"):
-                    reasoning_parts.append(f"\n## 최종 배치 결정\n{thinking_process.get('final_decision')}")
-                
-                # 각 블록의 배치 이유 추가
-                if arranged_data:
-                    reasoning_parts.append("\n## 블록별 배치 이유")
-                    for item in arranged_data:
-                        reason_text = item.get("reason", "")
-                        if reason_text:
-                            block_id = item.get("id", "")
-                            block_title = next((b.get("title", "") for b in blocks if b.get("id") == block_id), "")
-                            reasoning_parts.append(f"- {block_title} (레벨 {item.get('level', 0)}): {reason_text}")
-                
-                reasoning = "\n\n".join(reasoning_parts)
+    # 모델 호출 및 응답 변환 (동일 입력이면 캐시 사용)
+    response = await _generate_structured("arrange_blocks", prompt, ArrangeBlocksResponse)
+    return response.arrangements, response.thinking_process
+
+def _plan_arrange_chunks(blocks: List[Dict]) -> List[List[Dict]]:
+    """
+    배치할 블록을 토큰 예산에 맞는 묶음으로 나눔
+
+    같은 카테고리의 블록이 같은 묶음에 모이도록 (카테고리, ID) 순으로 정렬한 뒤 앞에서부터 채웁니다.
+    묶음이 하나뿐이면 기존처럼 한 번의 호출로 배치합니다.
+    """
+    token_budget = int(os.getenv("AI_ARRANGE_CHUNK_TOKENS", "8000"))
+    max_blocks = int(os.getenv("AI_ARRANGE_CHUNK_MAX_BLOCKS", "60"))
+
+    chunks: List[List[Dict]] = []
+    current: List[Dict] = []
+    current_tokens = 0
+    for block in sorted(blocks, key=lambda b: (b.get('category') or '', b.get('id', ''))):
+        tokens = count_tokens(_format_arrange_block(block))
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_blocks):
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(block)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _format_arrange_plan(thinking_process: Optional[ArrangeThinkingProcess]) -> str:
+    """분할 배치 묶음 프롬프트에 넣을 전체 배치 방향"""
+    if thinking_process is None:
+        return ""
+    parts = []
+    if thinking_process.level_goals:
+        goals = thinking_process.level_goals
+        parts.append("레벨별 목표:")
+        for level in range(5):
+            goal = getattr(goals, f"level{level}")
+            if goal:
+                parts.append(f"- 레벨 {level}: {goal}")
+    if thinking_process.level4_analysis:
+        parts.append(f"\n레벨 4 (목표) 분석:\n{thinking_process.level4_analysis}")
+    if thinking_process.dependency_analysis:
+        parts.append(f"\n의존성 및 우선순위:\n{thinking_process.dependency_analysis}")
+    if thinking_process.final_decision:
+        parts.append(f"\n배치 방향:\n{thinking_process.final_decision}")
+    return "\n".join(parts)
+
+async def _plan_arrange_levels(
+    blocks: List[Dict],
+    project_context: str,
+    category_summary: Optional[str] = None
+) -> Optional[ArrangeThinkingProcess]:
+    """
+    분할 배치 1단계: 블록 전체의 제목/카테고리만 보고 레벨별 목표와 배치 방향 결정
+
+    category_summary가 있으면 (블록이 너무 많은 경우) 제목 전체 대신 카테고리별 요약을 보냅니다.
+    """
+    if category_summary:
+        outline_title = "블록 요약 (카테고리별 블록 수, 대표 블록)"
+        outline = category_summary
+    else:
+        outline_title = "블록 목록 (제목 [카테고리])"
+        outline = "\n".join(
+            f"- {block.get('title', '')}" + (f" [{block['category']}]" if block.get('category') else "")
+            for block in sorted(blocks, key=lambda b: (b.get('category') or '', b.get('id', '')))
+        )
+    prompt = f"""당신은 프로젝트 오너이자 제품 설계자입니다. 아래 블록 {len(blocks)}개를 레벨(0-4)에 배치하기 전에, 블록 전체를 보고 배치 방향을 정해주세요.
+{project_context}
+{outline_title}:
+{outline}
+
+{_ARRANGE_LEVEL_CRITERIA}## 사고 과정 (thinking_process)
+
+블록이 많아 이후 여러 묶음으로 나누어 배치합니다. 모든 묶음이 같은 기준으로 배치할 수 있도록 다음을 작성하세요:
+
+1. **레벨 4 (목표) 분석**: 최종 목표로 설정할 블록들과 그 이유
+2. **레벨별 목표**: 각 레벨(0-4)에서 달성해야 할 핵심 가치와 목적
+3. **의존성 및 우선순위 분석**: 어떤 영역/카테고리가 다른 영역의 전제 조건인지, 조기에 검증해야 할 위험 요소는 무엇인지
+4. **서비스 설계자 관점의 조언**: 놓치고 있는 것, 안정성과 성공 가능성을 높이기 위한 조언
+5. **최종 배치 방향**: 위 분석을 바탕으로 각 묶음이 따라야 할 배치 원칙
+
+## 응답 형식
+
+다음 JSON 형식으로 응답해주세요:
+
+{{
+  "thinking_process": {{
+    "level4_analysis": "레벨 4에 배정할 블록과 그 이유",
+    "level_goals": {{
+      "level0": "레벨 0의 목표",
+      "level1": "레벨 1의 목표",
+      "level2": "레벨 2의 목표",
+      "level3": "레벨 3의 목표",
+      "level4": "레벨 4의 목표"
+    }},
+    "dependency_analysis": "의존성 및 우선순위 분석",
+    "designer_advice": "서비스 설계자 관점의 조언 및 개선 제안",
+    "final_decision": "각 묶음이 따라야 할 배치 원칙"
+  }}
+}}"""
+
+    response = await _generate_structured("arrange_plan", prompt, ArrangePlanResponse)
+    return response.thinking_process
+
+async def _arrange_chunk(
+    chunk: List[Dict],
+    blocks_by_id: Dict[str, Dict],
+    project_context: str,
+    plan_text: str
+) -> List[BlockArrangement]:
+    """분할 배치 2단계: 전체 배치 방향에 따라 묶음 하나의 블록 배치 (묶음 밖 블록 ID는 결과에서 제외)"""
+    chunk_ids = {block.get('id') for block in chunk}
+    blocks_info = []
+    for block in chunk:
+        block_str = _format_arrange_block(block)
+        # 다른 묶음에 있는 선행 블록은 제목만 알려줌 (레벨은 병합 시 보정)
+        prerequisites = [
+            blocks_by_id[dep_id].get('title', '')
+            for dep_id in block.get('dependencies') or []
+            if dep_id in blocks_by_id and dep_id not in chunk_ids
+        ]
+        if prerequisites:
+            block_str += f"  다른 묶음의 선행 블록: {', '.join(prerequisites)}\n"
+        blocks_info.append(block_str)
+    blocks_text = "\n".join(blocks_info)
+
+    prompt = f"""당신은 프로젝트 오너이자 제품 설계자입니다. 전체 블록 중 일부 묶음을 아래의 전체 배치 방향에 맞게 레벨(0-4)에 배치해주세요.
+{project_context}
+## 전체 배치 방향
+{plan_text or "(없음)"}
+
+## 이 묶음의 블록 목록
+{blocks_text}
+
+{_ARRANGE_LEVEL_CRITERIA}## 응답 형식
+
+다음 JSON 형식으로 응답해주세요:
+
+{{
+  "arrangements": [
+    {{"id": "블록1의id", "level": 0, "reason": "이 블록을 레벨 0에 배치한 이유 (의존성, 우선순위, 위험도 등 포함)"}},
+    ...
+  ]
+}}
+
+중요 사항:
+- arrangements 배열에는 이 묶음의 모든 블록이 포함되어야 합니다.
+- 다른 묶음의 선행 블록이 있는 블록은 그 선행 블록보다 높은 레벨에 배치하세요.
+- 레벨은 0부터 4까지의 정수여야 하며, 전체 배치 방향의 레벨별 목표를 따르세요."""
+
+    response = await _generate_structured("arrange_chunk", prompt, ArrangeChunkResponse)
+    return [item for item in response.arrangements if item.id in chunk_ids]
+
+def _reconcile_arrangements(blocks: List[Dict], arranged_data: List[BlockArrangement]) -> List[BlockArrangement]:
+    """
+    묶음별 배치 결과 병합
+
+    - 같은 블록이 여러 번 나오면 처음 결과만 사용하고, 레벨은 0~4로 조정
+    - 묶음끼리는 서로의 레벨을 모르므로, 선행 블록(dependencies)보다 낮거나 같은 레벨에 놓인 블록을
+      의존성 순서(위상 정렬)대로 한 단계 위로 올림 (최대 레벨 4)
+    """
+    merged: Dict[str, BlockArrangement] = {}
+    for item in arranged_data:
+        if item.id not in merged:
+            merged[item.id] = item.model_copy(update={"level": max(0, min(4, item.level))})
+
+    prerequisites = {
+        block.get('id'): [dep_id for dep_id in block.get('dependencies') or [] if dep_id in merged]
+        for block in blocks
+        if block.get('id') in merged
+    }
+    dependents: Dict[str, List[str]] = {block_id: [] for block_id in prerequisites}
+    remaining = {block_id: len(deps) for block_id, deps in prerequisites.items()}
+    for block_id, deps in prerequisites.items():
+        for dep_id in deps:
+            dependents.setdefault(dep_id, []).append(block_id)
+
+    ready = [block_id for block_id, count in remaining.items() if count == 0]
+    adjusted = 0
+    while ready:
+        block_id = ready.pop()
+        deps = prerequisites.get(block_id, [])
+        if deps:
+            required = min(4, max(merged[dep_id].level for dep_id in deps) + 1)
+            item = merged[block_id]
+            if item.level < required:
+                merged[block_id] = item.model_copy(update={
+                    "level": required,
+                    "reason": f"{item.reason} (선행 블록보다 높은 레벨이 되도록 레벨 {item.level} -> {required} 조정)".strip(),
+                })
+                adjusted += 1
+        for dependent in dependents.get(block_id, []):
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+
+    if adjusted:
+        print(f"🔧 분할 배치 병합: 의존성 충돌 {adjusted}개 블록 레벨 조정")
+    return list(merged.values())
+
+async def _arrange_blocks_chunked(
+    chunks: List[List[Dict]],
+    blocks: List[Dict],
+    project_context: str,
+    category_summary: Optional[str] = None
+) -> Tuple[List[BlockArrangement], Optional[ArrangeThinkingProcess]]:
+    """
+    블록이 많을 때 나누어 배치
+
+    1) 전체 블록의 제목/카테고리로 레벨별 목표와 배치 방향을 먼저 정하고
+    2) 그 방향을 공유하는 묶음들을 동시에 배치한 뒤
+    3) 누락된 블록을 한 번 더 요청하고, 묶음 사이의 의존성 충돌을 보정해 병합
+    """
+    print(f"🧩 분할 배치: 블록 {len(blocks)}개 -> 묶음 {len(chunks)}개 ({[len(chunk) for chunk in chunks]})")
+    thinking_process = await _plan_arrange_levels(blocks, project_context, category_summary)
+    plan_text = _format_arrange_plan(thinking_process)
+    blocks_by_id = {block.get('id'): block for block in blocks}
+
+    results = await asyncio.gather(*(
+        _arrange_chunk(chunk, blocks_by_id, project_context, plan_text) for chunk in chunks
+    ))
+    arranged_data = [item for chunk_result in results for item in chunk_result]
+
+    arranged_ids = {item.id for item in arranged_data}
+    missing = [block for block in blocks if block.get('id') not in arranged_ids]
+    if missing:
+        print(f"⚠️  분할 배치 응답에서 누락된 블록 {len(missing)}개 재요청")
+        arranged_data += await _arrange_chunk(missing, blocks_by_id, project_context, plan_text)
+
+    return _reconcile_arrangements(blocks, arranged_data), thinking_process
+
+async def arrange_blocks(
+    blocks: List[Dict],
+    project_overview: Optional[str] = None,
+    current_status: Optional[str] = None,
+    problems: Optional[str] = None,
+    additional_info: Optional[str] = None,
+    block_index: Optional[BlockTextIndex] = None
+) -> List[Dict]:
+    """
+    AI를 사용하여 블록들을 적절한 레벨에 배치
+    
+    Args:
+        blocks: 배치할 블록 리스트 (각 블록은 id, title, description, category 포함)
+        project_overview: 프로젝트 개요 (선택사항)
+        current_status: 현재 진행 상황 (선택사항)
+        problems: 문제점/병목지점 (선택사항)
+        additional_info: 기타 참고 사항 (선택사항)
+        block_index: 프로젝트 블록 텍스트 색인 (선택사항, 블록이 많으면 분할 배치 계획에 카테고리별 요약 사용)
+    
+    Returns:
+        레벨이 배정된 블록 리스트 (각 블록에 level 필드 추가)
+    """
+    try:
+        
+        # 블록 정보를 문자열로 변환 (ID를 명확히 포함)
+        # 같은 블록 집합이면 같은 프롬프트가 되도록 ID 순으로 정렬 (캐시 적중률 향상)
+        # 프롬프트에는 UUID 대신 짧은 별칭을 쓰고, 설명은 토큰 예산에 맞게 축약
+        aliases = BlockAliases(block.get('id', '') for block in blocks)
+        prompt_blocks = compact_blocks(sorted(blocks, key=lambda b: b.get('id', '')), aliases)
+        blocks_info = [_format_arrange_block(block) for block in prompt_blocks]
+        blocks_text = "\n".join(blocks_info)
+        
+        # 디버깅: 블록 ID 목록 출력
+        block_ids = [block.get('id', '') for block in blocks]
+        print(f"🔍 배치할 블록 ID 목록: {block_ids}")
+        
+        # 프로젝트 정보 구성 (project_overview가 project_analysis인 경우와 일반 프로젝트 정보인 경우 구분)
+        project_context = ""
+        if project_overview:
+            # project_overview가 project_analysis인 경우 (generate_blocks에서 생성된 것)
+            # project_analysis는 보통 "핵심 목표", "가치", "시급한 영역" 등의 키워드를 포함
+            if len(project_overview) > 200 or "핵심 목표" in project_overview or "가치" in project_overview or "시급한 영역" in project_overview:
+                project_context = "\n\n## 프로젝트 분석 (AI 생성)\n"
+                project_context += f"{project_overview}\n"
+                project_context += "\n위 프로젝트 분석을 바탕으로 블록 배치를 진행하세요."
             else:
-                # thinking_process가 없으면 기존 방식으로 reasoning 생성
-                reasoning = response_data.get("reasoning", "")
-                if not reasoning:
-                    reasons = []
-                    for item in arranged_data:
-                        if item.get("reason"):
-                            block_id = item.get("id", "")
-                            block_title = next((b.get("title", "") for b in blocks if b.get("id") == block_id), "")
-                            reasons.append(f"- {block_title} (레벨 {item.get('level', 0)}): {item.get('reason')}")
-                    reasoning = "\n\n".join(reasons) if reasons else ""
+                # 일반 프로젝트 정보인 경우
+                project_context = "\n\n## 프로젝트 정보\n"
+                project_context += f"프로젝트 개요:\n{project_overview}\n\n"
+                if current_status:
+                    project_context += f"현재 진행 상황:\n{current_status}\n\n"
+                if problems:
+                    project_context += f"문제점/병목지점:\n{problems}\n\n"
+                if additional_info:
+                    project_context += f"기타 참고 사항:\n{additional_info}\n"
+                project_context += "\n위 프로젝트 정보를 참고하여 블록 배치를 진행하세요."
+        elif current_status or problems or additional_info:
+            # project_overview는 없지만 다른 정보는 있는 경우
+            project_context = "\n\n## 프로젝트 정보\n"
+            if current_status:
+                project_context += f"현재 진행 상황:\n{current_status}\n\n"
+            if problems:
+                project_context += f"문제점/병목지점:\n{problems}\n\n"
+            if additional_info:
+                project_context += f"기타 참고 사항:\n{additional_info}\n"
+            project_context += "\n위 프로젝트 정보를 참고하여 블록 배치를 진행하세요."
+        
+        # 블록이 많아 한 번의 프롬프트/응답에 담기 어려우면 나눠서 병렬로 배치
+        chunks = _plan_arrange_chunks(prompt_blocks)
+        if len(chunks) > 1:
+            # 블록이 너무 많으면 배치 계획에는 제목 전체 대신 카테고리별 요약만 보냄
+            category_summary = None
+            if block_index is not None and len(blocks) > retrieval_max_blocks():
+                by_category: Dict[str, List[Dict]] = {}
+                for block in sorted(blocks, key=lambda b: b.get('category') or ''):
+                    by_category.setdefault(block.get('category') or '(카테고리 없음)', []).append(block)
+                category_summary = summarize_groups(block_index, by_category, representatives=5)
+            arranged_data, thinking_process = await _arrange_blocks_chunked(
+                chunks, prompt_blocks, project_context, category_summary
+            )
+        else:
+            arranged_data, thinking_process = await _arrange_blocks_single(blocks_text, project_context)
+        titles_by_id = {b.get("id"): b.get("title", "") for b in blocks}
+        
+        # 별칭을 원래 블록 ID로, 응답 문장 속 별칭은 블록 제목으로 되돌림
+        arranged_data = [
+            item.model_copy(update={
+                "id": aliases.resolve(item.id),
+                "reason": aliases.restore_text(item.reason, titles_by_id),
+            })
+            for item in arranged_data
+        ]
+        if thinking_process:
+            thinking_process = ArrangeThinkingProcess.model_validate(
+                aliases.restore_data(thinking_process.model_dump(), titles_by_id)
+            )
+        
+        # 각 블록의 배치 이유
+        block_reasons = [
+            f"- {titles_by_id.get(item.id, '')} (레벨 {item.level}): {item.reason}"
+            for item in arranged_data
+            if item.reason
+        ]
+        
+        # thinking_process가 있으면 이를 기반으로 reasoning 생성
+        if thinking_process:
+            reasoning_parts = []
+            
+            # 레벨 4 분석
+            if thinking_process.level4_analysis:
+                reasoning_parts.append(f"## 레벨 4 (목표) 분석\n{thinking_process.level4_analysis}")
+            
+            # 레벨별 목표
+            level_goals = thinking_process.level_goals
+            if level_goals:
+                reasoning_parts.append("\n## 레벨별 목표")
+                for level in ["level0", "level1", "level2", "level3", "level4"]:
+                    if getattr(level_goals, level):
+                        level_name = {"level0": "레벨 0 (기반)", "level1": "레벨 1", "level2": "레벨 2", 
+                                    "level3": "레벨 3", "level4": "레벨 4 (목표)"}.get(level, level)
+                        reasoning_parts.append(f"- {level_name}: {getattr(level_goals, level)}")
+            
+            # 의존성 분석
+            if thinking_process.dependency_analysis:
+                reasoning_parts.append(f"\n## 의존성 및 우선순위 분석\n{thinking_process.dependency_analysis}")
+            
+            # 설계자 조언
+            if thinking_process.designer_advice:
+                reasoning_parts.append(f"\n## 서비스 설계자 관점의 조언\n{thinking_process.designer_advice}")
+            
+            # 최종 결정
+            if thinking_process.final_decision:
+                reasoning_parts.append(f"\n## 최종 배치 결정\n{thinking_process.final_decision}")
+            
+            # 각 블록의 배치 이유 추가
+            if block_reasons:
+                reasoning_parts.append("\n## 블록별 배치 이유")
+                reasoning_parts.extend(block_reasons)
             
-            print(f"🔍 thinking_process 포함 여부: {thinking_process is not None}")
-            if reasoning:
-                print(f"🔍 reasoning 길이: {len(reasoning)} 문자")
-                print(f"🔍 reasoning 일부: {reasoning[:300]}")
+            reasoning = "\n\n".join(reasoning_parts)
         else:
-            raise ValueError("예상치 못한 응답 형식입니다.")
+            # thinking_process가 없으면 블록별 배치 이유만으로 reasoning 생성
+            reasoning = "\n\n".join(block_reasons)
+        
+        print(f"🔍 thinking_process 포함 여부: {thinking_process is not None}")
+        if reasoning:
+            print(f"🔍 reasoning 길이: {len(reasoning)} 문자")
+            print(f"🔍 reasoning 일부: {reasoning[:300]}")
         
         # 블록 ID를 키로 하는 딕셔너리 생성
         level_map = {}
         for item in arranged_data:
-            block_id = item.get("id")
-            level = item.get("level", 0)
+            block_id = item.id
             # level이 0-4 범위를 벗어나면 조정
-            try:
-                level = max(0, min(4, int(level)))
-            except (ValueError, TypeError):
-                print(f"⚠️  레벨 변환 실패: {level}, 기본값 0 사용")
-                level = 0
+            level = max(0, min(4, item.level))
             level_map[block_id] = level
             print(f"  블록 ID: {block_id} -> 레벨: {level}")
         
@@ -714,91 +905,146 @@ def arrange_blocks(
         return result
         
     except ValueError as e:
-        # _parse_ai_response에서 발생한 ValueError를 그대로 전달
+        # 응답 변환(_generate_structured)에서 발생한 ValueError를 그대로 전달
         raise
     except Exception as e:
         print(f"❌ AI 블록 배치 실패: {e}")
         raise
 
-def generate_feedback(
+def _format_structure_metrics(metrics: Dict, block_ids: set, label, top: int = 5) -> str:
+    """
+    구조 지표(analysis.centrality) 중 배치된 블록의 상위 항목을 프롬프트용 목록으로 정리
+
+    Args:
+        metrics: centrality 결과
+        block_ids: 포함할 블록 ID (배치된 블록)
+        label: 블록 ID -> 프롬프트 표시 이름 (별칭 또는 제목)
+    """
+    placed = {"blocks": {block_id: stats for block_id, stats in metrics["blocks"].items() if block_id in block_ids}}
+
+    def listing(metric: str, fmt, ascending: bool = False, where=None) -> str:
+        entries = top_blocks(placed, metric, top, ascending, where)
+        return ", ".join(f"{label(entry['id'])} ({fmt(entry[metric])})" for entry in entries) or "없음"
+
+    approximate = "" if metrics.get("betweenness_exact", True) else f" (블록 {metrics['samples']}개 기준 추정)"
+    return "\n".join([
+        f"- 병목 블록 (다른 블록 사이 의존성 경로가 가장 많이 지나는 블록, 매개 중심성{approximate}): "
+        f"{listing('betweenness', lambda value: f'{value:.3f}')}",
+        f"- 기반 블록 (전이적으로 가장 많은 블록이 기대는 블록, PageRank): {listing('pagerank', lambda value: f'{value:.3f}', where=lambda stats: stats['fan_out'] > 0)}",
+        f"- 직접 후행 블록이 많은 블록: {listing('fan_out', lambda value: f'후행 {value}개')}",
+        f"- 직접 선행 블록이 많은 블록: {listing('fan_in', lambda value: f'선행 {value}개')}",
+        f"- 선행 블록보다 낮거나 같은 레벨에 있는 의존성: {metrics.get('level_violations', 0)}개, "
+        f"해당 블록: {listing('level_skew', lambda value: f'{value:+d}', ascending=True, where=lambda stats: stats['level_skew'] < 0)}",
+    ])
+
+async def _generate_full_feedback(
+    arranged_blocks: List[Dict],
     blocks: List[Dict],
-    project_analysis: Optional[str] = None
-) -> Dict[str, str]:
+    project_analysis: Optional[str],
+    structure_metrics: Optional[Dict] = None,
+    focus: Optional[str] = None,
+    block_index: Optional[BlockTextIndex] = None
+) -> FeedbackResponse:
     """
-    AI를 사용하여 현재 블록 배치에 대한 피드백 생성
+    배치된 블록 전체를 보내 처음부터 분석하는 피드백
+
+    블록이 AI_RETRIEVAL_MAX_BLOCKS개보다 많고 색인(block_index)이 있으면 초점(없으면 프로젝트 분석)과 관련된 블록,
+    구조상 중요한 블록, 레벨별 대표 블록만 목록에 넣고 나머지는 레벨별 요약으로 대신합니다.
+    """
+    # 프롬프트에는 UUID 대신 짧은 별칭을 쓰고, 설명은 토큰 예산에 맞게 축약
+    aliases = BlockAliases(block.get('id', '') for block in blocks)
+    titles_by_id = {block.get('id'): block.get('title', '') for block in blocks}
     
-    현재 배치된 블록들을 분석하여 배치 의도, 목적, 개선점, 보완점을 제공합니다.
-    블록을 변경하지 않고 분석만 수행합니다.
+    prompt_blocks = arranged_blocks
+    level_summary_text = ""
+    max_blocks = retrieval_max_blocks()
+    if block_index is not None and len(arranged_blocks) > max_blocks:
+        pinned = [
+            entry['id'] for metric in ('betweenness', 'pagerank')
+            for entry in (top_blocks(structure_metrics, metric, 5) if structure_metrics else [])
+        ]
+        prompt_blocks = select_prompt_blocks(
+            block_index, arranged_blocks, max_blocks, query=focus or project_analysis, pinned=pinned
+        )
+        by_level: Dict[str, List[Dict]] = {}
+        for block in sorted(arranged_blocks, key=lambda b: b.get('level', 0)):
+            by_level.setdefault(f"레벨 {block.get('level', 0)}", []).append(block)
+        level_summary_text = "\n\n## 레벨별 요약 (배치된 블록 전체)\n" + summarize_groups(block_index, by_level)
+        print(f"🔎 피드백 프롬프트: 배치된 블록 {len(arranged_blocks)}개 중 {len(prompt_blocks)}개 포함")
+    shown_aliases = {aliases.alias(block.get('id', '')) for block in prompt_blocks}
     
-    Args:
-        blocks: 현재 배치된 블록 리스트 (각 블록은 id, title, description, level, order, category, dependencies 포함)
-        project_analysis: 저장된 프로젝트 분석 (선택사항)
+    # 레벨별로 블록 그룹화
+    blocks_by_level = {}
+    for block in compact_blocks(prompt_blocks, aliases):
+        level = block.get('level', 0)
+        if level not in blocks_by_level:
+            blocks_by_level[level] = []
+        blocks_by_level[level].append(block)
     
-    Returns:
-        {
-            "feedback": "전체 피드백 텍스트",
-            "thinking_process": {...}  # 구조화된 분석 결과
-        }
-    """
-    try:
-        model = GenerativeModel("gemini-2.0-flash-exp")
-        
-        # 배치된 블록들만 필터링 (레벨 0 이상)
-        arranged_blocks = [block for block in blocks if block.get('level', -1) >= 0]
-        
-        if not arranged_blocks:
-            return {
-                "feedback": "배치된 블록이 없습니다. 블록을 배치한 후 피드백을 받을 수 있습니다.",
-                "thinking_process": {}
-            }
-        
-        # 레벨별로 블록 그룹화
-        blocks_by_level = {}
-        for block in arranged_blocks:
-            level = block.get('level', 0)
-            if level not in blocks_by_level:
-                blocks_by_level[level] = []
-            blocks_by_level[level].append(block)
-        
-        # 블록 정보를 문자열로 변환
-        blocks_info = []
-        for level in sorted(blocks_by_level.keys()):
-            level_blocks = blocks_by_level[level]
-            blocks_info.append(f"\n## 레벨 {level} ({len(level_blocks)}개 블록)")
-            for block in level_blocks:
-                block_str = f"  - 블록 ID: {block.get('id', '')}\n"
-                block_str += f"    제목: {block.get('title', '')}\n"
-                if block.get('description'):
-                    block_str += f"    설명: {block.get('description', '')}\n"
-                if block.get('category'):
-                    block_str += f"    카테고리: {block.get('category')}\n"
-                if block.get('dependencies'):
-                    deps = block.get('dependencies', [])
-                    block_str += f"    의존성: {', '.join(deps)}\n"
-                blocks_info.append(block_str)
-        
-        blocks_text = "\n".join(blocks_info)
-        
-        # 레벨 분포 요약
-        level_distribution = {}
-        for block in arranged_blocks:
-            level = block.get('level', 0)
-            level_distribution[level] = level_distribution.get(level, 0) + 1
-        
-        distribution_summary = ", ".join([f"레벨 {k}: {v}개" for k, v in sorted(level_distribution.items())])
-        
-        # 프로젝트 분석 컨텍스트
-        project_context = ""
-        if project_analysis:
-            project_context = f"\n\n## 프로젝트 분석 (AI 생성)\n{project_analysis}\n\n위 프로젝트 분석을 참고하여 피드백을 제공하세요."
-        
-        # 빈 레벨 확인 (실제로 사용 가능한 레벨 0-4 중 블록이 없는 레벨만 표시)
-        available_levels = set(range(5))  # 0-4 레벨
-        used_levels = set(blocks_by_level.keys())
-        empty_levels = sorted(available_levels - used_levels)
-        empty_levels_text = f"\n빈 레벨: {', '.join(map(str, empty_levels))}" if empty_levels else "\n모든 레벨(0-4)에 블록이 배치되어 있습니다."
-        
-        prompt = f"""당신은 프로젝트 오너이자 제품 설계자입니다. 현재 배치된 블록들을 체계적으로 분석하여 피드백을 제공해주세요.
+    # 블록 정보를 문자열로 변환
+    blocks_info = []
+    for level in sorted(blocks_by_level.keys()):
+        level_blocks = blocks_by_level[level]
+        blocks_info.append(f"\n## 레벨 {level} ({len(level_blocks)}개 블록)")
+        for block in level_blocks:
+            block_str = f"  - 블록 ID: {block.get('id', '')}\n"
+            block_str += f"    제목: {block.get('title', '')}\n"
+            if block.get('description'):
+                block_str += f"    설명: {block.get('description', '')}\n"
+            if block.get('category'):
+                block_str += f"    카테고리: {block.get('category')}\n"
+            if block.get('dependencies'):
+                deps = block.get('dependencies', [])
+                if level_summary_text:
+                    # 목록에 없는 블록의 별칭은 모델이 알 수 없으므로 개수만 표시
+                    hidden = len([dep for dep in deps if dep not in shown_aliases])
+                    deps = [dep for dep in deps if dep in shown_aliases] + ([f"목록 밖 블록 {hidden}개"] if hidden else [])
+                block_str += f"    의존성: {', '.join(deps)}\n"
+            blocks_info.append(block_str)
+    
+    blocks_text = "\n".join(blocks_info)
+    
+    # 레벨 분포 요약
+    level_distribution = {}
+    for block in arranged_blocks:
+        level = block.get('level', 0)
+        level_distribution[level] = level_distribution.get(level, 0) + 1
+    
+    distribution_summary = ", ".join([f"레벨 {k}: {v}개" for k, v in sorted(level_distribution.items())])
+    
+    # 프로젝트 분석 컨텍스트
+    project_context = ""
+    if project_analysis:
+        project_context = f"\n\n## 프로젝트 분석 (AI 생성)\n{project_analysis}\n\n위 프로젝트 분석을 참고하여 피드백을 제공하세요."
+    
+    # 빈 레벨 확인 (실제로 사용 가능한 레벨 0-4 중 블록이 없는 레벨만 표시)
+    available_levels = set(range(5))  # 0-4 레벨
+    used_levels = set(level_distribution.keys())
+    empty_levels = sorted(available_levels - used_levels)
+    empty_levels_text = f"\n빈 레벨: {', '.join(map(str, empty_levels))}" if empty_levels else "\n모든 레벨(0-4)에 블록이 배치되어 있습니다."
+    
+    # 의존성 그래프에서 미리 계산한 구조 지표 (모델이 블록 목록에서 구조를 추론하지 않아도 되도록)
+    structure_text = ""
+    if structure_metrics:
+        arranged_ids = {block.get('id') for block in arranged_blocks}
+        structure_text = (
+            "\n\n## 구조 지표 (의존성 그래프에서 자동 계산)\n"
+            + _format_structure_metrics(structure_metrics, arranged_ids, aliases.alias)
+            + "\n\n위 수치는 블록 목록의 의존성으로 계산한 값이므로 구조를 다시 추론하지 말고 의존성 평가에 그대로 활용하세요."
+        )
+    
+    if focus:
+        project_context += f"\n\n## 피드백 초점\n{focus}\n\n위 영역을 중심으로 분석하되, 보드 전체 흐름과의 관계도 함께 평가하세요."
+    if level_summary_text:
+        blocks_notice = (
+            f"**중요**: 블록이 많아 아래 목록에는 배치된 블록 {len(arranged_blocks)}개 중 {len(prompt_blocks)}개"
+            "(초점과 관련된 블록, 구조상 중요한 블록, 레벨별 대표 블록)만 포함되어 있습니다. "
+            "나머지 블록은 레벨별 요약과 레벨 분포를 참고하세요."
+        )
+    else:
+        blocks_notice = "**중요**: 아래 블록 목록에 실제로 배치된 모든 블록이 포함되어 있습니다. 레벨 분포와 블록 목록을 정확히 확인한 후 피드백을 제공하세요."
+    
+    prompt = f"""당신은 프로젝트 오너이자 제품 설계자입니다. 현재 배치된 블록들을 체계적으로 분석하여 피드백을 제공해주세요.
 
 {project_context}
 
@@ -807,10 +1053,10 @@ def generate_feedback(
 레벨 분포: {distribution_summary}
 {empty_levels_text}
 
-**중요**: 아래 블록 목록에 실제로 배치된 모든 블록이 포함되어 있습니다. 레벨 분포와 블록 목록을 정확히 확인한 후 피드백을 제공하세요.
+{blocks_notice}
 
 블록 목록:
-{blocks_text}
+{blocks_text}{level_summary_text}{structure_text}
 
 레벨 배치 기준:
 - 레벨 0 (기반): 가장 먼저 구축해야 할 기반 인프라, 기본 설정, 필수 전제 조건
@@ -866,65 +1112,237 @@ def generate_feedback(
 - 긍정적인 부분도 언급하면서, 개선할 부분을 건설적으로 제시하세요.
 - feedback은 thinking_process의 내용을 요약하되, 사용자에게 보여질 최종 피드백 형식으로 작성하세요."""
 
-        response = model.generate_content(prompt)
+    # 모델 호출 및 응답 변환 (동일 입력이면 캐시 사용)
+    response = await _generate_structured("generate_feedback", prompt, FeedbackResponse)
+    # 응답 문장 속 블록 별칭은 블록 제목으로 되돌림
+    return FeedbackResponse.model_validate(aliases.restore_data(response.model_dump(), titles_by_id))
+
+def _format_board_diff(diff: Dict[str, list], snapshot: Dict[str, Dict], previous: Dict[str, Dict]) -> str:
+    """변경 사항을 블록 제목으로 표시한 목록"""
+    def title(block_id: str) -> str:
+        entry = snapshot.get(block_id) or previous.get(block_id)
+        return f"'{entry['title']}'" if entry else block_id
+
+    lines = []
+    for block_id in diff["added"]:
+        entry = snapshot[block_id]
+        line = f"- 추가: {title(block_id)} (레벨 {entry['level']})"
+        if entry["deps"]:
+            line += f", 선행 블록: {', '.join(title(dep_id) for dep_id in entry['deps'])}"
+        lines.append(line)
+    for block_id in diff["removed"]:
+        lines.append(f"- 제거: {title(block_id)} (이전 레벨 {previous[block_id]['level']})")
+    for block_id, old_level, new_level in diff["moved"]:
+        lines.append(f"- 이동: {title(block_id)} 레벨 {old_level} -> {new_level}")
+    for block_id, old_title in diff["renamed"]:
+        lines.append(f"- 제목 변경: '{old_title}' -> {title(block_id)}")
+    for dep_id, block_id in diff["edges_added"]:
+        lines.append(f"- 의존성 추가: {title(block_id)}이(가) {title(dep_id)}에 의존")
+    for dep_id, block_id in diff["edges_removed"]:
+        lines.append(f"- 의존성 제거: {title(block_id)}이(가) 더 이상 {title(dep_id)}에 의존하지 않음")
+    return "\n".join(lines)
+
+async def _generate_incremental_feedback(
+    previous_state: Dict,
+    diff: Dict[str, list],
+    snapshot: Dict[str, Dict],
+    structure_metrics: Optional[Dict] = None,
+    focus: Optional[str] = None
+) -> FeedbackResponse:
+    """이전 피드백 + 변경 사항만 보내 피드백 갱신"""
+    previous_feedback = truncate_to_tokens(
+        previous_state.get("feedback", ""), int(os.getenv("AI_FEEDBACK_PREVIOUS_TOKENS", "2000"))
+    )
+    diff_text = _format_board_diff(diff, snapshot, previous_state.get("blocks", {}))
+
+    level_distribution = {}
+    for entry in snapshot.values():
+        level_distribution[entry["level"]] = level_distribution.get(entry["level"], 0) + 1
+    distribution_summary = ", ".join([f"레벨 {k}: {v}개" for k, v in sorted(level_distribution.items())])
+
+    structure_text = ""
+    if structure_metrics:
+        structure_text = "\n\n구조 지표 (변경 후 의존성 그래프에서 자동 계산):\n" + _format_structure_metrics(
+            structure_metrics, set(snapshot), lambda block_id: f"'{snapshot[block_id]['title']}'"
+        )
+    focus_text = f"\n\n## 피드백 초점\n{focus}" if focus else ""
+
+    prompt = f"""당신은 프로젝트 오너이자 제품 설계자입니다. 이전에 작성한 피드백 이후 사용자가 블록 배치를 일부 변경했습니다. 변경 사항을 반영하여 피드백을 갱신해주세요.
+
+## 이전 피드백
+{previous_feedback}{focus_text}
+
+## 변경 사항
+{diff_text}
+
+## 현재 블록 배치 상태
+블록 {len(snapshot)}개, 레벨 분포: {distribution_summary}{structure_text}
+
+레벨 구조는 기반(0) → 1 → 2 → 3 → 목표(4) 순서로 구성되며, 블록은 선행 블록보다 높은 레벨에 있어야 합니다.
+
+## 피드백 분석 사고 과정 (thinking_process)
+
+1. **프로젝트 분석**: 변경 사항으로 각 레벨의 목적이나 프로젝트의 핵심 과제, 논리적 흐름이 달라졌는가?
+2. **블록 배치 및 의존성 평가**: 변경된 블록의 레벨이 적절한가? 의존성 관계가 올바르게 반영되어 있는가?
+3. **보완점 제안**: 이전 피드백의 보완점 중 해결된 것과 여전히 남아 있는 것, 변경으로 새로 생긴 보완점은?
+4. **사용자를 위한 조언**: 변경 사항을 고려하여 이전 조언 중 갱신할 부분은?
+
+## 응답 형식
+
+다음 JSON 형식으로 응답해주세요:
+
+{{
+  "thinking_process": {{
+    "project_analysis": "프로젝트 분석 (변경 사항 반영)",
+    "arrangement_and_dependency_evaluation": "배치 및 의존성 평가 (변경된 블록 중심)",
+    "complementary_suggestions": "보완점 제안 (해결된 점, 남은 점, 새로 생긴 점)",
+    "user_advice": "사용자를 위한 조언"
+  }},
+  "feedback": "갱신된 전체 피드백 (마크다운 형식, 사용자에게 보여질 최종 피드백)"
+}}
+
+중요 사항:
+- feedback은 이전 피드백과 같은 구조(프로젝트 분석 요약, 배치 및 의존성 평가, 보완점, 사용자를 위한 조언)를 유지하세요.
+- 변경되지 않은 부분에 대한 이전 평가는 그대로 유지하고, 변경 사항이 영향을 준 부분만 수정하세요.
+- feedback 앞부분에 이번 변경에 대한 평가를 짧게 포함하세요."""
+
+    return await _generate_structured("generate_feedback_incremental", prompt, FeedbackResponse)
+
+async def generate_feedback(
+    blocks: List[Dict],
+    project_analysis: Optional[str] = None,
+    previous_state: Optional[Dict] = None,
+    structure_metrics: Optional[Dict] = None,
+    focus: Optional[str] = None,
+    block_index: Optional[BlockTextIndex] = None
+) -> Dict:
+    """
+    AI를 사용하여 현재 블록 배치에 대한 피드백 생성
+    
+    현재 배치된 블록들을 분석하여 배치 의도, 목적, 개선점, 보완점을 제공합니다.
+    블록을 변경하지 않고 분석만 수행합니다.
+    
+    이전 피드백 상태(previous_state)가 있으면 그 이후 바뀐 부분만 보내 피드백을 갱신하고,
+    바뀐 블록이 많거나 프로젝트 분석이 달라졌으면 전체를 다시 분석합니다.
+    보드가 전혀 바뀌지 않았으면 모델을 호출하지 않고 이전 피드백을 반환합니다.
+    
+    Args:
+        blocks: 현재 배치된 블록 리스트 (각 블록은 id, title, description, level, order, category, dependencies 포함)
+        project_analysis: 저장된 프로젝트 분석 (선택사항)
+        previous_state: 이전 피드백 결과의 feedback_state (선택사항)
+        structure_metrics: 미리 계산한 구조 지표 (analysis.centrality 결과, 선택사항)
+        focus: 피드백에서 집중할 영역 (선택사항)
+        block_index: 프로젝트 블록 텍스트 색인 (선택사항, 블록이 많으면 관련 블록만 프롬프트에 포함)
+    
+    Returns:
+        {
+            "feedback": "전체 피드백 텍스트",
+            "thinking_process": {...},  # 구조화된 분석 결과
+            "mode": "full" | "incremental" | "unchanged",
+            "feedback_state": {...}  # 다음 요청에 previous_state로 전달할 상태 (storage.save_feedback_state로 저장)
+        }
+    """
+    try:
         
-        # 응답 파싱
-        response_data = _parse_ai_response(response.text)
+        # 배치된 블록들만 필터링 (레벨 0 이상)
+        arranged_blocks = [block for block in blocks if block.get('level', -1) >= 0]
         
-        # 디버깅: 파싱된 데이터 출력
-        print(f"🔍 파싱된 피드백 데이터: {type(response_data)}")
+        if not arranged_blocks:
+            return {
+                "feedback": "배치된 블록이 없습니다. 블록을 배치한 후 피드백을 받을 수 있습니다.",
+                "thinking_process": {}
+            }
+        
+        snapshot = board_snapshot(arranged_blocks)
+        fingerprint = board_fingerprint(snapshot, project_analysis, focus)
+        previous_state = previous_state or {}
+        
+        if previous_state.get("fingerprint") == fingerprint and previous_state.get("feedback"):
+            print("⚡ 보드 변경 없음: 이전 피드백 재사용")
+            return {
+                "feedback": previous_state["feedback"],
+                "thinking_process": previous_state.get("thinking_process") or {},
+                "mode": "unchanged",
+                "feedback_state": previous_state,
+            }
+        
+        # 이전 피드백 이후 바뀐 블록이 적으면 변경 사항만 보내 갱신
+        response = None
+        mode = "full"
+        previous_blocks = previous_state.get("blocks")
+        same_analysis = previous_state.get("analysis_fingerprint") == board_fingerprint({}, project_analysis, focus)
+        if previous_blocks and previous_state.get("feedback") and same_analysis:
+            diff = diff_boards(previous_blocks, snapshot)
+            changed = changed_block_count(diff)
+            max_changes = min(
+                int(os.getenv("AI_FEEDBACK_INCREMENTAL_MAX_CHANGES", "20")),
+                int(max(len(previous_blocks), len(snapshot)) * float(os.getenv("AI_FEEDBACK_INCREMENTAL_MAX_RATIO", "0.3"))),
+            )
+            if 0 < changed <= max_changes:
+                print(f"🔁 증분 피드백: 변경된 블록 {changed}개 (기준 {max_changes}개 이하)")
+                response = await _generate_incremental_feedback(previous_state, diff, snapshot, structure_metrics, focus)
+                mode = "incremental"
+            else:
+                print(f"🔁 변경된 블록 {changed}개: 전체 분석 (기준 {max_changes}개 초과)")
+        
+        if response is None:
+            response = await _generate_full_feedback(
+                arranged_blocks, blocks, project_analysis, structure_metrics, focus, block_index
+            )
+        thinking_process = response.thinking_process
+        feedback = response.feedback
+        
+        # 디버깅: feedback 필드 확인
+        print(f"🔍 feedback 필드 존재 여부: {bool(feedback)}")
+        if feedback:
+            print(f"🔍 feedback 길이: {len(feedback)} 문자")
+            print(f"🔍 feedback 일부 (처음 500자):\n{feedback[:500]}")
         
-        # 응답 형식 확인
-        if isinstance(response_data, dict):
-            thinking_process = response_data.get("thinking_process", {})
-            feedback = response_data.get("feedback", "")
+        if not feedback and thinking_process:
+            # feedback이 없으면 thinking_process를 기반으로 생성
+            print(f"⚠️  feedback 필드가 없어 thinking_process를 기반으로 생성")
+            feedback_parts = []
             
-            # 디버깅: feedback 필드 확인
-            print(f"🔍 feedback 필드 존재 여부: {bool(feedback)}")
-            if feedback:
-                print(f"🔍 feedback 길이: {len(feedback)} 문자")
-                print(f"🔍 feedback 일부 (처음 500자):\n{feedback[:500]}")
+            if thinking_process.project_analysis:
+                feedback_parts.append(f"## 프로젝트 분석\n{thinking_process.project_analysis}")
             
-            if not feedback:
-                # feedback이 없으면 thinking_process를 기반으로 생성
-                print(f"⚠️  feedback 필드가 없어 thinking_process를 기반으로 생성")
-                feedback_parts = []
-                
-                if thinking_process.get("project_analysis"):
-                    feedback_parts.append(f"## 프로젝트 분석\n{thinking_process.get('project_analysis')}")
-                
-                if thinking_process.get("arrangement_and_dependency_evaluation"):
-                    feedback_parts.append(f"\n## 배치 및 의존성 평가\n{thinking_process.get('arrangement_and_dependency_evaluation')}")
-                
-                if thinking_process.get("complementary_suggestions"):
-                    feedback_parts.append(f"\n## 보완점 제안\n{thinking_process.get('complementary_suggestions')}")
-                
-                if thinking_process.get("user_advice"):
-                    feedback_parts.append(f"\n## 사용자를 위한 조언\n{thinking_process.get('user_advice')}")
-                
-                feedback = "\n\n".join(feedback_parts)
-                print(f"✅ thinking_process 기반으로 feedback 생성 완료: {len(feedback)} 문자")
-            else:
-                print(f"✅ AI가 생성한 feedback 사용: {len(feedback)} 문자")
+            if thinking_process.arrangement_and_dependency_evaluation:
+                feedback_parts.append(f"\n## 배치 및 의존성 평가\n{thinking_process.arrangement_and_dependency_evaluation}")
             
-            print(f"✅ AI 피드백 생성 성공: {len(feedback)} 문자")
-            if thinking_process:
-                print(f"✅ thinking_process 포함됨")
+            if thinking_process.complementary_suggestions:
+                feedback_parts.append(f"\n## 보완점 제안\n{thinking_process.complementary_suggestions}")
             
-            return {
+            if thinking_process.user_advice:
+                feedback_parts.append(f"\n## 사용자를 위한 조언\n{thinking_process.user_advice}")
+            
+            feedback = "\n\n".join(feedback_parts)
+            print(f"✅ thinking_process 기반으로 feedback 생성 완료: {len(feedback)} 문자")
+        elif feedback:
+            print(f"✅ AI가 생성한 feedback 사용: {len(feedback)} 문자")
+        
+        if not feedback:
+            feedback = "피드백을 생성할 수 없습니다."
+        
+        print(f"✅ AI 피드백 생성 성공: {len(feedback)} 문자")
+        if thinking_process:
+            print(f"✅ thinking_process 포함됨")
+        
+        thinking_process_data = thinking_process.model_dump() if thinking_process else {}
+        return {
+            "feedback": feedback,
+            "thinking_process": thinking_process_data,
+            "mode": mode,
+            "feedback_state": {
+                "fingerprint": fingerprint,
+                "analysis_fingerprint": board_fingerprint({}, project_analysis, focus),
+                "blocks": snapshot,
                 "feedback": feedback,
-                "thinking_process": thinking_process
-            }
-        else:
-            # 예상치 못한 형식인 경우
-            feedback_text = str(response_data) if response_data else "피드백을 생성할 수 없습니다."
-            return {
-                "feedback": feedback_text,
-                "thinking_process": {}
-            }
+                "thinking_process": thinking_process_data,
+            },
+        }
         
     except ValueError as e:
-        # _parse_ai_response에서 발생한 ValueError를 그대로 전달
+        # 응답 변환(_generate_structured)에서 발생한 ValueError를 그대로 전달
         raise
     except Exception as e:
         print(f"❌ AI 피드백 생성 실패: {e}")
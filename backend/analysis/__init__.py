@@ -0,0 +1,20 @@
+"""
+블록 의존성 그래프 분석 (AI 없이 계산하는 배치/구조 분석)
+"""
+from .cache import AnalysisCache, blocks_fingerprint, get_analysis_cache
+from .graph import DependencyGraph
+from .layering import auto_layer, describe_layering
+from .ordering import layout_fingerprint, reduce_crossings
+from .critical_path import critical_path
+from .centrality import centrality, project_centrality, top_blocks
+from .reachability import ReachabilityIndex, ReachabilityIndexes, get_reachability_indexes
+
+__all__ = [
+    'AnalysisCache', 'blocks_fingerprint', 'get_analysis_cache',
+    'DependencyGraph',
+    'auto_layer', 'describe_layering',
+    'layout_fingerprint', 'reduce_crossings',
+    'critical_path',
+    'centrality', 'project_centrality', 'top_blocks',
+    'ReachabilityIndex', 'ReachabilityIndexes', 'get_reachability_indexes',
+]
@@ -0,0 +1,67 @@
+"""
+분석 결과 캐시
+
+프로젝트와 분석 종류별로 마지막 결과 하나를 입력 해시(보드 버전)와 함께 보관합니다.
+보드가 바뀌면 해시가 달라지므로 따로 무효화하지 않아도 다시 계산됩니다.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def blocks_fingerprint(blocks: List[Dict], fields: Iterable[str]) -> str:
+    """블록 목록에서 fields 값만 모은 해시 (블록 순서와 무관)"""
+    fields = list(fields)
+    payload = sorted(
+        [block['id']] + [
+            sorted(block.get(field) or []) if field == 'dependencies' else block.get(field)
+            for field in fields
+        ]
+        for block in blocks
+        if block.get('id')
+    )
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """(프로젝트, 분석 종류)별 마지막 결과 (입력 해시가 같을 때만 반환)"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, project_id: str, kind: str, fingerprint: str) -> Optional[Dict]:
+        key = (project_id, kind)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != fingerprint:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def set(self, project_id: str, kind: str, fingerprint: str, result: Dict):
+        key = (project_id, kind)
+        with self._lock:
+            self._entries[key] = (fingerprint, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# 전역 캐시 인스턴스 (싱글톤 패턴)
+_analysis_cache_instance: Optional[AnalysisCache] = None
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """분석 결과 캐시 인스턴스 반환"""
+    global _analysis_cache_instance
+
+    if _analysis_cache_instance is None:
+        _analysis_cache_instance = AnalysisCache()
+    return _analysis_cache_instance
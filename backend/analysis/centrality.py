@@ -0,0 +1,182 @@
+"""
+블록 구조 지표 (병목/중심성)
+
+의존성(선행 블록 -> 블록)으로 만든 희소 인접 행렬(SciPy CSR)에서 NumPy 벡터 연산으로 계산합니다.
+- fan_in / fan_out: 직접 선행 블록 수 / 직접 후행 블록 수
+- pagerank: 후행 블록이 선행 블록에 점수를 나눠 주는 PageRank (많은 블록이 기대는 기반 블록일수록 높음)
+- betweenness: 다른 블록 사이의 최단 의존성 경로가 이 블록을 지나는 비율 (높을수록 병목)
+    Brandes 알고리즘을 출발 블록 여러 개씩 묶어 행렬 곱으로 계산하며,
+    블록이 samples개보다 많으면 출발 블록을 samples개만 골라 추정 (고정 시드라 같은 보드면 같은 결과)
+- level_skew: 레벨 - (배치된 선행 블록의 가장 높은 레벨 + 1)
+    음수면 선행 블록보다 낮거나 같은 레벨(의존성 위반), 양수면 필요한 것보다 높이 떠 있음
+NumPy/SciPy는 앱 시작 시간을 늘리지 않도록 계산하는 함수 안에서 가져옵니다 (analysis 패키지를 라우터가 import 함).
+"""
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+from .cache import blocks_fingerprint, get_analysis_cache
+from .graph import DependencyGraph
+
+if TYPE_CHECKING:
+    import numpy as np
+    from scipy import sparse
+
+
+def _adjacency(graph: DependencyGraph, ids: List[str]) -> sparse.csr_matrix:
+    """A[i, j] = 1 이면 i가 j의 선행 블록"""
+    import numpy as np
+    from scipy import sparse
+
+    position = {block_id: index for index, block_id in enumerate(ids)}
+    sources, targets = [], []
+    for block_id in ids:
+        for dep_id in graph.prerequisites[block_id]:
+            sources.append(position[dep_id])
+            targets.append(position[block_id])
+    return sparse.csr_matrix(
+        (np.ones(len(sources)), (np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64))),
+        shape=(len(ids), len(ids)),
+    )
+
+
+def _pagerank(adjacency: sparse.csr_matrix, damping: float = 0.85, tolerance: float = 1e-10, max_iterations: int = 100) -> np.ndarray:
+    """후행 블록 -> 선행 블록 방향의 PageRank (거듭제곱법)"""
+    import numpy as np
+
+    size = adjacency.shape[0]
+    fan_in = np.asarray(adjacency.sum(axis=0)).ravel()
+    dangling = fan_in == 0
+    inverse_fan_in = np.divide(1.0, fan_in, out=np.zeros(size), where=~dangling)
+    rank = np.full(size, 1.0 / size)
+    for _ in range(max_iterations):
+        updated = damping * (adjacency @ (rank * inverse_fan_in))
+        updated += (1 - damping + damping * rank[dangling].sum()) / size
+        if np.abs(updated - rank).sum() < tolerance:
+            return updated
+        rank = updated
+    return rank
+
+
+def _betweenness(adjacency: sparse.csr_matrix, sources: np.ndarray, batch_size: int = 64) -> np.ndarray:
+    """
+    sources에서 출발하는 최단 경로 기준 betweenness 합 (Brandes, 출발 블록 batch_size개씩 열로 묶어 계산)
+
+    열마다: 앞으로 BFS 하면서 최단 경로 수(sigma)와 깊이를 구하고, 깊은 곳부터 의존도(delta)를 거꾸로 누적
+    """
+    import numpy as np
+
+    size = adjacency.shape[0]
+    forward = adjacency.T.tocsr()
+    totals = np.zeros(size)
+    for start in range(0, len(sources), batch_size):
+        batch = sources[start:start + batch_size]
+        columns = np.arange(len(batch))
+        sigma = np.zeros((size, len(batch)))
+        depth = np.full((size, len(batch)), -1, dtype=np.int32)
+        sigma[batch, columns] = 1
+        depth[batch, columns] = 0
+
+        frontier = sigma.copy()
+        level = 0
+        while frontier.any():
+            reached = forward @ frontier
+            reached[depth >= 0] = 0
+            level += 1
+            depth[reached > 0] = level
+            sigma += reached
+            frontier = reached
+
+        delta = np.zeros((size, len(batch)))
+        for current in range(level - 1, 0, -1):
+            below = np.where(depth == current, (1 + delta) / np.where(sigma > 0, sigma, 1), 0)
+            pulled = adjacency @ below
+            delta += np.where(depth == current - 1, sigma * pulled, 0)
+        totals += np.where(depth > 0, delta, 0).sum(axis=1)
+    return totals
+
+
+def centrality(blocks: List[Dict], samples: int = 256) -> Dict:
+    """
+    블록별 구조 지표
+
+    Returns:
+        {
+            "blocks": {블록 ID: {"betweenness", "pagerank", "fan_in", "fan_out", "level_skew"}},
+            "betweenness_exact": 모든 블록에서 출발해 계산했는지 여부, "samples": 출발 블록 수,
+            "edges": 의존성 수, "level_violations": 선행 블록보다 낮거나 같은 레벨에 있는 의존성 수
+        }
+    """
+    import numpy as np
+
+    graph = DependencyGraph(blocks)
+    ids = list(graph.blocks)
+    size = len(ids)
+    if size == 0:
+        return {"blocks": {}, "betweenness_exact": True, "samples": 0, "edges": 0, "level_violations": 0}
+
+    adjacency = _adjacency(graph, ids)
+    fan_out = np.diff(adjacency.indptr)
+    fan_in = np.bincount(adjacency.indices, minlength=size)
+    pagerank = _pagerank(adjacency)
+
+    if size <= samples:
+        sources = np.arange(size)
+    else:
+        sources = np.sort(np.random.default_rng(0).choice(size, samples, replace=False))
+    betweenness = _betweenness(adjacency, sources) * (size / len(sources))
+    if size > 2:
+        betweenness /= (size - 1) * (size - 2)
+
+    levels = {block_id: graph.blocks[block_id].get('level', -1) for block_id in ids}
+    level_violations = 0
+    metrics = {}
+    for index, block_id in enumerate(ids):
+        placed_deps = [levels[dep_id] for dep_id in graph.prerequisites[block_id] if levels[dep_id] >= 0]
+        level_skew = None
+        if levels[block_id] >= 0 and placed_deps:
+            level_skew = levels[block_id] - (max(placed_deps) + 1)
+            level_violations += sum(1 for dep_level in placed_deps if dep_level >= levels[block_id])
+        metrics[block_id] = {
+            "betweenness": round(float(betweenness[index]), 6),
+            "pagerank": round(float(pagerank[index]), 6),
+            "fan_in": int(fan_in[index]),
+            "fan_out": int(fan_out[index]),
+            "level_skew": level_skew,
+        }
+    return {
+        "blocks": metrics,
+        "betweenness_exact": len(sources) == size,
+        "samples": int(len(sources)),
+        "edges": int(adjacency.nnz),
+        "level_violations": level_violations,
+    }
+
+
+def project_centrality(project_id: str, blocks: List[Dict]) -> Tuple[Dict, bool]:
+    """
+    프로젝트 구조 지표 (보드의 레벨/의존성이 그대로면 캐시 사용)
+
+    Returns:
+        (centrality 결과, 캐시 사용 여부)
+    """
+    cache = get_analysis_cache()
+    fingerprint = blocks_fingerprint(blocks, ['level', 'dependencies'])
+    cached = cache.get(project_id, "centrality", fingerprint)
+    if cached is not None:
+        return cached, True
+    result = centrality(blocks, samples=int(os.getenv("ANALYSIS_BETWEENNESS_SAMPLES", "256")))
+    cache.set(project_id, "centrality", fingerprint, result)
+    return result, False
+
+
+def top_blocks(
+    result: Dict, metric: str, top: int = 10, ascending: bool = False, where: Optional[Callable[[Dict], bool]] = None
+) -> List[Dict]:
+    """지표 상위 블록 [{"id", metric}] (값이 없거나 0인 블록, where(지표)가 거짓인 블록 제외, 같으면 ID 순)"""
+    values = [
+        (block_id, stats[metric]) for block_id, stats in result["blocks"].items()
+        if stats[metric] is not None and (ascending or stats[metric] > 0) and (where is None or where(stats))
+    ]
+    values.sort(key=lambda item: (item[1] if ascending else -item[1], item[0]))
+    return [{"id": block_id, metric: value} for block_id, value in values[:top]]
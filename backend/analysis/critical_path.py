@@ -0,0 +1,106 @@
+"""
+의존성 그래프의 임계 경로 (가장 긴 의존성 사슬, 여유 없는 블록)
+
+블록마다 가중치(기본 1, weight_field를 지정하면 블록의 그 숫자 필드)를 두고
+위상 정렬 순서로 한 번, 역순으로 한 번 훑어 O(V+E)에 계산합니다.
+- earliest_finish: 선행 사슬 전체를 마쳤을 때의 누적 가중치 (선행 블록 중 가장 큰 값 + 자기 가중치)
+- 목표 블록: 레벨 4 블록 (없으면 후행 블록이 없는 블록)
+- latest_finish: 가장 긴 목표 사슬(전체 길이)을 늦추지 않고 끝낼 수 있는 가장 늦은 누적 가중치
+- slack = latest_finish - earliest_finish (0이면 임계 블록, 목표에 닿지 않는 블록은 None)
+누적 값은 소수점 9자리로 반올림합니다 (0.1 + 0.2 같은 소수 가중치의 부동소수점 오차로
+임계 블록의 slack이 0이 아니게 되거나 길이가 같은 사슬의 순서가 바뀌지 않도록).
+"""
+from typing import Dict, List, Optional
+from .graph import DependencyGraph
+
+GOAL_LEVEL = 4
+_PRECISION = 9
+
+
+def block_weight(block: Dict, weight_field: Optional[str]) -> float:
+    """블록 가중치 (필드가 없거나 숫자가 아니거나 음수면 1)"""
+    if not weight_field:
+        return 1
+    value = block.get(weight_field)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        return 1
+    return value
+
+
+def critical_path(blocks: List[Dict], weight_field: Optional[str] = None) -> Dict:
+    """
+    임계 경로 분석
+
+    Returns:
+        {
+            "length": 가장 긴 목표 사슬의 누적 가중치,
+            "critical_path": [블록 ID] (선행 -> 목표 순),
+            "goals": [{"id", "length", "path"}] 목표 블록별 가장 긴 사슬 (길이 내림차순),
+            "zero_slack": [블록 ID] 여유 없는 블록 (위상 정렬 순),
+            "blocks": {블록 ID: {"weight", "earliest_finish", "latest_finish", "slack"}},
+            "cycle_edges": [(선행 블록 ID, 블록 ID)] 순환을 끊기 위해 무시한 의존성
+        }
+    """
+    graph = DependencyGraph(blocks)
+    order, broken = graph.topological_order()
+    prerequisites = graph.acyclic_prerequisites()
+    dependents = graph.acyclic_dependents()
+    weights = {block_id: block_weight(graph.blocks[block_id], weight_field) for block_id in order}
+
+    # 앞으로: 가장 긴 선행 사슬 (같으면 ID가 작은 선행 블록을 경로로 사용)
+    earliest: Dict[str, float] = {}
+    previous: Dict[str, Optional[str]] = {}
+    for block_id in order:
+        best_dep = None
+        for dep_id in prerequisites[block_id]:
+            if best_dep is None or (earliest[dep_id], best_dep) > (earliest[best_dep], dep_id):
+                best_dep = dep_id
+        previous[block_id] = best_dep
+        earliest[block_id] = round(weights[block_id] + (earliest[best_dep] if best_dep is not None else 0), _PRECISION)
+
+    goals = [block_id for block_id in order if graph.blocks[block_id].get('level') == GOAL_LEVEL]
+    if not goals:
+        goals = [block_id for block_id in order if not dependents[block_id]]
+    goal_set = set(goals)
+    length = max((earliest[goal] for goal in goals), default=0)
+
+    # 뒤로: 목표에 닿는 블록만 latest_finish 계산
+    latest: Dict[str, float] = {}
+    for block_id in reversed(order):
+        bounds = [
+            round(latest[dependent] - weights[dependent], _PRECISION)
+            for dependent in dependents[block_id] if dependent in latest
+        ]
+        if block_id in goal_set:
+            bounds.append(length)
+        if bounds:
+            latest[block_id] = min(bounds)
+
+    def path_to(block_id: str) -> List[str]:
+        path = []
+        while block_id is not None:
+            path.append(block_id)
+            block_id = previous[block_id]
+        return path[::-1]
+
+    goal_chains = sorted(
+        ({"id": goal, "length": earliest[goal], "path": path_to(goal)} for goal in goals),
+        key=lambda chain: (-chain["length"], chain["id"]),
+    )
+    block_stats = {}
+    for block_id in order:
+        slack = round(latest[block_id] - earliest[block_id], _PRECISION) if block_id in latest else None
+        block_stats[block_id] = {
+            "weight": weights[block_id],
+            "earliest_finish": earliest[block_id],
+            "latest_finish": latest.get(block_id),
+            "slack": slack,
+        }
+    return {
+        "length": length,
+        "critical_path": goal_chains[0]["path"] if goal_chains else [],
+        "goals": goal_chains,
+        "zero_slack": [block_id for block_id in order if block_stats[block_id]["slack"] == 0],
+        "blocks": block_stats,
+        "cycle_edges": sorted(broken),
+    }
@@ -0,0 +1,94 @@
+"""
+블록 의존성 그래프
+
+블록의 dependencies(선행 블록 ID 목록)로 만든 방향 그래프입니다. (선행 블록 -> 블록)
+- 대상 블록 집합 밖을 가리키는 의존성은 external로 따로 보관 (배치 시 고정된 기준으로 사용)
+- 사용자가 순환 의존성을 만들 수 있으므로, 위상 정렬은 순환을 끊을 간선을 골라 함께 반환
+"""
+import heapq
+from typing import Dict, List, Optional, Set, Tuple
+
+Edge = Tuple[str, str]  # (선행 블록 ID, 블록 ID)
+
+
+class DependencyGraph:
+    """블록 집합의 의존성 그래프 (같은 입력이면 항상 같은 순서를 내도록 ID 순으로 처리)"""
+
+    def __init__(self, blocks: List[Dict]):
+        self.blocks: Dict[str, Dict] = {block['id']: block for block in blocks if block.get('id')}
+        self.prerequisites: Dict[str, List[str]] = {}
+        self.external: Dict[str, List[str]] = {}
+        self.dependents: Dict[str, List[str]] = {block_id: [] for block_id in self.blocks}
+        for block_id in sorted(self.blocks):
+            deps = list(dict.fromkeys(self.blocks[block_id].get('dependencies') or []))
+            self.prerequisites[block_id] = [dep_id for dep_id in deps if dep_id in self.blocks and dep_id != block_id]
+            self.external[block_id] = [dep_id for dep_id in deps if dep_id not in self.blocks]
+            for dep_id in self.prerequisites[block_id]:
+                self.dependents[dep_id].append(block_id)
+        self._order: Optional[List[str]] = None
+        self._broken: Set[Edge] = set()
+        self._acyclic_prerequisites: Dict[str, List[str]] = {}
+        self._acyclic_dependents: Dict[str, List[str]] = {}
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(deps) for deps in self.prerequisites.values())
+
+    def topological_order(self) -> Tuple[List[str], Set[Edge]]:
+        """
+        선행 블록이 먼저 오는 순서와, 순환을 끊기 위해 무시한 간선
+
+        준비된 블록이 없는데 남은 블록이 있으면(순환), 남은 선행 블록이 가장 적은 블록(같으면 ID 순)의
+        남은 의존성을 무시하고 계속합니다.
+        """
+        if self._order is not None:
+            return self._order, self._broken
+
+        remaining = {block_id: len(deps) for block_id, deps in self.prerequisites.items()}
+        ready = [block_id for block_id, count in remaining.items() if count == 0]
+        heapq.heapify(ready)
+        done: Set[str] = set()
+        order: List[str] = []
+        broken: Set[Edge] = set()
+
+        while len(order) < len(self.blocks):
+            if not ready:
+                block_id = min((count, block_id) for block_id, count in remaining.items() if block_id not in done)[1]
+                for dep_id in self.prerequisites[block_id]:
+                    if dep_id not in done:
+                        broken.add((dep_id, block_id))
+                remaining[block_id] = 0
+                heapq.heappush(ready, block_id)
+            block_id = heapq.heappop(ready)
+            done.add(block_id)
+            order.append(block_id)
+            for dependent in self.dependents[block_id]:
+                if (block_id, dependent) in broken:
+                    continue
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    heapq.heappush(ready, dependent)
+
+        self._order, self._broken = order, broken
+        if broken:
+            self._acyclic_prerequisites = {
+                block_id: [dep_id for dep_id in deps if (dep_id, block_id) not in broken]
+                for block_id, deps in self.prerequisites.items()
+            }
+            self._acyclic_dependents = {
+                block_id: [dependent for dependent in dependents if (block_id, dependent) not in broken]
+                for block_id, dependents in self.dependents.items()
+            }
+        else:
+            self._acyclic_prerequisites, self._acyclic_dependents = self.prerequisites, self.dependents
+        return order, broken
+
+    def acyclic_prerequisites(self) -> Dict[str, List[str]]:
+        """순환을 끊은 뒤의 {블록 ID: 선행 블록}"""
+        self.topological_order()
+        return self._acyclic_prerequisites
+
+    def acyclic_dependents(self) -> Dict[str, List[str]]:
+        """순환을 끊은 뒤의 {블록 ID: 후행 블록}"""
+        self.topological_order()
+        return self._acyclic_dependents
@@ -0,0 +1,100 @@
+"""
+의존성 그래프 기반 자동 배치 (레벨 0~4)
+
+블록에 이미 의존성이 있으면 AI 없이도 레벨을 정할 수 있습니다 (밀리초 단위, 같은 입력이면 항상 같은 결과).
+1) 최장 경로 계층화: 선행 블록이 없으면 0, 있으면 (선행 블록들의 가장 높은 계층 + 1)
+2) 여유가 있는 블록(가장 늦게 놓을 수 있는 계층 > 가장 이른 계층)은 같은 카테고리 블록들의
+   계층 중앙값에 가깝게 놓아 카테고리끼리 모이도록 함
+3) 계층이 5개보다 많으면 0~4로 비례 압축 (선행 블록보다 낮아지지는 않음)
+4) 대상 밖의 이미 배치된 선행 블록보다는 높은 레벨이 되도록 올림
+"""
+from statistics import median_low
+from typing import Dict, List, Optional
+from .graph import DependencyGraph
+
+MAX_LEVEL = 4
+
+
+def auto_layer(blocks: List[Dict], fixed_levels: Optional[Dict[str, int]] = None) -> Dict:
+    """
+    블록 레벨 계산
+
+    Args:
+        blocks: 배치할 블록 (id, category, dependencies 사용)
+        fixed_levels: 대상 밖 블록의 현재 레벨 {블록 ID: 레벨} (배치되지 않은 블록은 -1)
+
+    Returns:
+        {
+            "levels": {블록 ID: 레벨},
+            "layers": 압축 전 계층 수, "compressed": 압축 여부,
+            "cycle_edges": [(선행 블록 ID, 블록 ID)] 순환을 끊기 위해 무시한 의존성,
+            "edges": 의존성 수
+        }
+    """
+    graph = DependencyGraph(blocks)
+    order, broken = graph.topological_order()
+    prerequisites = graph.acyclic_prerequisites()
+    dependents = graph.acyclic_dependents()
+    fixed_levels = fixed_levels or {}
+
+    earliest: Dict[str, int] = {}
+    for block_id in order:
+        earliest[block_id] = max((earliest[dep_id] + 1 for dep_id in prerequisites[block_id]), default=0)
+    depth = max(earliest.values(), default=0)
+
+    height: Dict[str, int] = {}
+    for block_id in reversed(order):
+        height[block_id] = max((height[dependent] + 1 for dependent in dependents[block_id]), default=0)
+
+    # 카테고리별 계층 중앙값 (의존성이 있어 위치가 정해지는 블록만 기준으로 사용)
+    layers_by_category: Dict[str, List[int]] = {}
+    for block_id in order:
+        if graph.prerequisites[block_id] or graph.dependents[block_id]:
+            category = graph.blocks[block_id].get('category') or ""
+            layers_by_category.setdefault(category, []).append(earliest[block_id])
+    category_targets = {category: median_low(layers) for category, layers in layers_by_category.items()}
+
+    layer: Dict[str, int] = {}
+    for block_id in order:
+        low = max((layer[dep_id] + 1 for dep_id in prerequisites[block_id]), default=0)
+        high = max(low, depth - height[block_id])
+        target = category_targets.get(graph.blocks[block_id].get('category') or "", low)
+        layer[block_id] = min(high, max(low, target))
+
+    compressed = depth > MAX_LEVEL
+    # 압축하면 같은 레벨에 선행 블록이 올 수 있으므로 압축 시에는 "낮지 않음"만 보장
+    step = 0 if compressed else 1
+    levels: Dict[str, int] = {}
+    for block_id in order:
+        level = round(layer[block_id] * MAX_LEVEL / depth) if compressed else layer[block_id]
+        floor = max((levels[dep_id] + step for dep_id in prerequisites[block_id]), default=0)
+        anchors = [fixed_levels[dep_id] for dep_id in graph.external[block_id] if fixed_levels.get(dep_id, -1) >= 0]
+        if anchors:
+            floor = max(floor, max(anchors) + 1)
+        levels[block_id] = min(MAX_LEVEL, max(level, floor))
+
+    return {
+        "levels": levels,
+        "layers": depth + 1 if levels else 0,
+        "compressed": compressed,
+        "cycle_edges": sorted(broken),
+        "edges": graph.edge_count,
+    }
+
+
+def describe_layering(result: Dict) -> str:
+    """자동 배치 결과 설명 (배치 이유로 저장)"""
+    counts = [0] * (MAX_LEVEL + 1)
+    for level in result["levels"].values():
+        counts[level] += 1
+    lines = [
+        "## 의존성 기반 자동 배치",
+        f"- 블록 {len(result['levels'])}개, 의존성 {result['edges']}개를 선행 블록이 항상 아래에 오도록 배치했습니다.",
+        f"- 의존성 사슬의 최대 길이: {result['layers']}단계"
+        + (" (레벨 0~4로 비례 압축)" if result["compressed"] else ""),
+        "- 위치에 여유가 있는 블록은 같은 카테고리 블록들 가까이에 두었습니다.",
+        "- 레벨별 블록 수: " + ", ".join(f"레벨 {level} {count}개" for level, count in enumerate(counts)),
+    ]
+    if result["cycle_edges"]:
+        lines.append(f"- 순환 의존성 {len(result['cycle_edges'])}개는 배치 계산에서 제외했습니다. 의존성을 확인해주세요.")
+    return "\n".join(lines)
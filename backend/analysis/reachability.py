@@ -0,0 +1,272 @@
+"""
+블록 도달 가능성 색인 (전이적 선행/후행 블록 조회)
+
+"이 블록이 늦어지면 어떤 블록이 영향을 받는가?"에 매번 BFS를 돌리지 않도록,
+프로젝트마다 블록별 전이적 선행 블록(ancestors)과 후행 블록(descendants)을 비트셋으로 보관합니다.
+- 비트셋은 NumPy uint64 2차원 배열 (행: 블록, 열: 64개 블록씩 묶은 단어), 블록 1만 개면 행렬 하나에 약 12.5MB
+- 의존성 추가: 새로 이어진 선행/후행 집합을 해당 행들에 OR (Italiano 방식 증분 갱신)
+- 의존성 제거: 영향을 받을 수 있는 행만 이웃 행의 OR로 다시 계산 (순환이 있으면 변화가 없을 때까지 반복)
+- 조회는 비트셋 한 행을 펼치는 것뿐이므로 마이크로초 단위
+
+색인은 프로세스 메모리에 있으므로 다른 인스턴스에서 바뀐 내용은 REACHABILITY_INDEX_TTL_SECONDS 뒤에 다시 만들 때 반영됩니다.
+NumPy는 앱 시작 시간을 늘리지 않도록 색인을 만들거나 갱신하는 메서드 안에서 가져옵니다 (라우터가 이 모듈을 import 함).
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Set
+from .graph import DependencyGraph
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_WORD_BITS = 64
+
+
+def _words(capacity: int) -> int:
+    return (capacity + _WORD_BITS - 1) // _WORD_BITS
+
+
+class ReachabilityIndex:
+    """한 프로젝트의 전이적 선행/후행 비트셋"""
+
+    def __init__(self, blocks: List[Dict]):
+        import numpy as np
+
+        graph = DependencyGraph(blocks)
+        self.ids: List[str] = list(graph.blocks)
+        self.index: Dict[str, int] = {block_id: position for position, block_id in enumerate(self.ids)}
+        self.prerequisites: List[Set[int]] = [
+            {self.index[dep_id] for dep_id in graph.prerequisites[block_id]} for block_id in self.ids
+        ]
+        self.dependents: List[Set[int]] = [
+            {self.index[dependent] for dependent in graph.dependents[block_id]} for block_id in self.ids
+        ]
+        capacity = max(_WORD_BITS, len(self.ids))
+        self.ancestors = np.zeros((capacity, _words(capacity)), dtype="<u8")
+        self.descendants = np.zeros((capacity, _words(capacity)), dtype="<u8")
+        self._lock = threading.Lock()
+
+        every_node = range(len(self.ids))
+        self._recompute(every_node, self.ancestors, self.prerequisites, self.dependents)
+        self._recompute(every_node, self.descendants, self.dependents, self.prerequisites)
+
+    def __contains__(self, block_id: str) -> bool:
+        return block_id in self.index
+
+    @property
+    def nbytes(self) -> int:
+        return self.ancestors.nbytes + self.descendants.nbytes
+
+    def _nodes(self, row: np.ndarray) -> np.ndarray:
+        """비트셋 한 행에 켜진 블록 번호"""
+        import numpy as np
+
+        bits = np.unpackbits(row.view(np.uint8), bitorder="little")
+        return np.flatnonzero(bits[:len(self.ids)])
+
+    @staticmethod
+    def _set_bits(row: np.ndarray, nodes: np.ndarray):
+        import numpy as np
+
+        np.bitwise_or.at(row, nodes >> 6, np.left_shift(np.uint64(1), (nodes & 63).astype(np.uint64)))
+
+    def _merge(self, matrix: np.ndarray, node: int, neighbors: Set[int]) -> bool:
+        """node 행에 이웃들의 행과 이웃 자신을 OR (바뀌었으면 True)"""
+        import numpy as np
+
+        if not neighbors:
+            return False
+        linked = np.fromiter(neighbors, dtype=np.int64, count=len(neighbors))
+        row = np.bitwise_or.reduce(matrix[linked], axis=0)
+        self._set_bits(row, linked)
+        merged = matrix[node] | row
+        if np.array_equal(merged, matrix[node]):
+            return False
+        matrix[node] = merged
+        return True
+
+    def _recompute(self, nodes: Iterable[int], matrix: np.ndarray, neighbors: List[Set[int]], opposite: List[Set[int]]):
+        """
+        nodes의 행을 이웃 행으로부터 다시 계산 (nodes 밖의 행은 이미 올바르다고 가정)
+
+        nodes 안에서 위상 정렬 순서로 한 번씩 계산하고, 순환 때문에 순서를 정할 수 없는 블록은 변화가 없을 때까지 반복합니다.
+        """
+        targets = set(nodes)
+        if not targets:
+            return
+        matrix[sorted(targets)] = 0
+        remaining = {node: sum(1 for other in neighbors[node] if other in targets) for node in targets}
+        ready = [node for node, count in remaining.items() if count == 0]
+        done: Set[int] = set()
+        while ready:
+            node = ready.pop()
+            done.add(node)
+            self._merge(matrix, node, neighbors[node])
+            for other in opposite[node]:
+                if other in remaining:
+                    remaining[other] -= 1
+                    if remaining[other] == 0:
+                        ready.append(other)
+
+        cyclic = sorted(targets - done)
+        changed = bool(cyclic)
+        while changed:
+            changed = False
+            for node in cyclic:
+                changed = self._merge(matrix, node, neighbors[node]) or changed
+
+    def _grow(self, capacity: int):
+        import numpy as np
+
+        new_capacity = max(capacity, self.ancestors.shape[0] * 2)
+        for name in ("ancestors", "descendants"):
+            old = getattr(self, name)
+            grown = np.zeros((new_capacity, _words(new_capacity)), dtype="<u8")
+            grown[:old.shape[0], :old.shape[1]] = old
+            setattr(self, name, grown)
+
+    def _ensure_node(self, block_id: str) -> int:
+        position = self.index.get(block_id)
+        if position is not None:
+            return position
+        position = len(self.ids)
+        if position >= self.ancestors.shape[0]:
+            self._grow(position + 1)
+        self.ids.append(block_id)
+        self.index[block_id] = position
+        self.prerequisites.append(set())
+        self.dependents.append(set())
+        return position
+
+    def add_dependency(self, block_id: str, dependency_id: str):
+        """block_id가 dependency_id에 의존하게 됨 (dependency_id -> block_id)"""
+        import numpy as np
+
+        with self._lock:
+            low, high = self._ensure_node(dependency_id), self._ensure_node(block_id)
+            if low == high or low in self.prerequisites[high]:
+                return
+            # 갱신 전 상태로 계산: high와 그 후행 블록들은 low와 그 선행 블록을 새로 선행으로 가짐 (반대도 마찬가지)
+            new_ancestors = self.ancestors[low].copy()
+            self._set_bits(new_ancestors, np.array([low]))
+            new_descendants = self.descendants[high].copy()
+            self._set_bits(new_descendants, np.array([high]))
+            later = np.append(self._nodes(self.descendants[high]), high)
+            earlier = np.append(self._nodes(self.ancestors[low]), low)
+
+            self.prerequisites[high].add(low)
+            self.dependents[low].add(high)
+            self.ancestors[later] |= new_ancestors
+            self.descendants[earlier] |= new_descendants
+
+    def remove_dependency(self, block_id: str, dependency_id: str):
+        """block_id의 의존성 dependency_id 제거"""
+        with self._lock:
+            low, high = self.index.get(dependency_id), self.index.get(block_id)
+            if low is None or high is None or low not in self.prerequisites[high]:
+                return
+            # 끊긴 간선을 지나는 경로에만 영향이 있으므로 그 아래/위 블록만 다시 계산
+            later = set(self._nodes(self.descendants[high]).tolist()) | {high}
+            earlier = set(self._nodes(self.ancestors[low]).tolist()) | {low}
+            self.prerequisites[high].discard(low)
+            self.dependents[low].discard(high)
+            self._recompute(later, self.ancestors, self.prerequisites, self.dependents)
+            self._recompute(earlier, self.descendants, self.dependents, self.prerequisites)
+
+    def impact(self, block_id: str) -> List[str]:
+        """block_id에 (전이적으로) 의존하는 블록 (이 블록이 늦어지면 영향을 받는 블록)"""
+        return self._query(self.descendants, block_id)
+
+    def all_prerequisites(self, block_id: str) -> List[str]:
+        """block_id가 (전이적으로) 의존하는 블록"""
+        return self._query(self.ancestors, block_id)
+
+    def _query(self, matrix: np.ndarray, block_id: str) -> List[str]:
+        with self._lock:
+            position = self.index[block_id]
+            # 순환 의존성이면 자기 자신도 도달 가능하므로 제외
+            return [self.ids[node] for node in self._nodes(matrix[position]).tolist() if node != position]
+
+
+class ReachabilityIndexes:
+    """프로젝트별 도달 가능성 색인 (최근 사용한 max_projects개만 보관)"""
+
+    def __init__(self, max_projects: int = 16, ttl_seconds: float = 300):
+        self.max_projects = max_projects
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # 프로젝트 ID -> (색인, 만든 시각)
+        # 만드는 중에 의존성이 바뀌면 그 결과는 보관하지 않도록 프로젝트별 변경 번호 기록
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"builds": 0, "incremental_updates": 0, "invalidations": 0}
+
+    def peek(self, project_id: str) -> Optional[ReachabilityIndex]:
+        """유효한 색인 (없거나 만료되었으면 None)"""
+        with self._lock:
+            entry = self._entries.get(project_id)
+            if entry is None or time.monotonic() - entry[1] > self.ttl_seconds:
+                return None
+            self._entries.move_to_end(project_id)
+            return entry[0]
+
+    def build(self, project_id: str, load_blocks: Callable[[], List[Dict]]) -> ReachabilityIndex:
+        """블록을 읽어 색인을 새로 만들고 보관"""
+        with self._lock:
+            generation = self._generations.get(project_id, 0)
+        started_at = time.perf_counter()
+        index = ReachabilityIndex(load_blocks())
+        print(f"🗺️  도달 가능성 색인 생성: 블록 {len(index.ids)}개, "
+              f"{index.nbytes / 1024 / 1024:.1f}MB, {(time.perf_counter() - started_at) * 1000:.0f}ms")
+        with self._lock:
+            self.stats["builds"] += 1
+            if self._generations.get(project_id, 0) == generation:
+                self._entries[project_id] = (index, time.monotonic())
+                self._entries.move_to_end(project_id)
+                while len(self._entries) > self.max_projects:
+                    self._entries.popitem(last=False)
+        return index
+
+    def _changed(self, project_id: str) -> Optional[ReachabilityIndex]:
+        with self._lock:
+            self._generations[project_id] = self._generations.get(project_id, 0) + 1
+            entry = self._entries.get(project_id)
+            return entry[0] if entry else None
+
+    def add_dependency(self, project_id: str, block_id: str, dependency_id: str):
+        index = self._changed(project_id)
+        if index is not None:
+            index.add_dependency(block_id, dependency_id)
+            self.stats["incremental_updates"] += 1
+
+    def remove_dependency(self, project_id: str, block_id: str, dependency_id: str):
+        index = self._changed(project_id)
+        if index is not None:
+            index.remove_dependency(block_id, dependency_id)
+            self.stats["incremental_updates"] += 1
+
+    def invalidate(self, project_id: str):
+        """블록 삭제 등 증분 갱신하지 않는 변경 후 색인 버림 (다음 조회 때 다시 만듦)"""
+        self._changed(project_id)
+        with self._lock:
+            if self._entries.pop(project_id, None) is not None:
+                self.stats["invalidations"] += 1
+
+
+# 전역 색인 관리자 인스턴스 (싱글톤 패턴)
+_reachability_indexes_instance: Optional[ReachabilityIndexes] = None
+
+
+def get_reachability_indexes() -> ReachabilityIndexes:
+    """도달 가능성 색인 관리자 인스턴스 반환"""
+    global _reachability_indexes_instance
+
+    if _reachability_indexes_instance is None:
+        _reachability_indexes_instance = ReachabilityIndexes(
+            max_projects=int(os.getenv("REACHABILITY_INDEX_MAX_PROJECTS", "16")),
+            ttl_seconds=float(os.getenv("REACHABILITY_INDEX_TTL_SECONDS", "300")),
+        )
+    return _reachability_indexes_instance
@@ -0,0 +1,77 @@
+"""
+블록 보드 스냅샷과 변경 비교
+
+AI 피드백을 매번 보드 전체로 다시 분석하지 않도록, 피드백을 만든 시점의 배치를 작게 기록해 두고
+다음 요청 때 달라진 부분(추가/제거/이동한 블록, 바뀐 의존성)만 계산합니다.
+- board_snapshot(): 배치된 블록의 {블록 ID: {"level", "title", "deps"}}
+- board_fingerprint(): 스냅샷과 프로젝트 분석의 해시 (같으면 보드가 바뀌지 않은 것)
+- diff_boards(): 두 스냅샷의 차이
+"""
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+
+def board_snapshot(blocks: List[Dict]) -> Dict[str, Dict]:
+    """
+    배치된 블록(레벨 0 이상)의 스냅샷
+
+    피드백 상태로 Firestore에 저장하므로 Firestore가 지원하는 값만 사용 (배열 안에 배열을 넣지 않음)
+    """
+    arranged_ids = {block.get('id') for block in blocks if block.get('level', -1) >= 0}
+    return {
+        block['id']: {
+            "level": block.get('level', 0),
+            "title": block.get('title', ''),
+            "deps": sorted(dep_id for dep_id in block.get('dependencies') or [] if dep_id in arranged_ids),
+        }
+        for block in blocks
+        if block.get('id') in arranged_ids
+    }
+
+
+def board_fingerprint(snapshot: Dict[str, Dict], project_analysis: Optional[str] = None, focus: Optional[str] = None) -> str:
+    """스냅샷 + 프로젝트 분석 (+ 피드백 초점) 해시"""
+    # 초점이 없으면 이전과 같은 해시 (저장된 feedback_state 유지)
+    payload = json.dumps([snapshot, project_analysis or ""] + ([focus] if focus else []), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def diff_boards(previous: Dict[str, Dict], current: Dict[str, Dict]) -> Dict[str, list]:
+    """
+    두 스냅샷의 차이
+
+    Returns:
+        {
+            "added": [블록 ID], "removed": [블록 ID],
+            "moved": [(블록 ID, 이전 레벨, 현재 레벨)], "renamed": [(블록 ID, 이전 제목)],
+            "edges_added": [(선행 블록 ID, 블록 ID)], "edges_removed": [(선행 블록 ID, 블록 ID)]
+        }
+        추가/제거된 블록의 의존성은 edges에 포함하지 않음 (블록 정보에 함께 표시)
+    """
+    diff = {"added": [], "removed": [], "moved": [], "renamed": [], "edges_added": [], "edges_removed": []}
+    for block_id in sorted(current.keys() - previous.keys()):
+        diff["added"].append(block_id)
+    for block_id in sorted(previous.keys() - current.keys()):
+        diff["removed"].append(block_id)
+
+    for block_id in sorted(current.keys() & previous.keys()):
+        old, new = previous[block_id], current[block_id]
+        if old["level"] != new["level"]:
+            diff["moved"].append((block_id, old["level"], new["level"]))
+        if old["title"] != new["title"]:
+            diff["renamed"].append((block_id, old["title"]))
+        for dep_id in sorted(set(new["deps"]) - set(old["deps"])):
+            diff["edges_added"].append((dep_id, block_id))
+        for dep_id in sorted(set(old["deps"]) - set(new["deps"])):
+            diff["edges_removed"].append((dep_id, block_id))
+    return diff
+
+
+def changed_block_count(diff: Dict[str, list]) -> int:
+    """차이에 관련된 블록 수 (의존성 변경은 의존하는 쪽 블록 기준)"""
+    changed = set(diff["added"]) | set(diff["removed"])
+    changed |= {block_id for block_id, *_ in diff["moved"]}
+    changed |= {block_id for block_id, _ in diff["renamed"]}
+    changed |= {block_id for _, block_id in diff["edges_added"] + diff["edges_removed"]}
+    return len(changed)
@@ -0,0 +1,12 @@
+"""
+운영 진단 도구 (이벤트 루프 워치독, 요청/메모리 프로파일러 등)
+"""
+from .loop_watchdog import LoopWatchdog, get_watchdog, start_watchdog_from_env, stop_watchdog
+from .profiler import RequestProfiler, get_profiler
+from .memory_profiler import MemoryProfiler, get_memory_profiler
+
+__all__ = [
+    'LoopWatchdog', 'get_watchdog', 'start_watchdog_from_env', 'stop_watchdog',
+    'RequestProfiler', 'get_profiler',
+    'MemoryProfiler', 'get_memory_profiler',
+]
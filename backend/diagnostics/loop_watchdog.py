@@ -0,0 +1,187 @@
+"""
+이벤트 루프 지연 워치독
+
+별도 스레드에서 주기적으로 이벤트 루프에 하트비트 콜백을 보내 루프 지연(lag)을 측정합니다.
+하트비트가 임계값 안에 처리되지 않으면 루프가 동기 호출(Firestore, Vertex AI SDK 등)에
+막혀 있다고 판단하고, 멈춰 있는 동안 루프 스레드의 스택을 반복 샘플링합니다.
+루프가 회복되면 가장 많이 관측된 스택과 당시 실행 중이던 라우트를 함께 기록합니다.
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime
+from typing import List, Optional
+
+from middleware.request_tracker import get_running_request, get_active_requests
+
+logger = logging.getLogger(__name__)
+
+
+def _format_stack(frame) -> List[str]:
+    """프레임을 "파일:줄 함수" 목록으로 변환 (바깥쪽 → 안쪽 순서)"""
+    return [
+        f"{entry.filename}:{entry.lineno} {entry.name}"
+        for entry in traceback.extract_stack(frame)
+    ]
+
+
+class LoopWatchdog:
+    """이벤트 루프 지연 측정 및 블로킹 스택 샘플링"""
+
+    def __init__(
+        self,
+        threshold_ms: float = 300,
+        sample_interval_ms: float = 50,
+        max_records: int = 50,
+        export_path: Optional[str] = None,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.sample_interval = sample_interval_ms / 1000
+        self.export_path = export_path
+        self.stalls = deque(maxlen=max_records)
+        self.max_lag_ms = 0.0
+        self.last_lag_ms = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """워치독 시작 (반드시 이벤트 루프 스레드에서 호출)"""
+        if self.running:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"이벤트 루프 워치독 시작: threshold={self.threshold * 1000:.0f}ms, "
+            f"sample_interval={self.sample_interval * 1000:.0f}ms"
+        )
+
+    def stop(self):
+        """워치독 중지"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.threshold + 1)
+        self._thread = None
+
+    def get_stats(self) -> dict:
+        """현재 상태와 최근 stall 기록 반환"""
+        return {
+            "running": self.running,
+            "threshold_ms": self.threshold * 1000,
+            "last_lag_ms": round(self.last_lag_ms, 1),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "stalls": list(self.stalls),
+        }
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            heartbeat = threading.Event()
+            sent_at = time.perf_counter()
+            try:
+                self._loop.call_soon_threadsafe(heartbeat.set)
+            except RuntimeError:
+                # 루프가 닫힘
+                return
+
+            if heartbeat.wait(self.threshold):
+                self._update_lag(time.perf_counter() - sent_at)
+                self._stop_event.wait(self.sample_interval)
+                continue
+
+            # 임계값 초과: 루프가 회복될 때까지 스택 샘플링
+            samples = Counter()
+            route = get_running_request(self._loop)
+            while not heartbeat.is_set() and not self._stop_event.is_set():
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    samples[tuple(_format_stack(frame))] += 1
+                del frame
+                heartbeat.wait(self.sample_interval)
+
+            lag = time.perf_counter() - sent_at
+            self._update_lag(lag)
+            self._record_stall(lag, samples, route)
+
+    def _update_lag(self, lag: float):
+        self.last_lag_ms = lag * 1000
+        self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+
+    def _record_stall(self, lag: float, samples: Counter, route: Optional[dict]):
+        """stall 기록 저장, 로그 출력, (설정 시) 파일로 내보내기"""
+        top_stack, top_count = samples.most_common(1)[0] if samples else ((), 0)
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "lag_ms": round(lag * 1000, 1),
+            "route": route,
+            "active_requests": get_active_requests(),
+            "sample_count": sum(samples.values()),
+            "top_stack_samples": top_count,
+            "stack": list(top_stack),
+        }
+        self.stalls.append(record)
+
+        route_text = f"{route['method']} {route['path']}" if route else "알 수 없음"
+        logger.warning(
+            f"이벤트 루프 블로킹 감지: {record['lag_ms']}ms, 라우트={route_text}\n"
+            + "\n".join(f"    {line}" for line in top_stack)
+        )
+
+        if self.export_path:
+            try:
+                with open(self.export_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError as e:
+                logger.error(f"워치독 기록 내보내기 실패: {e}")
+
+
+# 전역 워치독 인스턴스 (싱글톤 패턴)
+_watchdog_instance: Optional[LoopWatchdog] = None
+
+
+def get_watchdog() -> Optional[LoopWatchdog]:
+    """실행 중인 워치독 반환 (비활성화 상태면 None)"""
+    return _watchdog_instance
+
+
+def start_watchdog_from_env() -> Optional[LoopWatchdog]:
+    """
+    환경 변수 설정에 따라 워치독 시작
+
+    LOOP_WATCHDOG_ENABLED=true 일 때만 동작합니다.
+    - LOOP_WATCHDOG_THRESHOLD_MS: stall로 판단할 지연 (기본 300)
+    - LOOP_WATCHDOG_SAMPLE_INTERVAL_MS: 하트비트/스택 샘플링 주기 (기본 50)
+    - LOOP_WATCHDOG_EXPORT_PATH: stall 기록을 JSON Lines로 추가할 파일 (선택)
+    """
+    global _watchdog_instance
+
+    if os.getenv("LOOP_WATCHDOG_ENABLED", "false").lower() != "true":
+        return None
+
+    if _watchdog_instance is None:
+        _watchdog_instance = LoopWatchdog(
+            threshold_ms=float(os.getenv("LOOP_WATCHDOG_THRESHOLD_MS", "300")),
+            sample_interval_ms=float(os.getenv("LOOP_WATCHDOG_SAMPLE_INTERVAL_MS", "50")),
+            export_path=os.getenv("LOOP_WATCHDOG_EXPORT_PATH") or None,
+        )
+    _watchdog_instance.start()
+    return _watchdog_instance
+
+
+def stop_watchdog():
+    """워치독 중지"""
+    if _watchdog_instance is not None:
+        _watchdog_instance.stop()
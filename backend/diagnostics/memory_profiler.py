@@ -0,0 +1,154 @@
+"""
+tracemalloc 기반 메모리 프로파일러
+
+관리자 API에서 할당 추적을 켜고 끄며, 시점별 스냅샷을 남겨 두 시점 사이의
+할당 증가분(diff)을 비교할 수 있도록 합니다. 대용량 AI 응답 처리나 get_all_blocks 결과 등
+어떤 코드 경로가 객체를 붙잡고 있는지 찾는 데 사용합니다.
+"""
+import os
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional
+
+GROUP_BY_OPTIONS = ("lineno", "filename", "traceback")
+
+# 스냅샷에서 제외할 내부 할당 (추적 도구 자체, import 시스템)
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def get_rss_bytes() -> Optional[int]:
+    """현재 프로세스 RSS (Linux /proc 기준, 확인 불가 시 None)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _format_stat(stat, group_by: str) -> dict:
+    frames = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+    return {
+        "location": frames[-1] if group_by == "traceback" else frames[0],
+        "traceback": frames if group_by == "traceback" else None,
+        "size_kb": round(stat.size / 1024, 1),
+        "count": stat.count,
+    }
+
+
+def _format_diff(stat, group_by: str) -> dict:
+    result = _format_stat(stat, group_by)
+    result["size_diff_kb"] = round(stat.size_diff / 1024, 1)
+    result["count_diff"] = stat.count_diff
+    return result
+
+
+class MemoryProfiler:
+    """tracemalloc 추적 제어 및 스냅샷 관리"""
+
+    def __init__(self, max_snapshots: int = 10):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[str, dict]" = OrderedDict()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 10) -> dict:
+        """할당 추적 시작 (frames: 할당 위치마다 저장할 스택 깊이)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            print(f"🔍 tracemalloc 추적 시작: frames={frames}")
+        return self.get_status()
+
+    def stop(self) -> dict:
+        """할당 추적 중지 (저장된 스냅샷도 함께 비움)"""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            print("🔍 tracemalloc 추적 중지")
+        self._snapshots.clear()
+        return self.get_status()
+
+    def get_status(self) -> dict:
+        """추적 상태, 추적 중인 메모리, RSS 반환"""
+        status = {
+            "tracing": self.tracing,
+            "rss_mb": None,
+            "traced_current_mb": None,
+            "traced_peak_mb": None,
+            "snapshots": self.list_snapshots(),
+        }
+        rss = get_rss_bytes()
+        if rss is not None:
+            status["rss_mb"] = round(rss / 1024 / 1024, 1)
+        if self.tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            status["traced_current_mb"] = round(current / 1024 / 1024, 1)
+            status["traced_peak_mb"] = round(peak / 1024 / 1024, 1)
+        return status
+
+    def _take(self) -> tracemalloc.Snapshot:
+        if not self.tracing:
+            raise ValueError("tracemalloc 추적이 시작되지 않았습니다")
+        return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+    def take_snapshot(self, label: Optional[str] = None) -> dict:
+        """스냅샷 저장 (보관 개수를 넘으면 가장 오래된 것부터 제거)"""
+        snapshot = self._take()
+        snapshot_id = uuid.uuid4().hex[:8]
+        rss = get_rss_bytes()
+        metadata = {
+            "id": snapshot_id,
+            "label": label,
+            "created_at": datetime.now().isoformat(),
+            "traced_mb": round(sum(stat.size for stat in snapshot.statistics("filename")) / 1024 / 1024, 1),
+            "rss_mb": round(rss / 1024 / 1024, 1) if rss is not None else None,
+        }
+        self._snapshots[snapshot_id] = {"metadata": metadata, "snapshot": snapshot}
+        while len(self._snapshots) > self.max_snapshots:
+            self._snapshots.popitem(last=False)
+        return metadata
+
+    def list_snapshots(self) -> List[dict]:
+        """저장된 스냅샷 메타데이터 목록"""
+        return [entry["metadata"] for entry in self._snapshots.values()]
+
+    def _get_snapshot(self, snapshot_id: str) -> tracemalloc.Snapshot:
+        entry = self._snapshots.get(snapshot_id)
+        if entry is None:
+            raise KeyError(snapshot_id)
+        return entry["snapshot"]
+
+    def top(self, limit: int = 20, group_by: str = "lineno", snapshot_id: Optional[str] = None) -> List[dict]:
+        """할당량 상위 위치 (snapshot_id 생략 시 현재 시점)"""
+        snapshot = self._get_snapshot(snapshot_id) if snapshot_id else self._take()
+        return [_format_stat(stat, group_by) for stat in snapshot.statistics(group_by)[:limit]]
+
+    def diff(self, from_id: str, to_id: Optional[str] = None, limit: int = 20, group_by: str = "lineno") -> List[dict]:
+        """두 스냅샷 사이 할당 증가량 상위 위치 (to_id 생략 시 현재 시점과 비교)"""
+        old_snapshot = self._get_snapshot(from_id)
+        new_snapshot = self._get_snapshot(to_id) if to_id else self._take()
+        stats = new_snapshot.compare_to(old_snapshot, group_by)
+        return [_format_diff(stat, group_by) for stat in stats[:limit]]
+
+
+# 전역 메모리 프로파일러 인스턴스 (싱글톤 패턴)
+_memory_profiler_instance: Optional[MemoryProfiler] = None
+
+
+def get_memory_profiler() -> MemoryProfiler:
+    """메모리 프로파일러 인스턴스 반환"""
+    global _memory_profiler_instance
+
+    if _memory_profiler_instance is None:
+        _memory_profiler_instance = MemoryProfiler(
+            max_snapshots=int(os.getenv("MEMORY_PROFILE_MAX_SNAPSHOTS", "10")),
+        )
+    return _memory_profiler_instance
@@ -0,0 +1,169 @@
+"""
+요청 단위 CPU 프로파일러
+
+관리자가 특정 요청에만 프로파일링을 켜서 결과 파일을 남길 수 있도록 합니다.
+- cprofile: cProfile 기반 결정적 프로파일링, .pstats 파일로 저장
+- sample: 이벤트 루프 스레드 스택을 주기적으로 샘플링, collapsed-stack(.folded) 파일로 저장
+  (flamegraph.pl, speedscope 등에서 바로 열 수 있는 형식)
+
+cProfile은 스레드 전체를 측정하므로 같은 시점에 실행된 다른 요청의 코루틴도 함께 기록될 수 있습니다.
+sample 모드는 해당 요청의 Task가 실행 중인 샘플만 남깁니다.
+"""
+import asyncio
+import cProfile
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+PROFILE_MODES = ("cprofile", "sample")
+
+
+class _StackSampler:
+    """특정 Task가 실행 중일 때 루프 스레드 스택을 샘플링"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, task: asyncio.Task, interval_ms: float):
+        self.loop = loop
+        self.task = task
+        self.interval = interval_ms / 1000
+        self.thread_id = threading.get_ident()
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(timeout=1)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                if asyncio.current_task(self.loop) is not self.task:
+                    continue
+            except RuntimeError:
+                return
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            del frame
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+
+class RequestProfiler:
+    """요청 단위 프로파일링 실행 및 결과 파일 관리"""
+
+    def __init__(self, output_dir: Optional[str] = None, max_profiles: int = 50, sample_interval_ms: float = 5):
+        self.output_dir = output_dir or os.path.join(tempfile.gettempdir(), "thinkblock-profiles")
+        self.sample_interval_ms = sample_interval_ms
+        self.profiles = deque(maxlen=max_profiles)
+        self._profiles_by_id: Dict[str, dict] = {}
+        self._cprofile_active = False
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def start(self, mode: str) -> Optional[dict]:
+        """
+        프로파일링 시작 후 stop()에 넘길 세션 객체 반환 (이벤트 루프 안에서 호출)
+
+        cProfile은 스레드당 하나만 활성화할 수 있으므로, 이미 실행 중이면 None을 반환합니다.
+        """
+        if mode != "sample" and self._cprofile_active:
+            print("⚠️  다른 요청을 cProfile로 프로파일링 중이라 이번 요청은 건너뜁니다")
+            return None
+
+        session = {"id": uuid.uuid4().hex[:12], "mode": mode, "started_at": time.perf_counter()}
+        if mode == "sample":
+            sampler = _StackSampler(asyncio.get_running_loop(), asyncio.current_task(), self.sample_interval_ms)
+            sampler.start()
+            session["sampler"] = sampler
+        else:
+            session["mode"] = "cprofile"
+            self._cprofile_active = True
+            session["profile"] = cProfile.Profile()
+            session["profile"].enable()
+        return session
+
+    def stop(self, session: dict, method: str, path: str, status_code: Optional[int]) -> dict:
+        """프로파일링 종료, 결과 파일 저장, 메타데이터 반환"""
+        duration_ms = (time.perf_counter() - session["started_at"]) * 1000
+        profile_id = session["id"]
+
+        if session["mode"] == "sample":
+            sampler = session["sampler"]
+            sampler.stop()
+            file_path = os.path.join(self.output_dir, f"{profile_id}.folded")
+            with open(file_path, "w", encoding="utf-8") as f:
+                for stack, count in sampler.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+        else:
+            profile = session["profile"]
+            profile.disable()
+            self._cprofile_active = False
+            file_path = os.path.join(self.output_dir, f"{profile_id}.pstats")
+            profile.dump_stats(file_path)
+
+        metadata = {
+            "id": profile_id,
+            "mode": session["mode"],
+            "method": method,
+            "path": path,
+            "status_code": status_code,
+            "duration_ms": round(duration_ms, 1),
+            "created_at": datetime.now().isoformat(),
+            "file_name": os.path.basename(file_path),
+        }
+        self._remember(metadata, file_path)
+        print(f"🔍 요청 프로파일 저장: {method} {path} ({metadata['duration_ms']}ms) -> {file_path}")
+        return metadata
+
+    def _remember(self, metadata: dict, file_path: str):
+        # 보관 개수를 넘으면 가장 오래된 결과 파일도 삭제
+        if len(self.profiles) == self.profiles.maxlen:
+            oldest = self.profiles[0]
+            self._profiles_by_id.pop(oldest["id"], None)
+            try:
+                os.remove(os.path.join(self.output_dir, oldest["file_name"]))
+            except OSError:
+                pass
+        self.profiles.append(metadata)
+        self._profiles_by_id[metadata["id"]] = metadata
+
+    def list_profiles(self) -> List[dict]:
+        """저장된 프로파일 목록 (최신순)"""
+        return list(reversed(self.profiles))
+
+    def get_profile_path(self, profile_id: str) -> Optional[str]:
+        """프로파일 결과 파일 경로 반환 (없으면 None)"""
+        metadata = self._profiles_by_id.get(profile_id)
+        if metadata is None:
+            return None
+        file_path = os.path.join(self.output_dir, metadata["file_name"])
+        return file_path if os.path.exists(file_path) else None
+
+
+# 전역 프로파일러 인스턴스 (싱글톤 패턴)
+_profiler_instance: Optional[RequestProfiler] = None
+
+
+def get_profiler() -> RequestProfiler:
+    """프로파일러 인스턴스 반환 (처음 프로파일링 요청 시 생성)"""
+    global _profiler_instance
+
+    if _profiler_instance is None:
+        _profiler_instance = RequestProfiler(
+            output_dir=os.getenv("PROFILE_OUTPUT_DIR") or None,
+            max_profiles=int(os.getenv("PROFILE_MAX_FILES", "50")),
+            sample_interval_ms=float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5")),
+        )
+    return _profiler_instance
@@ -47,8 +47,22 @@ class AIServiceError(BaseAPIException):
         super().__init__(message, status_code=500, detail=detail)
 
 
+class AIUnavailableError(AIServiceError):
+    """AI 서비스가 일시적으로 응답하지 않을 때 발생하는 예외 (재시도 소진, 회로 차단)"""
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = 503
+        self.retry_after = retry_after
+
+
 class StorageError(BaseAPIException):
     """저장소 관련 오류 시 발생하는 예외"""
     def __init__(self, message: str, detail: Optional[str] = None):
         super().__init__(message, status_code=500, detail=detail)
 
+
+class ForbiddenError(BaseAPIException):
+    """권한이 없는 요청일 때 발생하는 예외"""
+    def __init__(self, message: str = "접근 권한이 없습니다"):
+        super().__init__(message, status_code=403)
+
@@ -1,11 +1,13 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
 from typing import List, Optional
 from pydantic import BaseModel
 import os
 
 # Firestore 초기화
 def init_firestore():
+    # Firebase SDK는 import 비용이 커서 실제로 클라이언트가 필요할 때 가져옴
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
     if not firebase_admin._apps:
         from utils import find_credentials_file
         
@@ -40,7 +42,24 @@ def init_firestore():
     
     return firestore.client()
 
-db = init_firestore()
+# Firestore 클라이언트는 첫 사용 시 생성 (import 시점에 초기화하지 않음)
+_db = None
+
+
+def get_db():
+    """Firestore 클라이언트 반환 (처음 호출 시 초기화)"""
+    global _db
+    if _db is None:
+        _db = init_firestore()
+    return _db
+
+
+def __getattr__(name):
+    # 기존 `firestore_service.db` 접근 호환
+    if name == "db":
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 PROJECTS_COLLECTION = "projects"
 BLOCKS_COLLECTION = "blocks"
 CATEGORIES_DOC_ID = "categories"
@@ -57,7 +76,7 @@ class BlockModel(BaseModel):
 def get_all_blocks(project_id: str) -> List[dict]:
     """프로젝트의 모든 블록 조회"""
     try:
-        blocks_ref = db.collection(PROJECTS_COLLECTION).document(project_id).collection(BLOCKS_COLLECTION)
+        blocks_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id).collection(BLOCKS_COLLECTION)
         
         # 인덱스가 없을 수 있으므로 먼저 단순 조회 후 정렬
         docs = blocks_ref.stream()
@@ -80,7 +99,7 @@ def get_all_blocks(project_id: str) -> List[dict]:
 
 def get_block(project_id: str, block_id: str) -> Optional[dict]:
     """특정 블록 조회"""
-    doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id).collection(BLOCKS_COLLECTION).document(block_id)
+    doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id).collection(BLOCKS_COLLECTION).document(block_id)
     doc = doc_ref.get()
     
     if doc.exists:
@@ -94,10 +113,10 @@ def create_block(project_id: str, block_data: dict) -> dict:
     try:
         # 같은 레벨의 블록 수를 확인하여 order 설정
         if "order" not in block_data or block_data["order"] is None:
-            level_blocks = db.collection(PROJECTS_COLLECTION).document(project_id).collection(BLOCKS_COLLECTION).where("level", "==", block_data["level"]).stream()
+            level_blocks = get_db().collection(PROJECTS_COLLECTION).document(project_id).collection(BLOCKS_COLLECTION).where("level", "==", block_data["level"]).stream()
             block_data["order"] = sum(1 for _ in level_blocks)
         
-        doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id).collection(BLOCKS_COLLECTION).document()
+        doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id).collection(BLOCKS_COLLECTION).document()
         block_data["id"] = doc_ref.id
         
         # Firestore에 저장
@@ -111,7 +130,7 @@ def create_block(project_id: str, block_data: dict) -> dict:
 
 def update_block(project_id: str, block_id: str, updates: dict) -> Optional[dict]:
     """블록 업데이트"""
-    doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id).collection(BLOCKS_COLLECTION).document(block_id)
+    doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id).collection(BLOCKS_COLLECTION).document(block_id)
     doc = doc_ref.get()
     
     if not doc.exists:
@@ -130,7 +149,7 @@ def update_block(project_id: str, block_id: str, updates: dict) -> Optional[dict
 
 def delete_block(project_id: str, block_id: str) -> bool:
     """블록 삭제"""
-    doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id).collection(BLOCKS_COLLECTION).document(block_id)
+    doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id).collection(BLOCKS_COLLECTION).document(block_id)
     doc = doc_ref.get()
     
     if doc.exists:
@@ -141,7 +160,7 @@ def delete_block(project_id: str, block_id: str) -> bool:
 # 카테고리 관련 함수
 def get_categories(project_id: str) -> List[str]:
     """프로젝트의 카테고리 목록 조회"""
-    doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document(CATEGORIES_DOC_ID)
+    doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document(CATEGORIES_DOC_ID)
     doc = doc_ref.get()
     
     if doc.exists:
@@ -151,7 +170,7 @@ def get_categories(project_id: str) -> List[str]:
 
 def update_categories(project_id: str, categories: List[str]) -> List[str]:
     """프로젝트의 카테고리 목록 업데이트"""
-    doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document(CATEGORIES_DOC_ID)
+    doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document(CATEGORIES_DOC_ID)
     doc_ref.set({"categories": categories})
     return categories
 
@@ -163,7 +182,7 @@ def get_dependency_colors(project_id: str) -> dict:
     Returns:
         dict: {fromBlockId_toBlockId: color} 형태의 딕셔너리
     """
-    doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document(DEPENDENCY_COLORS_DOC_ID)
+    doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document(DEPENDENCY_COLORS_DOC_ID)
     doc = doc_ref.get()
     
     if doc.exists:
@@ -173,7 +192,7 @@ def get_dependency_colors(project_id: str) -> dict:
 
 def update_dependency_color(project_id: str, from_block_id: str, to_block_id: str, color: str) -> dict:
     """의존성 색상 업데이트"""
-    doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document(DEPENDENCY_COLORS_DOC_ID)
+    doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document(DEPENDENCY_COLORS_DOC_ID)
     doc = doc_ref.get()
     
     colors = {}
@@ -187,7 +206,7 @@ def update_dependency_color(project_id: str, from_block_id: str, to_block_id: st
 
 def remove_dependency_color(project_id: str, from_block_id: str, to_block_id: str) -> dict:
     """의존성 색상 제거"""
-    doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document(DEPENDENCY_COLORS_DOC_ID)
+    doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document(DEPENDENCY_COLORS_DOC_ID)
     doc = doc_ref.get()
     
     if not doc.exists:
@@ -208,7 +227,7 @@ def get_category_colors(project_id: str) -> dict:
     Returns:
         dict: {category_name: {bg: string, text: string}} 형태의 딕셔너리
     """
-    doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document(CATEGORY_COLORS_DOC_ID)
+    doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document(CATEGORY_COLORS_DOC_ID)
     doc = doc_ref.get()
     
     if doc.exists:
@@ -218,13 +237,13 @@ def get_category_colors(project_id: str) -> dict:
 
 def update_category_colors(project_id: str, colors: dict) -> dict:
     """카테고리 색상 맵 업데이트"""
-    doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document(CATEGORY_COLORS_DOC_ID)
+    doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document(CATEGORY_COLORS_DOC_ID)
     doc_ref.set({"colors": colors})
     return colors
 
 def get_connection_color_palette(project_id: str) -> List[str]:
     """프로젝트의 연결선 색상 팔레트 조회"""
-    doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document("connection_color_palette")
+    doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document("connection_color_palette")
     doc = doc_ref.get()
     
     if doc.exists:
@@ -236,7 +255,7 @@ def get_connection_color_palette(project_id: str) -> List[str]:
 
 def update_connection_color_palette(project_id: str, colors: List[str]) -> List[str]:
     """연결선 색상 팔레트 업데이트"""
-    doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document("connection_color_palette")
+    doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id).collection("metadata").document("connection_color_palette")
     doc_ref.set({"colors": colors})
     return colors
 
@@ -254,14 +273,14 @@ def create_project(project_name: str) -> dict:
         "updatedAt": datetime.now(),
     }
     
-    doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id)
+    doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id)
     doc_ref.set(project_data)
     
     return project_data
 
 def get_project(project_id: str) -> Optional[dict]:
     """프로젝트 조회"""
-    doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id)
+    doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id)
     doc = doc_ref.get()
     
     if doc.exists:
@@ -274,7 +293,7 @@ def get_all_projects() -> List[dict]:
     """모든 프로젝트 조회"""
     from google.cloud.firestore import Query
     
-    projects_ref = db.collection(PROJECTS_COLLECTION)
+    projects_ref = get_db().collection(PROJECTS_COLLECTION)
     docs = projects_ref.order_by("updatedAt", direction=Query.DESCENDING).stream()
     
     projects = []
@@ -289,7 +308,7 @@ def update_project(project_id: str, updates: dict) -> Optional[dict]:
     """프로젝트 업데이트"""
     from datetime import datetime
     
-    doc_ref = db.collection(PROJECTS_COLLECTION).document(project_id)
+    doc_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id)
     doc = doc_ref.get()
     
     if not doc.exists:
@@ -305,7 +324,7 @@ def update_project(project_id: str, updates: dict) -> Optional[dict]:
 
 def delete_project(project_id: str) -> bool:
     """프로젝트 삭제 (블록과 카테고리도 함께 삭제)"""
-    project_ref = db.collection(PROJECTS_COLLECTION).document(project_id)
+    project_ref = get_db().collection(PROJECTS_COLLECTION).document(project_id)
     project_doc = project_ref.get()
     
     if not project_doc.exists:
@@ -354,7 +373,7 @@ def duplicate_project(source_project_id: str, new_project_name: str, copy_struct
         "updatedAt": datetime.now(),
     }
     
-    project_ref = db.collection(PROJECTS_COLLECTION).document(new_project_id)
+    project_ref = get_db().collection(PROJECTS_COLLECTION).document(new_project_id)
     project_ref.set(new_project_data)
     
     # 카테고리 복사 (무조건 복사)
@@ -5,12 +5,19 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
+import asyncio
 import os
 from dotenv import load_dotenv
 
 # 라우터 임포트
-from routers import blocks, projects, categories, dependencies, ai
+from routers import blocks, projects, categories, dependencies, ai, jobs, admin, health, analysis
 from middleware.error_handler import register_error_handlers
+from middleware.request_tracker import RequestTrackerMiddleware
+from middleware.profiling import ProfilingMiddleware
+from diagnostics import start_watchdog_from_env, stop_watchdog
+from storage import get_storage
+from ai_client import get_ai_client
+from ai_jobs import get_job_queue
 
 load_dotenv()
 
@@ -30,12 +37,69 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 진행 중인 요청 추적 (워치독이 블로킹 시점의 라우트를 찾는 데 사용)
+app.add_middleware(RequestTrackerMiddleware)
+
+# 관리자가 요청한 경우에만 해당 요청을 프로파일링 (X-Profile 헤더 또는 profile 쿼리)
+app.add_middleware(ProfilingMiddleware)
+
+
+@app.on_event("startup")
+async def start_diagnostics():
+    """진단 도구 시작 (LOOP_WATCHDOG_ENABLED=true 일 때 이벤트 루프 워치독 실행)"""
+    start_watchdog_from_env()
+
+
+@app.on_event("shutdown")
+async def stop_diagnostics():
+    """진단 도구 중지"""
+    stop_watchdog()
+
+
+def _warm_up_clients():
+    """무거운 SDK import와 클라이언트 생성을 미리 수행 (실패해도 첫 요청 시 다시 시도됨)"""
+    try:
+        get_storage()
+    except Exception as e:
+        print(f"⚠️  저장소 워밍업 실패: {e}")
+    # AI 클라이언트는 실패 상태를 스스로 기록하므로 /readyz에서 확인 가능
+    get_ai_client().initialize()
+
+
+@app.on_event("startup")
+async def warm_up_clients():
+    """
+    Firestore 클라이언트 생성과 Vertex AI 클라이언트 초기화를 백그라운드 스레드에서 진행
+    
+    모듈 import 시점에는 SDK를 불러오지 않으므로 서버는 바로 요청을 받을 수 있고,
+    첫 요청 전에 워밍업이 끝나면 해당 비용도 사라집니다. WARMUP_ON_STARTUP=false로 끌 수 있습니다.
+    """
+    if os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true":
+        asyncio.get_running_loop().run_in_executor(None, _warm_up_clients)
+
+
+@app.on_event("startup")
+async def start_job_workers():
+    """AI 백그라운드 작업 워커 시작 (이전 인스턴스의 미완료 작업도 이어서 처리)"""
+    await get_job_queue().start()
+
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    """AI 백그라운드 작업 워커 중지"""
+    await get_job_queue().stop()
+
+
 # 라우터 등록
 app.include_router(blocks.router)
 app.include_router(projects.router)
 app.include_router(categories.router)
 app.include_router(dependencies.router)
 app.include_router(ai.router)
+app.include_router(analysis.router)
+app.include_router(jobs.router)
+app.include_router(admin.router)
+app.include_router(health.router)
 
 # 정적 파일 서빙 (프로덕션 환경) - API 라우트 이후에 정의
 static_dir = os.path.join(os.path.dirname(__file__), "static")
@@ -0,0 +1,29 @@
+"""
+관리자 전용 엔드포인트 인증
+
+환경 변수 ADMIN_TOKEN이 설정된 경우에만 관리자 기능이 활성화되며,
+요청은 X-Admin-Token 헤더로 같은 토큰을 보내야 합니다.
+"""
+import hmac
+import os
+from typing import Optional
+
+from fastapi import Header
+
+from exceptions import ForbiddenError
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+def is_valid_admin_token(token: Optional[str]) -> bool:
+    """관리자 토큰 검증 (ADMIN_TOKEN 미설정 시 항상 False)"""
+    expected = os.getenv("ADMIN_TOKEN", "")
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token, expected)
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """관리자 토큰을 요구하는 FastAPI 의존성"""
+    if not is_valid_admin_token(x_admin_token):
+        raise ForbiddenError("관리자 토큰이 필요합니다")
@@ -12,7 +12,9 @@ from exceptions import (
     ValidationError,
     AIServiceError,
     StorageError,
+    ForbiddenError,
 )
+import math
 import traceback
 import logging
 
@@ -22,12 +24,16 @@ logger = logging.getLogger(__name__)
 async def base_api_exception_handler(request: Request, exc: BaseAPIException) -> JSONResponse:
     """BaseAPIException 처리 핸들러"""
     logger.error(f"API 오류 발생: {exc.message}", exc_info=exc)
+    # 일시적 오류(503)는 클라이언트가 언제 다시 시도하면 되는지 알려줌
+    retry_after = getattr(exc, "retry_after", None)
+    headers = {"Retry-After": str(max(1, math.ceil(retry_after)))} if retry_after else None
     return JSONResponse(
         status_code=exc.status_code,
         content={
             "detail": exc.detail,
             "error": exc.message,
-        }
+        },
+        headers=headers,
     )
 
 
@@ -92,6 +98,7 @@ def register_error_handlers(app):
     app.add_exception_handler(ValidationError, base_api_exception_handler)
     app.add_exception_handler(AIServiceError, base_api_exception_handler)
     app.add_exception_handler(StorageError, base_api_exception_handler)
+    app.add_exception_handler(ForbiddenError, base_api_exception_handler)
     app.add_exception_handler(BaseAPIException, base_api_exception_handler)
     
     # FastAPI 기본 예외 핸들러
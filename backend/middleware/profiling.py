@@ -0,0 +1,71 @@
+"""
+요청 단위 프로파일링 미들웨어
+
+관리자 토큰(X-Admin-Token)과 함께 X-Profile 헤더 또는 profile 쿼리 파라미터
+(값: cprofile | sample)를 보낸 요청만 프로파일링합니다.
+그 외 요청은 헤더 확인만 하고 그대로 통과하므로 프로파일링이 꺼져 있을 때 오버헤드가 없습니다.
+결과 ID는 응답의 X-Profile-Id 헤더로 반환되며 /api/admin/profiles/{id}에서 내려받을 수 있습니다.
+"""
+from typing import Optional
+from urllib.parse import parse_qs
+
+from diagnostics.profiler import PROFILE_MODES, get_profiler
+from middleware.admin_auth import is_valid_admin_token
+
+
+def _get_header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _requested_mode(scope) -> Optional[str]:
+    """요청이 지정한 프로파일링 모드 (요청하지 않았으면 None)"""
+    mode = _get_header(scope, b"x-profile")
+    if mode is None and b"profile=" in scope.get("query_string", b""):
+        values = parse_qs(scope["query_string"].decode("latin-1")).get("profile")
+        mode = values[0] if values else None
+    if mode is None:
+        return None
+    mode = mode.lower()
+    return mode if mode in PROFILE_MODES else "cprofile"
+
+
+class ProfilingMiddleware:
+    """관리자가 요청한 경우에만 해당 요청을 프로파일링하는 ASGI 미들웨어"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = _requested_mode(scope)
+        if mode is None or not is_valid_admin_token(_get_header(scope, b"x-admin-token")):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = get_profiler()
+        session = profiler.start(mode)
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = None
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", session["id"].encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop(session, scope.get("method", ""), scope.get("path", ""), status_code)
@@ -0,0 +1,63 @@
+"""
+진행 중인 요청 추적 미들웨어
+
+이벤트 루프 워치독처럼 다른 스레드에서 "지금 어떤 라우트가 루프를 잡고 있는지"
+알아야 하는 진단 도구를 위해, 요청을 처리 중인 asyncio Task와 ASGI scope를 기록합니다.
+BaseHTTPMiddleware는 핸들러를 별도 Task에서 실행하므로 순수 ASGI 미들웨어로 구현합니다.
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+# asyncio.Task -> 요청 정보
+_active_requests: Dict[asyncio.Task, dict] = {}
+
+
+def _describe(info: dict) -> dict:
+    """요청 정보를 직렬화 가능한 형태로 변환"""
+    scope = info["scope"]
+    endpoint = scope.get("endpoint")
+    return {
+        "method": scope.get("method", ""),
+        "path": scope.get("path", ""),
+        "endpoint": getattr(endpoint, "__qualname__", None) if endpoint else None,
+        "elapsed_ms": round((time.perf_counter() - info["started_at"]) * 1000, 1),
+    }
+
+
+def get_running_request(loop: asyncio.AbstractEventLoop) -> Optional[dict]:
+    """
+    주어진 루프에서 현재 실행 중인 Task가 처리하는 요청 정보 반환
+
+    다른 스레드에서 호출해도 됩니다 (딕셔너리 조회만 수행).
+    """
+    try:
+        task = asyncio.current_task(loop)
+    except RuntimeError:
+        return None
+    info = _active_requests.get(task) if task else None
+    return _describe(info) if info else None
+
+
+def get_active_requests() -> List[dict]:
+    """처리 중인 모든 요청 정보 반환"""
+    return [_describe(info) for info in list(_active_requests.values())]
+
+
+class RequestTrackerMiddleware:
+    """요청을 처리하는 동안 Task와 scope를 등록하는 ASGI 미들웨어"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        _active_requests[task] = {"scope": scope, "started_at": time.perf_counter()}
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _active_requests.pop(task, None)
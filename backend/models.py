@@ -71,3 +71,11 @@ class AIGenerateBlocksRequest(BaseModel):
 class AIArrangeBlocksRequest(BaseModel):
     block_ids: List[str]  # 배치할 블록 ID 리스트
 
+
+class AIFeedbackRequest(BaseModel):
+    focus: Optional[str] = None  # 피드백에서 집중할 영역 (블록이 많은 보드는 이와 관련된 블록 위주로 분석)
+
+
+class AutoArrangeRequest(BaseModel):
+    block_ids: Optional[List[str]] = None  # 배치할 블록 ID 리스트 (생략 시 전체 블록)
+
@@ -0,0 +1,149 @@
+"""
+관리자 진단 API 엔드포인트
+"""
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends
+from fastapi.responses import FileResponse
+from diagnostics import get_watchdog, get_profiler, get_memory_profiler
+from diagnostics.memory_profiler import GROUP_BY_OPTIONS
+from ai_cache import get_ai_cache
+from ai_prompt import get_prompt_stats
+from ai_router import get_model_router
+from ai_operations import ai_single_flight
+from ai_jobs import get_job_queue
+from exceptions import NotFoundError, ValidationError
+from middleware.admin_auth import require_admin
+from middleware.request_tracker import get_active_requests
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/watchdog")
+async def get_watchdog_stats():
+    """이벤트 루프 워치독 상태 및 최근 stall 기록 조회"""
+    watchdog = get_watchdog()
+    if watchdog is None:
+        return {"enabled": False}
+    return {"enabled": True, **watchdog.get_stats()}
+
+
+@router.get("/requests")
+async def get_in_flight_requests():
+    """현재 처리 중인 요청 목록 조회"""
+    return {"requests": get_active_requests()}
+
+
+@router.get("/profiles")
+async def get_profiles():
+    """저장된 요청 프로파일 목록 조회"""
+    return {"profiles": get_profiler().list_profiles()}
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str):
+    """요청 프로파일 결과 파일(.pstats 또는 .folded) 다운로드"""
+    file_path = get_profiler().get_profile_path(profile_id)
+    if file_path is None:
+        raise NotFoundError("프로파일", profile_id)
+    return FileResponse(file_path, filename=os.path.basename(file_path), media_type="application/octet-stream")
+
+
+def _validate_group_by(group_by: str):
+    if group_by not in GROUP_BY_OPTIONS:
+        raise ValidationError(f"group_by는 {', '.join(GROUP_BY_OPTIONS)} 중 하나여야 합니다")
+
+
+@router.get("/memory")
+async def get_memory_status():
+    """메모리 추적 상태 및 RSS 조회"""
+    return get_memory_profiler().get_status()
+
+
+@router.post("/memory/start")
+async def start_memory_tracing(frames: int = 10):
+    """tracemalloc 할당 추적 시작"""
+    if frames < 1:
+        raise ValidationError("frames는 1 이상이어야 합니다")
+    return get_memory_profiler().start(frames)
+
+
+@router.post("/memory/stop")
+async def stop_memory_tracing():
+    """tracemalloc 할당 추적 중지"""
+    return get_memory_profiler().stop()
+
+
+@router.post("/memory/snapshots")
+async def take_memory_snapshot(label: Optional[str] = None):
+    """현재 시점 메모리 스냅샷 저장"""
+    try:
+        return {"snapshot": get_memory_profiler().take_snapshot(label)}
+    except ValueError as e:
+        raise ValidationError(str(e))
+
+
+@router.get("/memory/top")
+async def get_memory_top(limit: int = 20, group_by: str = "lineno", snapshot_id: Optional[str] = None):
+    """할당량 상위 위치 조회 (snapshot_id 생략 시 현재 시점)"""
+    _validate_group_by(group_by)
+    try:
+        return {"stats": get_memory_profiler().top(limit, group_by, snapshot_id)}
+    except ValueError as e:
+        raise ValidationError(str(e))
+    except KeyError:
+        raise NotFoundError("스냅샷", snapshot_id)
+
+
+@router.get("/memory/diff")
+async def get_memory_diff(from_id: str, to_id: Optional[str] = None, limit: int = 20, group_by: str = "lineno"):
+    """두 스냅샷 사이 할당 증가량 조회 (to_id 생략 시 현재 시점과 비교)"""
+    _validate_group_by(group_by)
+    try:
+        return {"stats": get_memory_profiler().diff(from_id, to_id, limit, group_by)}
+    except ValueError as e:
+        raise ValidationError(str(e))
+    except KeyError as e:
+        raise NotFoundError("스냅샷", e.args[0])
+
+
+@router.get("/ai-cache")
+async def get_ai_cache_stats():
+    """AI 응답 캐시 지표 (적중/미스, 항목 수, 용량) 조회"""
+    cache = get_ai_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.get_stats()}
+
+
+@router.delete("/ai-cache")
+async def clear_ai_cache():
+    """AI 응답 캐시 비우기"""
+    cache = get_ai_cache()
+    if cache is not None:
+        cache.clear()
+    return {"message": "AI 캐시를 비웠습니다"}
+
+
+@router.get("/ai-prompts")
+async def get_ai_prompt_stats():
+    """AI 호출별 프롬프트/응답 토큰 수 지표 조회"""
+    return {"functions": get_prompt_stats().get_stats()}
+
+
+@router.get("/ai-routing")
+async def get_ai_routing_stats():
+    """AI 작업별 모델 선택 규칙, 모델별 호출/실패/지연 지표, 최근 선택 기록 조회"""
+    return get_model_router().get_stats()
+
+
+@router.get("/ai-coalescing")
+async def get_ai_coalescing_stats():
+    """동일 AI 요청 합치기 지표 (실행/합류 횟수, 진행 중인 키) 조회"""
+    return {**ai_single_flight.stats, "in_flight": ai_single_flight.in_flight_keys()}
+
+
+@router.get("/ai-jobs")
+async def get_ai_job_queue_status():
+    """AI 백그라운드 작업 워커 상태 (대기열 길이, 처리 지표)"""
+    return get_job_queue().get_status()
@@ -1,221 +1,99 @@
 """
 AI 관련 API 엔드포인트
 """
+import asyncio
+from typing import Optional
 from fastapi import APIRouter
-from models import AIGenerateBlocksRequest, AIArrangeBlocksRequest, BlockCreate
+from fastapi.responses import StreamingResponse
+from models import AIGenerateBlocksRequest, AIArrangeBlocksRequest, AIFeedbackRequest, BlockCreate
 from storage import get_storage
-from ai_service import generate_blocks, arrange_blocks, generate_feedback, init_vertex_ai
-from exceptions import AIServiceError, ValidationError
+from ai_service import stream_generate_blocks
+from ai_client import get_ai_client
+from ai_operations import run_operation
+from exceptions import AIServiceError
+from utils import format_sse_event
 
 router = APIRouter(prefix="/api/projects/{project_id}/ai", tags=["ai"])
 
-# 저장소 인스턴스 가져오기
-storage = get_storage()
-
 
 @router.post("/generate-blocks")
 async def ai_generate_blocks(project_id: str, request: AIGenerateBlocksRequest):
     """AI를 사용하여 블록 생성"""
+    return await run_operation("generate-blocks", project_id, request)
+
+
+@router.post("/generate-blocks/stream")
+async def ai_generate_blocks_stream(project_id: str, request: AIGenerateBlocksRequest):
+    """
+    AI를 사용하여 블록 생성 (SSE 스트리밍)
+
+    모델이 블록을 하나 완성할 때마다 저장하고 바로 전송합니다.
+    - event: block  / data: 저장된 블록
+    - event: done   / data: {"blocks_count", "project_analysis"}
+    - event: error  / data: {"message"}
+    """
+    storage = get_storage()
+    # 스트림 시작 전에 준비 상태를 확인하여 실패는 일반 오류 응답으로 반환
     try:
-        # Vertex AI 초기화
-        try:
-            if not init_vertex_ai():
-                raise AIServiceError("Vertex AI 초기화 실패")
-        except FileNotFoundError as e:
-            raise AIServiceError(f"AI 블록 생성 실패: {str(e)}")
-        except Exception as e:
-            raise AIServiceError(f"AI 블록 생성 실패: {str(e)}")
-        
-        # 기존 카테고리 가져오기
-        existing_categories = storage.get_categories(project_id)
-        
-        # AI로 블록 생성
-        generate_result = generate_blocks(
-            project_overview=request.project_overview,
-            current_status=request.current_status,
-            problems=request.problems,
-            additional_info=request.additional_info,
-            existing_categories=existing_categories
-        )
-        
-        # 결과에서 blocks와 project_analysis 추출
-        if isinstance(generate_result, dict):
-            generated_blocks = generate_result.get("blocks", [])
-            project_analysis = generate_result.get("project_analysis")
-        else:
-            # 레거시 호환성 (리스트로 반환된 경우)
-            generated_blocks = generate_result
-            project_analysis = None
-        
-        # project_analysis를 프로젝트에 저장
-        if project_analysis:
-            project_updates = {"project_analysis": project_analysis}
-            storage.update_project(project_id, project_updates)
-            print(f"✅ 프로젝트 분석 저장 완료: {len(project_analysis)} 문자")
-        
-        # 생성된 블록들을 저장
-        created_blocks = []
-        for block_data in generated_blocks:
-            block_create = BlockCreate(
-                title=block_data.get("title", ""),
-                description=block_data.get("description", ""),
-                level=-1,  # 기본값: 좌측 리스트에 표시
-                order=0,
-                category=block_data.get("category")
-            )
-            
-            created_block = storage.create_block(project_id, block_create.dict())
-            created_blocks.append(created_block)
-        
-        # 새로 생성된 카테고리들을 프로젝트 카테고리 목록에 추가
-        new_categories = set()
-        for block in created_blocks:
-            if block.get("category"):
-                new_categories.add(block["category"])
-        
-        if new_categories:
-            updated_categories = list(set(existing_categories) | new_categories)
-            storage.update_categories(project_id, updated_categories)
-        
-        return {"blocks": created_blocks}
-    except ValidationError:
-        raise
-    except AIServiceError:
-        raise
+        await get_ai_client().ensure_ready_async()
     except Exception as e:
         raise AIServiceError(f"AI 블록 생성 실패: {str(e)}")
+    # 저장소 호출은 블로킹이므로 스트리밍 중에도 CRUD 요청이 처리되도록 이벤트 루프 밖에서 실행
+    loop = asyncio.get_running_loop()
+    existing_categories = await loop.run_in_executor(None, storage.get_categories, project_id)
+
+    async def event_stream():
+        new_categories = set()
+        try:
+            async for event, data in stream_generate_blocks(
+                project_overview=request.project_overview,
+                current_status=request.current_status,
+                problems=request.problems,
+                additional_info=request.additional_info,
+                existing_categories=existing_categories
+            ):
+                if event == "block":
+                    block_create = BlockCreate(
+                        title=data.get("title", ""),
+                        description=data.get("description", ""),
+                        level=-1,  # 기본값: 좌측 리스트에 표시
+                        order=0,
+                        category=data.get("category")
+                    )
+                    created_block = await loop.run_in_executor(None, storage.create_block, project_id, block_create.dict())
+                    if created_block.get("category"):
+                        new_categories.add(created_block["category"])
+                    yield format_sse_event("block", created_block)
+                else:
+                    project_analysis = data.get("project_analysis")
+                    if project_analysis:
+                        await loop.run_in_executor(None, storage.update_project, project_id, {"project_analysis": project_analysis})
+                        print(f"✅ 프로젝트 분석 저장 완료: {len(project_analysis)} 문자")
+                    yield format_sse_event("done", data)
+        except Exception as e:
+            print(f"❌ AI 블록 스트리밍 생성 실패: {e}")
+            yield format_sse_event("error", {"message": f"AI 블록 생성 실패: {str(e)}"})
+        finally:
+            # 중간에 실패하거나 연결이 끊겨도 이미 저장된 블록의 카테고리는 반영 (연결 종료로 취소되어도 저장은 끝까지 수행)
+            if new_categories - set(existing_categories):
+                await asyncio.shield(loop.run_in_executor(
+                    None, storage.update_categories, project_id, list(set(existing_categories) | new_categories)
+                ))
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/arrange-blocks")
 async def ai_arrange_blocks(project_id: str, request: AIArrangeBlocksRequest):
     """AI를 사용하여 블록들을 적절한 레벨에 배치"""
-    try:
-        # Vertex AI 초기화
-        try:
-            if not init_vertex_ai():
-                raise AIServiceError("Vertex AI 초기화 실패")
-        except FileNotFoundError as e:
-            raise AIServiceError(f"AI 블록 배치 실패: {str(e)}")
-        except Exception as e:
-            raise AIServiceError(f"AI 블록 배치 실패: {str(e)}")
-        
-        # 배치할 블록들 가져오기
-        all_blocks = storage.get_all_blocks(project_id)
-        
-        # 요청된 블록 ID들만 필터링
-        blocks_to_arrange = [block for block in all_blocks if block.get("id") in request.block_ids]
-        
-        if not blocks_to_arrange:
-            raise ValidationError("배치할 블록을 찾을 수 없습니다")
-        
-        # 프로젝트에서 저장된 project_analysis 가져오기
-        project = storage.get_project(project_id)
-        project_analysis = project.get("project_analysis") if project else None
-        
-        # AI로 블록 배치 (저장된 project_analysis 사용)
-        arranged_blocks = arrange_blocks(
-            blocks_to_arrange,
-            project_overview=project_analysis,  # generate_blocks에서 생성된 project_analysis 사용
-            current_status=None,
-            problems=None,
-            additional_info=None
-        )
-        
-        # 배치 이유 추출 (첫 번째 블록에서)
-        arrangement_reasoning = ""
-        if arranged_blocks and len(arranged_blocks) > 0:
-            arrangement_reasoning = arranged_blocks[0].get("arrangement_reasoning", "")
-            print(f"🔍 추출된 배치 이유 길이: {len(arrangement_reasoning)} 문자")
-            if arrangement_reasoning:
-                print(f"🔍 배치 이유 일부: {arrangement_reasoning[:200]}")
-        
-        # 블록들의 레벨 업데이트
-        updated_blocks = []
-        for arranged_block in arranged_blocks:
-            block_id = arranged_block.get("id")
-            new_level = arranged_block.get("level", 0)
-            
-            # 블록 업데이트
-            updates = {"level": new_level}
-            updated_block = storage.update_block(project_id, block_id, updates)
-            updated_blocks.append(updated_block)
-        
-        # 배치 이유를 프로젝트에 저장 (JSON 형식)
-        if arrangement_reasoning:
-            import json
-            reasoning_data = {
-                "type": "arrangement",
-                "content": arrangement_reasoning
-            }
-            project_updates = {"arrangement_reasoning": json.dumps(reasoning_data, ensure_ascii=False)}
-            storage.update_project(project_id, project_updates)
-            print(f"✅ 배치 이유 프로젝트에 저장 완료: {len(arrangement_reasoning)} 문자")
-        
-        print(f"🔍 API 응답에 포함할 reasoning: {len(arrangement_reasoning)} 문자")
-        return {"blocks": updated_blocks, "reasoning": arrangement_reasoning}
-    except ValidationError:
-        raise
-    except AIServiceError:
-        raise
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise AIServiceError(f"AI 블록 배치 실패: {str(e)}")
+    return await run_operation("arrange-blocks", project_id, request)
 
 
 @router.post("/feedback")
-async def ai_feedback(project_id: str):
-    """AI를 사용하여 현재 블록 배치에 대한 피드백 생성"""
-    try:
-        # Vertex AI 초기화
-        try:
-            if not init_vertex_ai():
-                raise AIServiceError("Vertex AI 초기화 실패")
-        except FileNotFoundError as e:
-            raise AIServiceError(f"AI 피드백 생성 실패: {str(e)}")
-        except Exception as e:
-            raise AIServiceError(f"AI 피드백 생성 실패: {str(e)}")
-        
-        # 모든 블록 가져오기
-        all_blocks = storage.get_all_blocks(project_id)
-        
-        if not all_blocks:
-            raise ValidationError("분석할 블록이 없습니다")
-        
-        # 프로젝트에서 저장된 project_analysis 가져오기
-        project = storage.get_project(project_id)
-        project_analysis = project.get("project_analysis") if project else None
-        
-        # AI로 피드백 생성
-        feedback_result = generate_feedback(
-            blocks=all_blocks,
-            project_analysis=project_analysis
-        )
-        
-        feedback_content = feedback_result.get("feedback", "")
-        thinking_process = feedback_result.get("thinking_process", {})
-        
-        # 피드백을 프로젝트에 저장 (JSON 형식)
-        if feedback_content:
-            import json
-            feedback_data = {
-                "type": "feedback",
-                "content": feedback_content
-            }
-            project_updates = {"arrangement_reasoning": json.dumps(feedback_data, ensure_ascii=False)}
-            storage.update_project(project_id, project_updates)
-            print(f"✅ 피드백 프로젝트에 저장 완료: {len(feedback_content)} 문자")
-        
-        return {
-            "feedback": feedback_content,
-            "thinking_process": thinking_process
-        }
-    except ValidationError:
-        raise
-    except AIServiceError:
-        raise
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise AIServiceError(f"AI 피드백 생성 실패: {str(e)}")
-
+async def ai_feedback(project_id: str, request: Optional[AIFeedbackRequest] = None):
+    """AI를 사용하여 현재 블록 배치에 대한 피드백 생성 (focus: 집중할 영역, 선택사항)"""
+    return await run_operation("feedback", project_id, request)
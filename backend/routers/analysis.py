@@ -0,0 +1,192 @@
+"""
+블록 배치/구조 분석 API 엔드포인트 (AI 없이 의존성 그래프로 계산)
+"""
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Query
+from models import AutoArrangeRequest
+from storage import get_storage
+from ai_operations import run_auto_arrange
+from analysis import (
+    blocks_fingerprint, critical_path, get_analysis_cache, get_reachability_indexes, layout_fingerprint,
+    project_centrality, reduce_crossings, top_blocks,
+)
+from exceptions import BlockNotFoundError, StorageError
+
+router = APIRouter(prefix="/api/projects/{project_id}", tags=["analysis"])
+
+
+@router.post("/arrange/auto")
+async def auto_arrange_blocks(project_id: str, request: Optional[AutoArrangeRequest] = None):
+    """
+    의존성 기반 자동 배치 (최장 경로 계층화 -> 레벨 0~4)
+
+    AI 배치와 같은 방식으로 블록 레벨과 배치 이유를 저장합니다. block_ids를 생략하면 전체 블록을 배치합니다.
+    """
+    # 블록이 많으면 계산과 저장에 시간이 걸리므로 이벤트 루프 밖에서 실행
+    return await asyncio.get_running_loop().run_in_executor(
+        None, run_auto_arrange, project_id, request or AutoArrangeRequest()
+    )
+
+
+def _reorder_blocks(project_id: str) -> dict:
+    """교차가 적은 레벨 안 순서를 계산해 바뀐 블록만 한 번에 저장 (보드가 그대로면 캐시 사용)"""
+    try:
+        storage = get_storage()
+        blocks = storage.get_all_blocks(project_id)
+        cache = get_analysis_cache()
+        cached = cache.get(project_id, "order", layout_fingerprint(blocks))
+        if cached is not None:
+            return {**cached, "updated": 0, "cached": True}
+
+        result = reduce_crossings(blocks)
+        current_orders = {block["id"]: block.get("order") for block in blocks}
+        changes = {
+            block_id: {"order": order}
+            for block_id, order in result["orders"].items()
+            if current_orders.get(block_id) != order
+        }
+        updated = storage.batch_update_blocks(project_id, changes) if changes else 0
+        print(f"🪢 블록 순서 정리: 교차 {result['crossings_before']} -> {result['crossings_after']}, 저장 {updated}개")
+
+        # 저장한 뒤의 보드를 기준으로 캐시 (다시 요청하면 계산과 쓰기 없이 반환)
+        reordered = [{**block, "order": result["orders"].get(block["id"], block.get("order"))} for block in blocks]
+        cache.set(project_id, "order", layout_fingerprint(reordered), result)
+        return {**result, "updated": updated, "cached": False}
+    except Exception as e:
+        raise StorageError(f"블록 순서 정리 실패: {str(e)}")
+
+
+@router.post("/layout/order")
+async def reorder_blocks(project_id: str):
+    """
+    레벨 안 블록 순서를 의존성 연결선 교차가 적도록 정리 (Sugiyama 방식 barycenter 정렬)
+
+    바뀐 블록의 order만 한 번에 저장하고, 보드(레벨/순서/의존성)가 바뀌지 않았으면 저장된 결과를 그대로 반환합니다.
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, _reorder_blocks, project_id)
+
+
+def _critical_path(project_id: str, weight_field: Optional[str]) -> dict:
+    """임계 경로 계산 (보드의 레벨/의존성/제목/가중치가 그대로면 캐시 사용)"""
+    try:
+        blocks = get_storage().get_all_blocks(project_id)
+        fields = ['level', 'dependencies', 'title'] + ([weight_field] if weight_field else [])
+        fingerprint = blocks_fingerprint(blocks, fields)
+        cache = get_analysis_cache()
+        kind = f"critical_path:{weight_field or ''}"
+        cached = cache.get(project_id, kind, fingerprint)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        result = critical_path(blocks, weight_field)
+        blocks_by_id = {block["id"]: block for block in blocks}
+        response = {
+            **result,
+            "weight_field": weight_field,
+            # 경로는 화면/보고서에서 바로 쓸 수 있도록 제목과 레벨을 함께 제공
+            "critical_path": [
+                {
+                    "id": block_id,
+                    "title": blocks_by_id[block_id].get("title", ""),
+                    "level": blocks_by_id[block_id].get("level"),
+                    "earliest_finish": result["blocks"][block_id]["earliest_finish"],
+                }
+                for block_id in result["critical_path"]
+            ],
+            "cycle_edges": [list(edge) for edge in result["cycle_edges"]],
+        }
+        cache.set(project_id, kind, fingerprint, response)
+        return {**response, "cached": False}
+    except Exception as e:
+        raise StorageError(f"임계 경로 분석 실패: {str(e)}")
+
+
+@router.get("/analysis/critical-path")
+async def get_critical_path(
+    project_id: str,
+    weight_field: Optional[str] = Query(None, description="블록 가중치로 쓸 숫자 필드 (생략 시 블록마다 1)"),
+):
+    """
+    의존성 그래프의 임계 경로 (레벨 4 목표 블록까지 가장 긴 의존성 사슬, 여유 없는 블록)
+
+    블록별 earliest_finish/latest_finish/slack도 함께 반환합니다. 보드가 바뀌지 않았으면 저장된 결과를 반환합니다.
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, _critical_path, project_id, weight_field)
+
+
+def _centrality(project_id: str, top: int) -> dict:
+    """구조 지표 계산 후 지표별 상위 블록 정리 (보드의 레벨/의존성이 그대로면 캐시 사용)"""
+    try:
+        blocks = get_storage().get_all_blocks(project_id)
+        result, cached = project_centrality(project_id, blocks)
+    except Exception as e:
+        raise StorageError(f"구조 지표 분석 실패: {str(e)}")
+
+    titles = {block["id"]: block.get("title", "") for block in blocks}
+
+    def ranked(metric: str, ascending: bool = False, where=None):
+        entries = top_blocks(result, metric, top, ascending, where)
+        return [{**entry, "title": titles.get(entry["id"], "")} for entry in entries]
+
+    return {
+        **result,
+        "top": {
+            "bottlenecks": ranked("betweenness"),
+            # 후행 블록이 없는 블록의 PageRank는 기본 점수뿐이므로 제외
+            "foundations": ranked("pagerank", where=lambda stats: stats["fan_out"] > 0),
+            "hubs": ranked("fan_out"),
+            "integrators": ranked("fan_in"),
+            # 음수: 선행 블록보다 낮거나 같은 레벨 (의존성 위반)
+            "level_skew": ranked("level_skew", ascending=True, where=lambda stats: stats["level_skew"] < 0),
+        },
+        "cached": cached,
+    }
+
+
+@router.get("/analysis/centrality")
+async def get_centrality(
+    project_id: str,
+    top: int = Query(10, ge=1, le=100, description="지표별 상위 블록 수"),
+):
+    """
+    블록 구조 지표 (병목 betweenness, 기반 PageRank, fan-in/fan-out, 레벨 어긋남)
+
+    블록별 지표 전체와 지표별 상위 블록을 반환합니다. 보드가 바뀌지 않았으면 저장된 결과를 반환합니다.
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, _centrality, project_id, top)
+
+
+async def _reachability_index(project_id: str, block_id: str):
+    """프로젝트 도달 가능성 색인 (없거나 만료되었거나 모르는 블록이면 이벤트 루프 밖에서 새로 만듦)"""
+    indexes = get_reachability_indexes()
+    index = indexes.peek(project_id)
+    if index is None or block_id not in index:
+        # 없는 블록 ID로 요청할 때마다 색인을 다시 만들지 않도록 블록 하나만 먼저 확인
+        if index is not None and get_storage().get_block(project_id, block_id) is None:
+            raise BlockNotFoundError(block_id)
+        try:
+            index = await asyncio.get_running_loop().run_in_executor(
+                None, indexes.build, project_id, lambda: get_storage().get_all_blocks(project_id)
+            )
+        except Exception as e:
+            raise StorageError(f"도달 가능성 색인 생성 실패: {str(e)}")
+    if block_id not in index:
+        raise BlockNotFoundError(block_id)
+    return index
+
+
+@router.get("/blocks/{block_id}/impact")
+async def get_block_impact(project_id: str, block_id: str):
+    """이 블록에 (전이적으로) 의존하는 블록 (이 블록이 늦어지면 영향을 받는 블록)"""
+    index = await _reachability_index(project_id, block_id)
+    block_ids = index.impact(block_id)
+    return {"block_id": block_id, "count": len(block_ids), "block_ids": block_ids}
+
+
+@router.get("/blocks/{block_id}/prerequisites")
+async def get_block_prerequisites(project_id: str, block_id: str):
+    """이 블록이 (전이적으로) 의존하는 블록 (먼저 끝나야 하는 블록)"""
+    index = await _reachability_index(project_id, block_id)
+    block_ids = index.all_prerequisites(block_id)
+    return {"block_id": block_id, "count": len(block_ids), "block_ids": block_ids}
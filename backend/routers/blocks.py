@@ -5,6 +5,8 @@ from fastapi import APIRouter
 from models import BlockCreate, BlockUpdate
 from storage import get_storage
 from exceptions import BlockNotFoundError, StorageError
+from analysis import get_reachability_indexes
+from ai_retrieval import get_block_text_indexes
 
 router = APIRouter(prefix="/api/projects/{project_id}/blocks", tags=["blocks"])
 
@@ -27,6 +29,7 @@ async def create_block(project_id: str, block: BlockCreate):
         storage = get_storage()
         block_data = block.dict()
         created_block = storage.create_block(project_id, block_data)
+        get_block_text_indexes().upsert(project_id, created_block)
         return {"block": created_block}
     except Exception as e:
         raise StorageError(f"블록 생성 실패: {str(e)}")
@@ -43,6 +46,7 @@ async def update_block(project_id: str, block_id: str, block_update: BlockUpdate
         if updated_block is None:
             raise BlockNotFoundError(block_id)
         
+        get_block_text_indexes().upsert(project_id, updated_block)
         return {"block": updated_block}
     except BlockNotFoundError:
         raise
@@ -60,6 +64,8 @@ async def delete_block(project_id: str, block_id: str):
         if not success:
             raise BlockNotFoundError(block_id)
         
+        get_reachability_indexes().invalidate(project_id)
+        get_block_text_indexes().remove(project_id, block_id)
         return {"message": "블록이 삭제되었습니다", "block_id": block_id}
     except BlockNotFoundError:
         raise
@@ -5,6 +5,7 @@ from fastapi import APIRouter
 from models import DependencyRequest
 from storage import get_storage
 from exceptions import BlockNotFoundError, StorageError
+from analysis import get_reachability_indexes
 
 router = APIRouter(prefix="/api/projects/{project_id}", tags=["dependencies"])
 
@@ -22,6 +23,7 @@ async def add_dependency(project_id: str, block_id: str, request: DependencyRequ
         if request.dependency_id not in dependencies:
             dependencies.append(request.dependency_id)
             storage.update_block(project_id, block_id, {"dependencies": dependencies})
+            get_reachability_indexes().add_dependency(project_id, block_id, request.dependency_id)
         
         # 색상이 제공된 경우 의존성 색상 저장
         if request.color:
@@ -48,6 +50,7 @@ async def remove_dependency(project_id: str, block_id: str, dependency_id: str):
         if dependency_id in dependencies:
             dependencies.remove(dependency_id)
             storage.update_block(project_id, block_id, {"dependencies": dependencies})
+            get_reachability_indexes().remove_dependency(project_id, block_id, dependency_id)
             # 의존성 색상도 제거
             storage.remove_dependency_color(project_id, block_id, dependency_id)
         
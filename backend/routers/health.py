@@ -0,0 +1,45 @@
+"""
+헬스 체크 API 엔드포인트
+"""
+import os
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from ai_client import get_ai_client, AIClientManager
+from storage import is_storage_ready
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/healthz")
+async def healthz():
+    """프로세스 생존 여부 (항상 200)"""
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz():
+    """
+    요청을 받을 준비가 되었는지 확인
+
+    저장소가 생성되고 AI 클라이언트 초기화 시도가 끝나면 200을 반환합니다.
+    AI 초기화에 실패해도 CRUD는 동작하므로 기본적으로 준비 완료로 보지만,
+    READYZ_REQUIRE_AI=true 이면 AI가 준비될 때까지 503을 반환합니다.
+    """
+    ai_status = get_ai_client().get_status()
+    storage_ready = is_storage_ready()
+    require_ai = os.getenv("READYZ_REQUIRE_AI", "false").lower() == "true"
+
+    if require_ai:
+        ai_ok = ai_status["state"] == AIClientManager.READY
+    else:
+        ai_ok = ai_status["state"] in (AIClientManager.READY, AIClientManager.FAILED)
+
+    ready = storage_ready and ai_ok
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "storage": {"ready": storage_ready},
+            "ai": ai_status,
+        },
+    )
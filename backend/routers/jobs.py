@@ -0,0 +1,100 @@
+"""
+AI 백그라운드 작업 API 엔드포인트
+
+오래 걸리는 AI 작업을 요청 시간 제한(Cloud Run, 프록시)과 분리하기 위해
+작업을 등록하고 작업 ID로 상태와 결과를 조회합니다.
+"""
+import os
+from typing import Optional
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from models import AIGenerateBlocksRequest, AIArrangeBlocksRequest, AIFeedbackRequest
+from storage import get_storage
+from ai_jobs import get_job_queue, TERMINAL_STATUSES
+from exceptions import NotFoundError, StorageError
+from utils import format_sse_event
+
+router = APIRouter(prefix="/api/projects/{project_id}/ai/jobs", tags=["ai-jobs"])
+
+
+def _enqueue(kind: str, project_id: str, request=None) -> dict:
+    try:
+        job = get_job_queue().enqueue(kind, project_id, request)
+    except Exception as e:
+        raise StorageError(f"AI 작업 등록 실패: {str(e)}")
+    return {"job": job}
+
+
+@router.post("/generate-blocks", status_code=202)
+async def enqueue_generate_blocks(project_id: str, request: AIGenerateBlocksRequest):
+    """AI 블록 생성 작업 등록"""
+    return _enqueue("generate-blocks", project_id, request)
+
+
+@router.post("/arrange-blocks", status_code=202)
+async def enqueue_arrange_blocks(project_id: str, request: AIArrangeBlocksRequest):
+    """AI 블록 배치 작업 등록"""
+    return _enqueue("arrange-blocks", project_id, request)
+
+
+@router.post("/feedback", status_code=202)
+async def enqueue_feedback(project_id: str, request: Optional[AIFeedbackRequest] = None):
+    """AI 피드백 생성 작업 등록"""
+    return _enqueue("feedback", project_id, request)
+
+
+@router.get("")
+async def list_jobs(project_id: str, limit: int = Query(20, ge=1, le=100, description="조회할 최대 작업 수")):
+    """프로젝트의 AI 작업 목록 (최신순)"""
+    try:
+        storage = get_storage()
+        return {"jobs": storage.list_jobs(project_id=project_id, limit=limit)}
+    except Exception as e:
+        raise StorageError(f"AI 작업 목록 조회 실패: {str(e)}")
+
+
+def _get_project_job(project_id: str, job_id: str) -> dict:
+    job = get_storage().get_job(job_id)
+    if not job or job.get("project_id") != project_id:
+        raise NotFoundError("AI 작업", job_id)
+    return job
+
+
+@router.get("/{job_id}")
+async def get_job(project_id: str, job_id: str):
+    """AI 작업 상태와 결과 조회 (폴링용)"""
+    return {"job": _get_project_job(project_id, job_id)}
+
+
+@router.get("/{job_id}/events")
+async def job_events(project_id: str, job_id: str):
+    """
+    AI 작업 상태 변경 스트림 (SSE)
+
+    상태가 바뀔 때마다 event: status 로 작업 정보를 보내고, 완료(succeeded/failed)되면 스트림을 닫습니다.
+    """
+    job = _get_project_job(project_id, job_id)
+    poll_seconds = float(os.getenv("AI_JOB_EVENTS_POLL_SECONDS", "2"))
+    queue = get_job_queue()
+
+    async def event_stream():
+        current = job
+        last_sent = None
+        while True:
+            marker = (current["status"], current.get("attempts"))
+            if marker != last_sent:
+                yield format_sse_event("status", current)
+                last_sent = marker
+            else:
+                # 변경이 없어도 주기적으로 보내 프록시가 유휴 연결을 끊지 않도록 함
+                yield ": keep-alive\n\n"
+            if current["status"] in TERMINAL_STATUSES:
+                return
+            await queue.wait_for_change(job_id, poll_seconds)
+            current = get_storage().get_job(job_id) or current
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
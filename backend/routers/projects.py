@@ -5,17 +5,24 @@ from fastapi import APIRouter
 from models import ProjectCreate, ProjectUpdate, ProjectDuplicate
 from storage import get_storage
 from exceptions import ProjectNotFoundError, StorageError, ValidationError
+from analysis import get_reachability_indexes
+from ai_retrieval import get_block_text_indexes
 
 router = APIRouter(prefix="/api/projects", tags=["projects"])
 
-# 저장소 인스턴스 가져오기
-storage = get_storage()
+# 응답에서 뺄 내부 필드 (이전 버전이 프로젝트 문서에 저장한 AI 피드백 상태)
+_INTERNAL_FIELDS = ("feedback_state",)
+
+
+def _public_project(project: dict) -> dict:
+    return {key: value for key, value in project.items() if key not in _INTERNAL_FIELDS}
 
 
 @router.post("")
 async def create_project(project: ProjectCreate):
     """새 프로젝트 생성"""
     try:
+        storage = get_storage()
         created_project = storage.create_project(project.name)
         return {"project": created_project}
     except Exception as e:
@@ -26,8 +33,9 @@ async def create_project(project: ProjectCreate):
 async def get_all_projects():
     """모든 프로젝트 조회"""
     try:
+        storage = get_storage()
         projects = storage.get_all_projects()
-        return {"projects": projects}
+        return {"projects": [_public_project(project) for project in projects]}
     except Exception as e:
         raise StorageError(f"프로젝트 조회 실패: {str(e)}")
 
@@ -36,12 +44,13 @@ async def get_all_projects():
 async def get_project(project_id: str):
     """프로젝트 조회"""
     try:
+        storage = get_storage()
         project = storage.get_project(project_id)
         
         if project is None:
             raise ProjectNotFoundError(project_id)
         
-        return {"project": project}
+        return {"project": _public_project(project)}
     except ProjectNotFoundError:
         raise
     except Exception as e:
@@ -52,13 +61,14 @@ async def get_project(project_id: str):
 async def update_project(project_id: str, project_update: ProjectUpdate):
     """프로젝트 업데이트"""
     try:
+        storage = get_storage()
         updates = project_update.dict(exclude_unset=True)
         updated_project = storage.update_project(project_id, updates)
         
         if updated_project is None:
             raise ProjectNotFoundError(project_id)
         
-        return {"project": updated_project}
+        return {"project": _public_project(updated_project)}
     except ProjectNotFoundError:
         raise
     except Exception as e:
@@ -69,11 +79,14 @@ async def update_project(project_id: str, project_update: ProjectUpdate):
 async def delete_project(project_id: str):
     """프로젝트 삭제"""
     try:
+        storage = get_storage()
         success = storage.delete_project(project_id)
         
         if not success:
             raise ProjectNotFoundError(project_id)
         
+        get_reachability_indexes().invalidate(project_id)
+        get_block_text_indexes().invalidate(project_id)
         return {"message": "프로젝트가 삭제되었습니다", "project_id": project_id}
     except ProjectNotFoundError:
         raise
@@ -85,6 +98,7 @@ async def delete_project(project_id: str):
 async def duplicate_project(project_id: str, duplicate_data: ProjectDuplicate):
     """프로젝트 복제"""
     try:
+        storage = get_storage()
         new_project = storage.duplicate_project(project_id, duplicate_data.name, duplicate_data.copy_structure)
         return {"project": new_project}
     except ValueError as e:
@@ -0,0 +1,50 @@
+"""
+동일 요청 단일 실행 (single-flight)
+
+같은 키로 동시에 들어온 호출은 하나의 작업만 실행하고 그 결과(또는 예외)를 함께 받습니다.
+작업은 별도 Task로 실행되므로, 먼저 요청한 클라이언트가 연결을 끊어도
+뒤따라 기다리는 호출에는 영향을 주지 않습니다.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """키별 진행 중 작업을 공유하는 코얼레싱 그룹"""
+
+    def __init__(self, name: str = "single-flight"):
+        self.name = name
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.stats = {"executed": 0, "coalesced": 0}
+
+    async def do(self, key: str, work: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        key에 해당하는 작업이 진행 중이면 그 결과를 기다리고, 없으면 work()를 실행
+
+        Args:
+            key: 동일 요청 판별 키
+            work: 실제 작업을 수행하는 코루틴 함수 (인자 없음)
+        """
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            print(f"🔗 {self.name}: 진행 중인 동일 요청에 합류 (key={key[:60]})")
+        else:
+            self.stats["executed"] += 1
+            task = asyncio.ensure_future(work())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._on_done(key, done))
+
+        # shield: 이 호출이 취소되어도 공유 작업은 계속 진행
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # 기다리던 호출이 모두 취소된 경우에도 "exception was never retrieved" 경고가 나지 않도록 확인
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight_keys(self):
+        """진행 중인 작업 키 목록"""
+        return list(self._in_flight.keys())
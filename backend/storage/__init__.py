@@ -2,15 +2,24 @@
 저장소 인터페이스 및 구현체
 """
 import os
+import threading
 
 from .base import StorageInterface
 from .memory_store import MemoryStore
-from .firestore_store import FirestoreStore
 
-__all__ = ['StorageInterface', 'MemoryStore', 'FirestoreStore', 'get_storage']
+__all__ = ['StorageInterface', 'MemoryStore', 'FirestoreStore', 'get_storage', 'is_storage_ready']
 
 # 전역 저장소 인스턴스 (싱글톤 패턴)
 _storage_instance = None
+_storage_lock = threading.Lock()
+
+
+def __getattr__(name):
+    # FirestoreStore는 Firebase SDK를 끌어오므로 실제로 필요할 때 import
+    if name == "FirestoreStore":
+        from .firestore_store import FirestoreStore
+        return FirestoreStore
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_storage() -> StorageInterface:
@@ -18,14 +27,23 @@ def get_storage() -> StorageInterface:
     global _storage_instance
     
     if _storage_instance is None:
-        USE_MEMORY_STORE = os.getenv("USE_MEMORY_STORE", "false").lower() == "true"
-        
-        if USE_MEMORY_STORE:
-            print("⚠️  인메모리 저장소를 사용합니다 (로컬 테스트 모드)")
-            _storage_instance = MemoryStore()
-        else:
-            print("📦 Firestore를 사용합니다")
-            _storage_instance = FirestoreStore()
+        # 시작 시 백그라운드 워밍업과 첫 요청이 동시에 생성하지 않도록 잠금
+        with _storage_lock:
+            if _storage_instance is None:
+                USE_MEMORY_STORE = os.getenv("USE_MEMORY_STORE", "false").lower() == "true"
+                
+                if USE_MEMORY_STORE:
+                    print("⚠️  인메모리 저장소를 사용합니다 (로컬 테스트 모드)")
+                    _storage_instance = MemoryStore()
+                else:
+                    print("📦 Firestore를 사용합니다")
+                    from .firestore_store import FirestoreStore
+                    _storage_instance = FirestoreStore()
     
     return _storage_instance
 
+
+
+def is_storage_ready() -> bool:
+    """저장소 인스턴스가 이미 생성되었는지 여부"""
+    return _storage_instance is not None
@@ -3,6 +3,7 @@
 모든 저장소 구현체는 이 인터페이스를 구현해야 함
 """
 from abc import ABC, abstractmethod
+from datetime import datetime
 from typing import List, Optional, Dict
 
 
@@ -30,6 +31,16 @@ class StorageInterface(ABC):
         """블록 업데이트"""
         pass
     
+    @abstractmethod
+    def batch_create_blocks(self, project_id: str, blocks_data: List[dict]) -> List[dict]:
+        """여러 블록을 한 번에 생성, 생성된 블록(id 포함) 목록 반환"""
+        pass
+    
+    @abstractmethod
+    def batch_update_blocks(self, project_id: str, updates_by_id: Dict[str, dict]) -> int:
+        """여러 블록을 한 번에 업데이트 ({블록 ID: 업데이트}), 업데이트한 블록 수 반환"""
+        pass
+    
     @abstractmethod
     def delete_block(self, project_id: str, block_id: str) -> bool:
         """블록 삭제"""
@@ -73,6 +84,17 @@ class StorageInterface(ABC):
         """카테고리 색상 맵 업데이트"""
         pass
     
+    # AI 피드백 상태 (다음 피드백 요청의 비교 기준, 보드 스냅샷이 커서 프로젝트 문서와 따로 저장)
+    @abstractmethod
+    def get_feedback_state(self, project_id: str) -> Optional[dict]:
+        """마지막 AI 피드백 상태 조회 (없으면 None)"""
+        pass
+    
+    @abstractmethod
+    def save_feedback_state(self, project_id: str, state: dict) -> None:
+        """AI 피드백 상태 저장 (state["blocks"]는 board_diff.board_snapshot 결과)"""
+        pass
+    
     # 연결선 색상 팔레트 관련 메서드
     @abstractmethod
     def get_connection_color_palette(self, project_id: str) -> List[str]:
@@ -114,4 +136,34 @@ class StorageInterface(ABC):
     def duplicate_project(self, source_project_id: str, new_project_name: str, copy_structure: bool = True) -> dict:
         """프로젝트 복제"""
         pass
-
+    
+    # AI 작업(백그라운드 job) 관련 메서드
+    @abstractmethod
+    def create_job(self, job_data: dict) -> dict:
+        """작업 생성 (job_data에 id 포함)"""
+        pass
+    
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[dict]:
+        """작업 조회"""
+        pass
+    
+    @abstractmethod
+    def update_job(self, job_id: str, updates: dict) -> Optional[dict]:
+        """작업 업데이트"""
+        pass
+    
+    @abstractmethod
+    def claim_job(self, job_id: str, worker_id: str) -> Optional[dict]:
+        """대기 중(pending)인 작업을 실행 중(running)으로 원자적으로 전환 (이미 다른 워커가 가져갔으면 None)"""
+        pass
+    
+    @abstractmethod
+    def list_jobs(self, project_id: Optional[str] = None, statuses: Optional[List[str]] = None, limit: int = 50) -> List[dict]:
+        """작업 목록 조회 (최신순)"""
+        pass
+    
+    @abstractmethod
+    def delete_finished_jobs(self, finished_before: datetime, limit: int = 500) -> int:
+        """finished_before 이전에 끝난(succeeded/failed) 작업을 최대 limit개 삭제, 삭제한 수 반환"""
+        pass
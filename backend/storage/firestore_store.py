@@ -1,15 +1,19 @@
 """
 Firestore 저장소 구현체
 """
+from datetime import datetime
 from typing import List, Optional, Dict
 from .base import StorageInterface
-import firebase_admin
-from firebase_admin import credentials, firestore
+import json
 import os
 
 
 def init_firestore():
     """Firestore 초기화"""
+    # Firebase SDK는 import 비용이 커서 클라이언트를 만들 때 가져옴 (콜드 스타트 단축)
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
     if not firebase_admin._apps:
         from utils import find_credentials_file
         
@@ -45,6 +49,20 @@ def init_firestore():
     return firestore.client()
 
 
+def _split_map(items: Dict[str, dict], max_bytes: int) -> List[Dict[str, dict]]:
+    """map을 JSON 크기 기준 max_bytes 이하 조각들로 나눔 (Firestore 문서 크기 제한 1MiB 대응)"""
+    chunks: List[Dict[str, dict]] = [{}]
+    size = 0
+    for key, value in items.items():
+        item_size = len(key) + len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        if chunks[-1] and size + item_size > max_bytes:
+            chunks.append({})
+            size = 0
+        chunks[-1][key] = value
+        size += item_size
+    return chunks
+
+
 class FirestoreStore(StorageInterface):
     """Firestore 저장소 구현체"""
     
@@ -55,6 +73,8 @@ class FirestoreStore(StorageInterface):
         self.CATEGORIES_DOC_ID = "categories"
         self.DEPENDENCY_COLORS_DOC_ID = "dependency_colors"
         self.CATEGORY_COLORS_DOC_ID = "category_colors"
+        self.JOBS_COLLECTION = "ai_jobs"
+        self.FEEDBACK_STATE_DOC_ID = "feedback_state"
     
     def get_all_blocks(self, project_id: str) -> List[dict]:
         """프로젝트의 모든 블록 조회 (서버 측 정렬 사용)"""
@@ -157,6 +177,41 @@ class FirestoreStore(StorageInterface):
         block["id"] = updated_doc.id
         return block
     
+    def batch_create_blocks(self, project_id: str, blocks_data: List[dict]) -> List[dict]:
+        """여러 블록을 한 번에 생성 (WriteBatch, 배치당 최대 500개 쓰기 제한에 맞춰 나누어 커밋)"""
+        blocks_ref = self.db.collection(self.PROJECTS_COLLECTION).document(project_id).collection(self.BLOCKS_COLLECTION)
+        # order가 없는 블록은 레벨별 기존 블록 수 다음부터 (레벨마다 한 번만 조회)
+        next_order: Dict = {}
+        for block_data in blocks_data:
+            if block_data.get("order") is None:
+                level = block_data.get("level", 0)
+                if level not in next_order:
+                    next_order[level] = sum(1 for _ in blocks_ref.where("level", "==", level).stream())
+                block_data["order"] = next_order[level]
+                next_order[level] += 1
+        for start in range(0, len(blocks_data), 500):
+            batch = self.db.batch()
+            for block_data in blocks_data[start:start + 500]:
+                doc_ref = blocks_ref.document()
+                block_data["id"] = doc_ref.id
+                batch.set(doc_ref, block_data)
+            batch.commit()
+        print(f"✅ 블록 일괄 생성: project_id={project_id}, count={len(blocks_data)}")
+        return blocks_data
+    
+    def batch_update_blocks(self, project_id: str, updates_by_id: Dict[str, dict]) -> int:
+        """여러 블록을 한 번에 업데이트 (WriteBatch, 배치당 최대 500개 쓰기 제한에 맞춰 나누어 커밋)"""
+        blocks_ref = self.db.collection(self.PROJECTS_COLLECTION).document(project_id).collection(self.BLOCKS_COLLECTION)
+        items = [(block_id, {k: v for k, v in updates.items() if v is not None}) for block_id, updates in updates_by_id.items()]
+        items = [(block_id, updates) for block_id, updates in items if updates]
+        for start in range(0, len(items), 500):
+            batch = self.db.batch()
+            for block_id, updates in items[start:start + 500]:
+                batch.update(blocks_ref.document(block_id), updates)
+            batch.commit()
+        print(f"✅ 블록 일괄 업데이트: project_id={project_id}, count={len(items)}")
+        return len(items)
+    
     def delete_block(self, project_id: str, block_id: str) -> bool:
         """블록 삭제"""
         doc_ref = self.db.collection(self.PROJECTS_COLLECTION).document(project_id).collection(self.BLOCKS_COLLECTION).document(block_id)
@@ -238,6 +293,53 @@ class FirestoreStore(StorageInterface):
         doc_ref.set({"colors": colors})
         return colors
     
+    def get_feedback_state(self, project_id: str) -> Optional[dict]:
+        """AI 피드백 상태 조회 (metadata/feedback_state + 블록 스냅샷 조각 문서들)"""
+        metadata_ref = self.db.collection(self.PROJECTS_COLLECTION).document(project_id).collection("metadata")
+        doc = metadata_ref.document(self.FEEDBACK_STATE_DOC_ID).get()
+        if not doc.exists:
+            return None
+        
+        state = doc.to_dict()
+        chunk_refs = [metadata_ref.document(chunk_id) for chunk_id in state.pop("block_chunk_ids", [])]
+        blocks = {}
+        for chunk_doc in self.db.get_all(chunk_refs):
+            if chunk_doc.exists:
+                blocks.update(chunk_doc.to_dict().get("blocks", {}))
+        state["blocks"] = blocks
+        return state
+    
+    def save_feedback_state(self, project_id: str, state: dict) -> None:
+        """
+        AI 피드백 상태 저장
+        
+        블록 스냅샷은 블록 수에 비례해 커지므로 약 500KB씩 나눈 조각 문서에 새 이름으로 저장한 뒤,
+        상태 문서(조각 문서 ID 목록 포함)를 바꾸고 이전 조각을 삭제합니다.
+        중간에 실패해도 상태 문서는 이전 조각들을 가리키므로 이전 상태가 그대로 유지됩니다.
+        """
+        import uuid
+        
+        metadata_ref = self.db.collection(self.PROJECTS_COLLECTION).document(project_id).collection("metadata")
+        state_ref = metadata_ref.document(self.FEEDBACK_STATE_DOC_ID)
+        previous = state_ref.get()
+        previous_chunk_ids = previous.to_dict().get("block_chunk_ids", []) if previous.exists else []
+        
+        generation = uuid.uuid4().hex[:8]
+        chunks = _split_map(state.get("blocks") or {}, 500_000)
+        chunk_ids = [f"{self.FEEDBACK_STATE_DOC_ID}_{generation}_{number}" for number in range(len(chunks))]
+        # 요청 크기 제한(10MiB)을 넘지 않도록 배치당 조각 8개(약 4MB)까지
+        for start in range(0, len(chunks), 8):
+            batch = self.db.batch()
+            for chunk_id, chunk in zip(chunk_ids[start:start + 8], chunks[start:start + 8]):
+                batch.set(metadata_ref.document(chunk_id), {"blocks": chunk})
+            batch.commit()
+        
+        batch = self.db.batch()
+        batch.set(state_ref, {**{key: value for key, value in state.items() if key != "blocks"}, "block_chunk_ids": chunk_ids})
+        for chunk_id in previous_chunk_ids:
+            batch.delete(metadata_ref.document(chunk_id))
+        batch.commit()
+    
     def get_connection_color_palette(self, project_id: str) -> List[str]:
         """프로젝트의 연결선 색상 팔레트 조회"""
         doc_ref = self.db.collection(self.PROJECTS_COLLECTION).document(project_id).collection("metadata").document("connection_color_palette")
@@ -397,4 +499,99 @@ class FirestoreStore(StorageInterface):
         print(f"✅ 프로젝트 복제 성공: source_id={source_project_id}, new_id={new_project_id}, copy_structure={copy_structure}, blocks={len(source_blocks)}")
         
         return new_project_data
-
+    
+    def create_job(self, job_data: dict) -> dict:
+        """작업 생성"""
+        doc_ref = self.db.collection(self.JOBS_COLLECTION).document(job_data["id"])
+        doc_ref.set(job_data)
+        return dict(job_data)
+    
+    def get_job(self, job_id: str) -> Optional[dict]:
+        """작업 조회"""
+        doc = self.db.collection(self.JOBS_COLLECTION).document(job_id).get()
+        if doc.exists:
+            job = doc.to_dict()
+            job["id"] = doc.id
+            return job
+        return None
+    
+    def update_job(self, job_id: str, updates: dict) -> Optional[dict]:
+        """작업 업데이트"""
+        from datetime import datetime
+        
+        doc_ref = self.db.collection(self.JOBS_COLLECTION).document(job_id)
+        updates = {**updates, "updatedAt": datetime.now()}
+        try:
+            doc_ref.update(updates)
+        except Exception as e:
+            # 문서가 없으면 NotFound
+            print(f"⚠️  작업 업데이트 실패 ({job_id}): {e}")
+            return None
+        return self.get_job(job_id)
+    
+    def claim_job(self, job_id: str, worker_id: str) -> Optional[dict]:
+        """대기 중인 작업을 실행 중으로 전환 (트랜잭션으로 여러 인스턴스 간 중복 실행 방지)"""
+        from datetime import datetime
+        from google.cloud import firestore
+        
+        doc_ref = self.db.collection(self.JOBS_COLLECTION).document(job_id)
+        
+        @firestore.transactional
+        def claim(transaction):
+            snapshot = doc_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return None
+            job = snapshot.to_dict()
+            if job.get("status") != "pending":
+                return None
+            now = datetime.now()
+            updates = {
+                "status": "running",
+                "worker_id": worker_id,
+                "attempts": job.get("attempts", 0) + 1,
+                "startedAt": now,
+                "updatedAt": now,
+            }
+            transaction.update(doc_ref, updates)
+            job.update(updates)
+            job["id"] = snapshot.id
+            return job
+        
+        return claim(self.db.transaction())
+    
+    def list_jobs(self, project_id: Optional[str] = None, statuses: Optional[List[str]] = None, limit: int = 50) -> List[dict]:
+        """작업 목록 조회 (최신순, 서버 측 정렬/제한 사용)"""
+        from google.cloud.firestore import Query
+        
+        query = self.db.collection(self.JOBS_COLLECTION)
+        if project_id is not None:
+            query = query.where("project_id", "==", project_id)
+        if statuses is not None:
+            query = query.where("status", "in", statuses)
+        
+        # firestore.indexes.json에 ai_jobs (project_id, createdAt), (status, createdAt) 복합 인덱스가 필요함
+        try:
+            docs = list(query.order_by("createdAt", direction=Query.DESCENDING).limit(limit).stream())
+        except Exception as index_error:
+            # 인덱스가 아직 생성되지 않은 경우 fallback: 모든 문서를 가져온 후 메모리에서 정렬
+            print(f"⚠️  작업 목록 인덱스 쿼리 실패, 메모리 정렬 사용: {index_error}")
+            docs = sorted(query.stream(), key=lambda doc: doc.to_dict()["createdAt"], reverse=True)[:limit]
+        
+        jobs = []
+        for doc in docs:
+            job = doc.to_dict()
+            job["id"] = doc.id
+            jobs.append(job)
+        return jobs
+    
+    def delete_finished_jobs(self, finished_before: datetime, limit: int = 500) -> int:
+        """finished_before 이전에 끝난 작업 삭제 (finishedAt 단일 필드 범위 조회, 배치당 최대 500개)"""
+        docs = list(
+            self.db.collection(self.JOBS_COLLECTION).where("finishedAt", "<", finished_before).limit(limit).stream()
+        )
+        for start in range(0, len(docs), 500):
+            batch = self.db.batch()
+            for doc in docs[start:start + 500]:
+                batch.delete(doc.reference)
+            batch.commit()
+        return len(docs)
@@ -2,6 +2,7 @@
 로컬 테스트를 위한 인메모리 저장소
 Firestore 설정 없이도 테스트할 수 있도록 사용
 """
+from datetime import datetime
 from typing import List, Optional, Dict
 import uuid
 from .base import StorageInterface
@@ -12,6 +13,7 @@ class MemoryStore(StorageInterface):
         self.projects: Dict[str, Dict[str, dict]] = {}  # project_id -> blocks
         self.project_metadata: Dict[str, dict] = {}  # project_id -> metadata (categories, etc.)
         self.projects_list: Dict[str, dict] = {}  # project_id -> project info
+        self.jobs: Dict[str, dict] = {}  # job_id -> AI 작업
     
     def get_all_blocks(self, project_id: str) -> List[dict]:
         """프로젝트의 모든 블록 조회"""
@@ -51,6 +53,20 @@ class MemoryStore(StorageInterface):
         self.projects[project_id][block_id].update(updates)
         return self.projects[project_id][block_id].copy()
     
+    def batch_create_blocks(self, project_id: str, blocks_data: List[dict]) -> List[dict]:
+        """여러 블록을 한 번에 생성"""
+        return [self.create_block(project_id, block_data) for block_data in blocks_data]
+    
+    def batch_update_blocks(self, project_id: str, updates_by_id: Dict[str, dict]) -> int:
+        """여러 블록을 한 번에 업데이트"""
+        blocks = self.projects.get(project_id, {})
+        updated = 0
+        for block_id, updates in updates_by_id.items():
+            if block_id in blocks:
+                blocks[block_id].update({k: v for k, v in updates.items() if v is not None})
+                updated += 1
+        return updated
+    
     def delete_block(self, project_id: str, block_id: str) -> bool:
         """블록 삭제"""
         if project_id in self.projects and block_id in self.projects[project_id]:
@@ -125,6 +141,17 @@ class MemoryStore(StorageInterface):
         self.project_metadata[project_id]["category_colors"] = colors
         return colors.copy()
     
+    def get_feedback_state(self, project_id: str) -> Optional[dict]:
+        """AI 피드백 상태 조회"""
+        state = self.project_metadata.get(project_id, {}).get("feedback_state")
+        return dict(state) if state else None
+    
+    def save_feedback_state(self, project_id: str, state: dict) -> None:
+        """AI 피드백 상태 저장"""
+        if project_id not in self.project_metadata:
+            self.project_metadata[project_id] = {}
+        self.project_metadata[project_id]["feedback_state"] = dict(state)
+    
     def create_project(self, project_name: str) -> dict:
         """새 프로젝트 생성"""
         from datetime import datetime
@@ -209,4 +236,60 @@ class MemoryStore(StorageInterface):
             self.create_block(new_project_id, new_block_data)
         
         return new_project_data
-
+    
+    def create_job(self, job_data: dict) -> dict:
+        """작업 생성"""
+        self.jobs[job_data["id"]] = dict(job_data)
+        return dict(job_data)
+    
+    def get_job(self, job_id: str) -> Optional[dict]:
+        """작업 조회"""
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+    
+    def update_job(self, job_id: str, updates: dict) -> Optional[dict]:
+        """작업 업데이트"""
+        from datetime import datetime
+        
+        if job_id not in self.jobs:
+            return None
+        self.jobs[job_id].update(updates)
+        self.jobs[job_id]["updatedAt"] = datetime.now()
+        return dict(self.jobs[job_id])
+    
+    def claim_job(self, job_id: str, worker_id: str) -> Optional[dict]:
+        """대기 중인 작업을 실행 중으로 전환"""
+        from datetime import datetime
+        
+        job = self.jobs.get(job_id)
+        if not job or job.get("status") != "pending":
+            return None
+        now = datetime.now()
+        job.update({
+            "status": "running",
+            "worker_id": worker_id,
+            "attempts": job.get("attempts", 0) + 1,
+            "startedAt": now,
+            "updatedAt": now,
+        })
+        return dict(job)
+    
+    def list_jobs(self, project_id: Optional[str] = None, statuses: Optional[List[str]] = None, limit: int = 50) -> List[dict]:
+        """작업 목록 조회 (최신순)"""
+        jobs = [
+            dict(job) for job in self.jobs.values()
+            if (project_id is None or job.get("project_id") == project_id)
+            and (statuses is None or job.get("status") in statuses)
+        ]
+        jobs.sort(key=lambda job: job["createdAt"], reverse=True)
+        return jobs[:limit]
+    
+    def delete_finished_jobs(self, finished_before: datetime, limit: int = 500) -> int:
+        """finished_before 이전에 끝난 작업 삭제"""
+        job_ids = [
+            job_id for job_id, job in self.jobs.items()
+            if job.get("finishedAt") is not None and job["finishedAt"] < finished_before
+        ][:limit]
+        for job_id in job_ids:
+            del self.jobs[job_id]
+        return len(job_ids)
@@ -0,0 +1,16 @@
+"""
+테스트 공통 설정
+
+backend 디렉터리의 모듈을 그대로 import 하고(앱과 같은 방식), 외부 서비스 없이 실행되도록
+인메모리 저장소와 가짜 AI 모델을 사용합니다.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("USE_MEMORY_STORE", "true")
+os.environ.setdefault("VERTEX_AI_FAKE", "true")
+os.environ.setdefault("WARMUP_ON_STARTUP", "false")
+os.environ.setdefault("AI_CACHE_ENABLED", "false")
@@ -0,0 +1,18 @@
+"""ai_prompt 블록 별칭 테스트"""
+from ai_prompt import BlockAliases
+
+BLOCK_IDS = ["id-payment", "id-signup"]
+LABELS = {"id-payment": "결제", "id-signup": "가입"}
+
+
+def test_restore_text_replaces_aliases():
+    aliases = BlockAliases(BLOCK_IDS)
+    assert aliases.alias("id-payment") == "B1"
+    assert aliases.restore_text("B1의 선행 블록은 B2입니다 (B1, B2)", LABELS) == \
+        "'결제'의 선행 블록은 '가입'입니다 ('결제', '가입')"
+
+
+def test_restore_text_keeps_words_containing_aliases():
+    aliases = BlockAliases(BLOCK_IDS)
+    text = "B2B 마케팅과 B2C 채널, B1_draft, AB1, B12"
+    assert aliases.restore_text(text, LABELS) == text
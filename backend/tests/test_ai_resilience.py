@@ -0,0 +1,89 @@
+"""ai_resilience 재시도/회로 차단기 테스트"""
+import asyncio
+import pytest
+from ai_resilience import CircuitBreaker, ResilientCaller
+from exceptions import AIUnavailableError
+
+
+def _caller() -> ResilientCaller:
+    return ResilientCaller(
+        max_attempts=1,
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout_seconds=0),
+    )
+
+
+async def _fail():
+    raise ConnectionError("backend down")
+
+
+async def _succeed():
+    return "ok"
+
+
+def test_breaker_opens_and_closes_after_successful_probe():
+    async def scenario():
+        caller = _caller()
+        with pytest.raises(AIUnavailableError):
+            await caller.call(_fail)
+        assert caller.breaker.state == CircuitBreaker.OPEN
+        assert await caller.call(_succeed) == "ok"
+        assert caller.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_probe_releases_half_open_breaker():
+    async def scenario():
+        caller = _caller()
+        with pytest.raises(AIUnavailableError):
+            await caller.call(_fail)
+
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(60)
+
+        probe = asyncio.create_task(caller.call(hang))
+        await started.wait()
+        assert caller.breaker.state == CircuitBreaker.HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        # 취소된 시험 호출이 자리를 반납했으므로 다음 호출이 시험 호출로 허용됨
+        assert await caller.call(_succeed) == "ok"
+        assert caller.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+class _BadRequest(Exception):
+    code = 400
+
+
+async def _bad_request():
+    raise _BadRequest("invalid argument")
+
+
+def test_non_retryable_error_leaves_breaker_state_unchanged():
+    async def scenario():
+        caller = ResilientCaller(max_attempts=1, breaker=CircuitBreaker(failure_threshold=2, reset_timeout_seconds=0))
+        with pytest.raises(AIUnavailableError):
+            await caller.call(_fail)
+        # 잘못된 요청은 연속 실패 횟수를 초기화하지 않음
+        with pytest.raises(_BadRequest):
+            await caller.call(_bad_request)
+        assert caller.breaker.consecutive_failures == 1
+
+        with pytest.raises(AIUnavailableError):
+            await caller.call(_fail)
+        assert caller.breaker.state == CircuitBreaker.OPEN
+        # half_open 시험 호출이 잘못된 요청으로 끝나도 회로를 닫지 않고, 다음 호출이 다시 시험 호출이 됨
+        with pytest.raises(_BadRequest):
+            await caller.call(_bad_request)
+        assert caller.breaker.state == CircuitBreaker.HALF_OPEN
+        assert await caller.call(_succeed) == "ok"
+        assert caller.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
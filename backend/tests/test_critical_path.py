@@ -0,0 +1,25 @@
+"""analysis.critical_path 테스트"""
+from analysis.critical_path import critical_path
+
+
+def _block(block_id, weight, level, dependencies=()):
+    return {"id": block_id, "effort": weight, "level": level, "dependencies": list(dependencies)}
+
+
+def test_fractional_weights_keep_critical_blocks_at_zero_slack():
+    blocks = [
+        _block("a", 0.1, 0), _block("b", 0.2, 1, ["a"]), _block("c", 0.3, 4, ["b"]),
+        _block("x", 0.3, 0), _block("y", 0.3, 4, ["x"]), _block("z", 0.6, 4),
+    ]
+    result = critical_path(blocks, weight_field="effort")
+    assert result["length"] == 0.6
+    assert result["zero_slack"] == ["a", "b", "c", "x", "y", "z"]
+    assert result["critical_path"] == ["a", "b", "c"]
+
+
+def test_unweighted_chain():
+    blocks = [_block("a", 1, 0), _block("b", 1, 1, ["a"]), _block("c", 1, 4, ["b"]), _block("d", 1, 4)]
+    result = critical_path(blocks)
+    assert result["length"] == 3
+    assert result["zero_slack"] == ["a", "b", "c"]
+    assert result["blocks"]["d"]["slack"] == 2
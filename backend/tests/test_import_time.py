@@ -0,0 +1,46 @@
+"""
+앱 import 시간 예산 테스트
+
+서버 콜드 스타트에 무거운 SDK/라이브러리가 다시 들어오지 않도록 새 프로세스에서
+python -X importtime -c "import main"을 실행해 확인합니다.
+- 불러오면 안 되는 모듈: Vertex AI/Firestore SDK (첫 사용 시 로드), NumPy/SciPy (분석/검색 계산 시 로드)
+- main 누적 import 시간이 IMPORT_TIME_BUDGET_MS(기본 2000ms) 이하
+"""
+import os
+import subprocess
+import sys
+from conftest import BACKEND_DIR
+
+DEFERRED_MODULES = ("vertexai", "google.cloud.aiplatform", "google.cloud.firestore", "firebase_admin", "numpy", "scipy")
+
+
+def _import_main() -> dict:
+    """새 프로세스에서 main을 import 하고 {모듈 이름: 누적 import 시간(us)} 반환"""
+    env = {**os.environ, "USE_MEMORY_STORE": "true", "WARMUP_ON_STARTUP": "false"}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative
+
+
+def test_import_main_defers_heavy_modules_and_stays_within_budget():
+    cumulative = _import_main()
+
+    loaded = sorted(
+        name for name in cumulative
+        if any(name == module or name.startswith(module + ".") for module in DEFERRED_MODULES)
+    )
+    assert not loaded, f"앱 import 시 불러오면 안 되는 모듈: {loaded}"
+
+    budget_ms = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2000"))
+    main_ms = cumulative["main"] / 1000
+    assert main_ms <= budget_ms, f"import main {main_ms:.0f}ms > 예산 {budget_ms:.0f}ms"
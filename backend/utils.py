@@ -1,6 +1,7 @@
 """
 공통 유틸리티 함수
 """
+import json
 import os
 import pathlib
 from typing import Optional
@@ -49,4 +50,6 @@ def find_credentials_file() -> Optional[str]:
     return None
 
 
-
+def format_sse_event(event: str, data) -> str:
+    """Server-Sent Events 형식 메시지 (data는 JSON으로 직렬화)"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"